@@ -1,27 +1,33 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from database.connection import get_db
-from database.models import User, TokenBlacklist
-from auth.jwt_handler import decode_token
+from database.connection import DBSession, get_db
+from database.models import User
+from services.user_service import AsyncUserService, UserService
+from auth import revocation
+from auth.jwt_handler import decode_token, token_digest
 
 security = HTTPBearer()
 
 
 def is_token_blacklisted(token: str, db: Session) -> bool:
-    return (
-        db.query(TokenBlacklist).filter(TokenBlacklist.token == token).first()
-        is not None
-    )
+    return UserService.is_token_blacklisted(db, token)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ) -> User:
+    # Sessions only check out a connection on first use, so a request whose
+    # token the revocation filter rules out and whose user is in the
+    # principal cache never touches the pool
     token = credentials.credentials
 
-    if is_token_blacklisted(token, db):
+    if revocation.rules_out(token_digest(token)):
+        revoked = False
+    else:
+        revoked = await AsyncUserService.is_token_blacklisted(db, token)
+    if revoked:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
         )
@@ -41,7 +47,7 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = await AsyncUserService.get_principal(db, int(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
@@ -1,14 +1,30 @@
-from jose import JWTError, jwt
+import hashlib
+from functools import lru_cache
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 from datetime import datetime, timedelta, timezone
 from typing import Dict
+from auth.token_cache import VerifiedTokenCache
 from config.settings import settings
 
+token_cache = VerifiedTokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+
+
+@lru_cache(maxsize=4)
+def _signing_key(secret: str, algorithm: str) -> Key:
+    # jose otherwise re-parses the secret into a key object on every call
+    return jwk.construct(secret, algorithm)
+
 
 def create_token(data: dict, expires_delta: timedelta) -> str:
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + expires_delta
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return jwt.encode(
+        to_encode,
+        _signing_key(settings.SECRET_KEY, settings.ALGORITHM),
+        algorithm=settings.ALGORITHM,
+    )
 
 
 def create_access_token(user_id: int) -> str:
@@ -26,10 +42,27 @@ def create_refresh_token(user_id: int) -> str:
 
 
 def decode_token(token: str) -> Dict:
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            token,
+            _signing_key(settings.SECRET_KEY, settings.ALGORITHM),
+            algorithms=[settings.ALGORITHM],
         )
-        return payload
     except JWTError:
         raise ValueError("Invalid token")
+    token_cache.put(digest, payload)
+    return payload
+
+
+def token_digest(token: str) -> str:
+    """Fixed-size key for a token (hex SHA-256), used instead of the raw JWT."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expiry(token: str) -> datetime:
+    """The ``exp`` of a token the caller has already verified."""
+    return datetime.fromtimestamp(jwt.get_unverified_claims(token)["exp"], timezone.utc)
@@ -1,11 +1,193 @@
+import asyncio
+import math
+import os
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple, TypeVar
 from passlib.context import CryptContext
+from config.settings import settings
+from monitoring.metrics import histogram
+
+T = TypeVar("T")
+
+# bcrypt takes tens to hundreds of milliseconds at production costs
+HASH_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+HASH_SECONDS = histogram(
+    "password_hash_duration_seconds",
+    "CPU time of one bcrypt hash or verify",
+    ("operation",),
+    buckets=HASH_BUCKETS,
+)
+HASH_QUEUE_SECONDS = histogram(
+    "password_hash_queue_seconds",
+    "Time a hash waited for a free worker in the hashing pool",
+    ("operation",),
+    buckets=HASH_BUCKETS,
+)
+
+# bcrypt's own bounds on the log2 work factor
+BCRYPT_MIN_COST = 4
+BCRYPT_MAX_COST = 31
+CALIBRATION_COST = 8
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+def configure_rounds(rounds: int) -> None:
+    """Hash new passwords at ``rounds`` and flag cheaper hashes for rehash."""
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def current_rounds() -> int:
+    return pwd_context.to_dict()["bcrypt__default_rounds"]
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Work factor of a ``$2b$NN$...`` hash, or None if it is not bcrypt."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(
+    target_ms: float, min_rounds: int = BCRYPT_MIN_COST, samples: int = 3
+) -> int:
+    """Largest work factor whose hash time fits ``target_ms`` on this machine.
+
+    Times a cheap reference cost and extrapolates, since every extra round
+    doubles the work, then checks the pick with one real hash.
+    """
+    if not target_ms > 0:
+        raise ValueError(
+            f"bcrypt target must be a positive number of milliseconds, not {target_ms}"
+        )
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        pwd_context.hash("calibration", rounds=CALIBRATION_COST)
+        timings.append((time.perf_counter() - started) * 1000)
+    reference_ms = statistics.median(timings)
+
+    rounds = CALIBRATION_COST + math.floor(math.log2(target_ms / reference_ms))
+    rounds = max(min_rounds, min(rounds, BCRYPT_MAX_COST))
+    started = time.perf_counter()
+    pwd_context.hash("calibration", rounds=rounds)
+    if (time.perf_counter() - started) * 1000 > target_ms and rounds > min_rounds:
+        rounds -= 1
+    return rounds
+
+
+configure_rounds(settings.BCRYPT_ROUNDS)
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify, and return a replacement hash if the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    # Runs in the worker, so process-pool hashes are timed there too
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when the hashing pool is saturated."""
+
+
+class PasswordHasher:
+    """Bounded pool that keeps bcrypt's CPU time off the event loop.
+
+    At most ``workers`` hashes run at once and at most ``max_queue`` more
+    wait; beyond that callers get PasswordHasherBusy straight away, so a
+    login burst is shed quickly instead of piling up behind the pool.
+    ``kind="inline"`` hashes on the calling thread (the old behaviour).
+    """
+
+    def __init__(self, kind: str, workers: int, max_queue: int):
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Child processes hash with the parent's (possibly calibrated) cost
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=configure_rounds,
+                    initargs=(current_rounds(),),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        operation = fn.__name__
+        if self.kind == "inline":
+            result, seconds = _timed(fn, *args)
+            HASH_SECONDS.observe(seconds, operation=operation)
+            return result
+        if self.pending >= self.capacity:
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            result, seconds = await loop.run_in_executor(
+                self._get_executor(), _timed, fn, *args
+            )
+        finally:
+            self.pending -= 1
+        HASH_SECONDS.observe(seconds, operation=operation)
+        HASH_QUEUE_SECONDS.observe(
+            max(time.perf_counter() - started - seconds, 0.0), operation=operation
+        )
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher(
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    return await hasher.run(verify_and_update, plain_password, hashed_password)
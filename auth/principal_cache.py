@@ -0,0 +1,83 @@
+"""Per-worker TTL cache of authenticated users, keyed by user id.
+
+``get_current_user`` consults it before loading the user row, so a hit (with
+the revocation filter ruling the token out) serves an authenticated request
+without touching the database. Only active users are cached, and the password
+hash is never kept.
+
+Writes made through this worker (``UserService.update_profile`` and
+``UserService.deactivate_user``) invalidate the entry immediately; changes
+made by other workers become visible within PRINCIPAL_CACHE_TTL_SECONDS.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config.settings import settings
+from database.models import User
+from monitoring.metrics import counter
+
+# Columns copied into the cache; everything a principal is read for
+PRINCIPAL_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "mobile",
+    "picture",
+    "country",
+    "is_active",
+    "created_at",
+)
+
+CACHE_HITS = counter("principal_cache_hits_total", "Principal cache hits")
+CACHE_MISSES = counter("principal_cache_misses_total", "Principal cache misses")
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[User]:
+        """A detached copy of the cached user, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                entry = None
+        if entry is None:
+            CACHE_MISSES.inc()
+            return None
+        CACHE_HITS.inc()
+        # A fresh instance per request, so callers never share mutable state
+        return User(**entry[1])
+
+    def put(self, user: User) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        values = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl, values)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_MAX_ENTRIES
+)
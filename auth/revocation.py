@@ -0,0 +1,120 @@
+"""Per-worker Bloom filter in front of the token_blacklist table.
+
+Most authenticated requests carry tokens that were never revoked. The filter
+answers those "not revoked" checks without a database round trip. A hit is
+only "maybe", so it is confirmed with the indexed digest lookup.
+
+Each worker learns about its own revocations immediately through
+``UserService.blacklist_token``. Revocations made by other workers are pulled
+in by a sync query that runs at most once every
+TOKEN_REVOCATION_SYNC_SECONDS, which is therefore the cross-worker staleness
+bound. Each sync re-reads a short overlap window so that rows from
+transactions that committed late are not missed.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.models import TokenBlacklist
+
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        # Sync overlaps re-add recent keys; only count genuinely new ones
+        if key in self:
+            return
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class RevocationFilter:
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.error_rate = error_rate
+        self._initial_capacity = capacity
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, capacity: Optional[int] = None) -> None:
+        with self._lock:
+            self._bloom = BloomFilter(
+                capacity or self._initial_capacity, self.error_rate
+            )
+            self._synced_until: Optional[datetime] = None
+            self._synced_at = 0.0
+
+    def add(self, digest: str) -> None:
+        with self._lock:
+            self._bloom.add(digest)
+
+    def might_contain(self, digest: str) -> bool:
+        return digest in self._bloom
+
+    def is_stale(self) -> bool:
+        return (
+            time.monotonic() - self._synced_at >= settings.TOKEN_REVOCATION_SYNC_SECONDS
+        )
+
+    def sync(self, db: Session) -> None:
+        """Load digests revoked since the last sync (all of them the first time)."""
+        started = datetime.now(timezone.utc)
+        query = select(TokenBlacklist.token_digest)
+        if self._synced_until is not None:
+            query = query.where(
+                TokenBlacklist.blacklisted_at >= self._synced_until - SYNC_OVERLAP
+            )
+        digests = db.execute(query).scalars().all()
+
+        with self._lock:
+            for digest in digests:
+                self._bloom.add(digest)
+            self._synced_until = started
+            self._synced_at = time.monotonic()
+            overfull = self._bloom.count > self._bloom.capacity
+        if overfull:
+            # Past capacity the false-positive rate climbs; rebuild larger
+            self.reset(self._bloom.capacity * 2)
+            self.sync(db)
+
+
+revocation_filter = RevocationFilter()
+
+
+def enabled() -> bool:
+    return settings.TOKEN_REVOCATION_FILTER
+
+
+def rules_out(digest: str) -> bool:
+    """True when the filter alone, without a sync, proves ``digest`` unrevoked."""
+    return (
+        enabled()
+        and not revocation_filter.is_stale()
+        and not revocation_filter.might_contain(digest)
+    )
@@ -0,0 +1,67 @@
+"""Bounded cache of verified JWT payloads, keyed by token digest.
+
+A bearer token is presented on every request until it expires, so after the
+first successful ``decode_token`` the signature check and claim parsing are
+served from here. The key is the SHA-256 of the whole token, signature
+included, so only byte-identical tokens hit. Each entry is dropped once the
+token's ``exp`` passes, after which the full decode rejects it as usual;
+TOKEN_CACHE_MAX_ENTRIES caps the size, evicting least recently used first.
+"""
+
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+            self._expiries: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: str, now: Optional[float] = None) -> Optional[Dict]:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+        # Copy so callers cannot alter the cached claims
+        return dict(entry[1])
+
+    def put(self, digest: str, payload: Dict, now: Optional[float] = None) -> None:
+        expires = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires, (int, float)):
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._evict_expired(now)
+            self._entries[digest] = (expires, dict(payload))
+            self._entries.move_to_end(digest)
+            heapq.heappush(self._expiries, (expires, digest))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if len(self._expiries) > 2 * self.max_entries:
+                # LRU evictions leave stale heap items behind; compact them
+                self._expiries = [(e[0], d) for d, e in self._entries.items()]
+                heapq.heapify(self._expiries)
+
+    def _evict_expired(self, now: float) -> None:
+        while self._expiries and self._expiries[0][0] <= now:
+            expires, digest = heapq.heappop(self._expiries)
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] == expires:
+                del self._entries[digest]
@@ -0,0 +1,89 @@
+"""Rows per second: POST /api/blogs one post at a time vs POST /api/blogs/bulk.
+
+Both paths run against a fresh SQLite file through the full app, with the
+same bearer token, so the difference is the per-request auth lookup, commit
+and refresh that the bulk endpoint pays once per batch::
+
+    python -m benchmarks.bulk_create_bench --posts 2000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import event, insert
+
+from auth.jwt_handler import create_access_token
+from benchmarks.common import sqlite_app_database
+from database.models import User
+from main import app
+
+
+def post_body(i: int, content_bytes: int) -> dict:
+    return {
+        "title": f"Post {i}",
+        "content": ("lorem ipsum dolor sit amet " * content_bytes)[:content_bytes],
+        "category": f"Category {i % 10}",
+    }
+
+
+async def single(client: httpx.AsyncClient, items: list) -> None:
+    for item in items:
+        (await client.post("/api/blogs", json=item)).raise_for_status()
+
+
+async def bulk(client: httpx.AsyncClient, items: list, batch_size: int) -> None:
+    for start in range(0, len(items), batch_size):
+        batch = items[start : start + batch_size]
+        response = await client.post("/api/blogs/bulk", json=batch)
+        response.raise_for_status()
+        assert not response.json()["errors"]
+
+
+async def measure(run, *args) -> float:
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+        started = time.perf_counter()
+        await run(client, *args)
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--content-bytes", type=int, default=2000)
+    args = parser.parse_args()
+
+    items = [post_body(i, args.content_bytes) for i in range(args.posts)]
+    for label, run, extra in (
+        ("single", single, ()),
+        (f"bulk/{args.batch_size}", bulk, (args.batch_size,)),
+    ):
+        with sqlite_app_database() as engine:
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(User).values(
+                        id=1, email="bench@example.com", hashed_password="x"
+                    )
+                )
+            statements = []
+            event.listen(
+                engine,
+                "before_cursor_execute",
+                lambda *args: statements.append(args[2]),
+            )
+            elapsed = asyncio.run(measure(run, items, *extra))
+            inserts = sum(s.lstrip().upper().startswith("INSERT") for s in statements)
+            print(
+                f"{label:>10}: {args.posts / elapsed:9.0f} rows/s  "
+                f"{elapsed:6.2f} s  {inserts} INSERT statements"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Per-request cost of decoding a bearer token, with and without the cache.
+
+Decodes the same access token repeatedly, as a client re-presenting its token
+does, through jose's plain ``jwt.decode`` (key parsed per call), then
+``decode_token`` with the verified-token cache off and on::
+
+    python -m benchmarks.jwt_decode_bench --iterations 20000
+"""
+
+import argparse
+import time
+from typing import Callable
+
+from jose import jwt
+
+from auth.jwt_handler import create_access_token, decode_token, token_cache
+from config.settings import settings
+
+
+def per_call_us(fn: Callable[[], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    token = create_access_token(1)
+    max_entries = token_cache.max_entries
+
+    def plain() -> object:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    token_cache.max_entries = 0
+    token_cache.clear()
+    results = {
+        "jose decode": per_call_us(plain, args.iterations),
+        "precomputed key": per_call_us(lambda: decode_token(token), args.iterations),
+    }
+    token_cache.max_entries = max_entries
+    decode_token(token)
+    results["cached"] = per_call_us(lambda: decode_token(token), args.iterations)
+
+    baseline = results["jose decode"]
+    for label, cost in results.items():
+        print(f"{label:>15}: {cost:7.2f} us/request ({baseline / cost:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
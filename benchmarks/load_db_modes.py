@@ -0,0 +1,133 @@
+"""Load test comparing the AsyncSession path with the sync-session fallback.
+
+Runs ``main.app`` in-process behind httpx's ASGI transport, seeds a SQLite
+database and drives concurrent clients against the blog read endpoints,
+reporting requests-per-second and latency percentiles for each mode::
+
+    python -m benchmarks.load_db_modes --clients 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import AsyncGenerator, Dict, Generator, List
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from benchmarks.common import summarize
+from database.connection import Base, get_db
+from database.models import Blog, User
+from main import app
+
+CATEGORIES = ["Technology", "Science", "Health", "Travel", "Food"]
+
+
+def seed(url: str, blogs: int) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User).values(id=1, email="bench@example.com", hashed_password="x")
+        )
+        conn.execute(
+            insert(Blog),
+            [
+                {
+                    "title": f"Post {i}",
+                    "content": "lorem ipsum " * 40,
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "author_id": 1,
+                }
+                for i in range(blogs)
+            ],
+        )
+    engine.dispose()
+
+
+async def drive(clients: int, requests: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    paths = ["/api/blogs?limit=20"] + [
+        f"/api/blogs/category/{category}?limit=20" for category in CATEGORIES
+    ]
+    counter = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        for i in counter:
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {"rps": len(latencies) / elapsed, **summarize(latencies)}
+
+
+async def run_mode(
+    mode: str, path: str, clients: int, requests: int
+) -> Dict[str, float]:
+    if mode == "async":
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def override_async() -> AsyncGenerator[AsyncSession, None]:
+            async with factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_async
+        try:
+            return await drive(clients, requests)
+        finally:
+            await async_engine.dispose()
+
+    sync_engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    factory_sync = sessionmaker(bind=sync_engine, autoflush=False)
+
+    def override_sync() -> Generator[Session, None, None]:
+        db = factory_sync()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_sync
+    try:
+        return await drive(clients, requests)
+    finally:
+        sync_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blogs", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(f"sqlite:///{path}", args.blogs)
+        for mode in ("sync", "async"):
+            result = asyncio.run(run_mode(mode, path, args.clients, args.requests))
+            print(
+                f"{mode:>5}: {result['rps']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms"
+            )
+        app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""End-to-end load benchmark: scripted request mixes against the whole API.
+
+Loads a generated dataset (``database.dataset``) into a fresh SQLite
+database, serves ``main.app`` from it (in-process behind httpx's ASGI
+transport, or under uvicorn in a subprocess) and drives each mix with
+``--clients`` concurrent async clients. Reports requests per
+second and p50/p95/p99 latency per endpoint, optionally saves them as JSON
+and compares them with a saved baseline, exiting 1 on a regression::
+
+    python -m benchmarks.load_suite --output baseline.json
+    python -m benchmarks.load_suite --baseline baseline.json --tolerance 0.15
+    python -m benchmarks.load_suite --server uvicorn --workers 4 --mixes feed,signin
+
+Settings reach the app through the environment, in both modes, so other
+configurations are measured with ``--env RESPONSE_CACHE_BACKEND=off`` and
+the like. The app is imported only after the environment is set.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+import httpx
+
+HEALTH_TIMEOUT_SECONDS = 30.0
+# Run parameters that must match for a comparison to mean much
+COMPARABLE = ("server", "workers", "clients", "users", "blogs", "env")
+
+# (label, method, url, request kwargs)
+Call = Tuple[str, str, str, Dict[str, Any]]
+
+
+class Context:
+    """What the request builders may draw on: the dataset, tokens, randomness."""
+
+    def __init__(self, dataset: Any, tokens: List[str], rng: random.Random):
+        from database.dataset import CATEGORIES, DATASET_PASSWORD, user_email
+
+        self.dataset = dataset
+        self.tokens = tokens
+        self.rng = rng
+        self.categories = CATEGORIES
+        self.password = DATASET_PASSWORD
+        self.user_email = user_email
+
+    def auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+    def word(self) -> str:
+        # Query terms as frequent as they are in the posts
+        return self.rng.choice(self.dataset.word_table)
+
+
+def feed(ctx: Context) -> Call:
+    skip = ctx.rng.choice((0, 0, 0, 20, 40))
+    return ("GET /api/blogs", "GET", f"/api/blogs?limit=20&skip={skip}", {})
+
+
+def category(ctx: Context) -> Call:
+    # Popular categories are browsed more
+    (name,) = ctx.rng.choices(ctx.categories, cum_weights=ctx.dataset.category_weights)
+    return (
+        "GET /api/blogs/category/{category}",
+        "GET",
+        f"/api/blogs/category/{name}?limit=20&view=summary",
+        {},
+    )
+
+
+def search(ctx: Context) -> Call:
+    terms = " ".join(ctx.word() for _ in range(ctx.rng.choice((1, 2))))
+    return (
+        "GET /api/blogs/search",
+        "GET",
+        "/api/blogs/search",
+        {"params": {"q": terms}},
+    )
+
+
+def write(ctx: Context) -> Call:
+    body = {
+        "title": f"Load test {ctx.word()} {ctx.rng.randrange(10**9)}",
+        "content": " ".join(ctx.rng.choices(ctx.dataset.sentences, k=20)),
+        "category": ctx.rng.choice(ctx.categories),
+    }
+    return (
+        "POST /api/blogs",
+        "POST",
+        "/api/blogs",
+        {"json": body, "headers": ctx.auth()},
+    )
+
+
+def signin(ctx: Context) -> Call:
+    number = ctx.rng.randint(1, ctx.dataset.users)
+    body = {"email": ctx.user_email(number), "password": ctx.password}
+    return ("POST /api/auth/signin", "POST", "/api/auth/signin", {"json": body})
+
+
+# Each mix is a list of (weight, request builder). "signin" runs every client
+# at once against bcrypt, which is the burst a login storm produces.
+MIXES: Dict[str, List[Tuple[float, Callable[[Context], Call]]]] = {
+    "feed": [(1.0, feed)],
+    "category": [(1.0, category)],
+    "search": [(1.0, search)],
+    "write": [(1.0, write)],
+    "signin": [(1.0, signin)],
+    "mixed": [
+        (0.50, feed),
+        (0.25, category),
+        (0.12, search),
+        (0.10, write),
+        (0.03, signin),
+    ],
+}
+
+
+def seed(users: int, blogs: int, seed: int) -> Any:
+    """Load a generated Dataset into the database the app is configured for."""
+    from auth.password import hash_password
+    from database.connection import engine, init_db
+    from database.dataset import DATASET_PASSWORD, Dataset, DatasetLoader
+
+    init_db()
+    dataset = Dataset(users, blogs, hash_password(DATASET_PASSWORD), seed=seed)
+    for table in ("users", "blogs"):
+        DatasetLoader(engine, table, dataset, report=lambda line: None).run()
+    engine.dispose()
+    return dataset
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def in_process_client() -> AsyncIterator[httpx.AsyncClient]:
+    from main import app
+
+    # The ASGI transport sends no lifespan events; run startup/shutdown here
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60.0
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url, timeout=60.0, limits=limits
+        ) as client:
+            deadline = time.monotonic() + HEALTH_TIMEOUT_SECONDS
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not come up")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def run_mix(
+    client: httpx.AsyncClient, name: str, clients: int, requests: int, ctx: Context
+) -> Dict[str, Any]:
+    weights, builders = zip(*MIXES[name])
+    plan = iter(ctx.rng.choices(builders, weights, k=requests))
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def worker() -> None:
+        for build in plan:
+            label, method, url, kwargs = build(ctx)
+            started = time.perf_counter()
+            try:
+                status = (await client.request(method, url, **kwargs)).status_code
+                error = str(status) if status >= 400 else None
+            except httpx.HTTPError as exc:
+                error = type(exc).__name__
+            samples[label].append(time.perf_counter() - started)
+            if error is not None:
+                errors[label][error] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    from benchmarks.common import summarize
+
+    endpoints = {}
+    for label, latencies in sorted(samples.items()):
+        endpoints[label] = {
+            **summarize(latencies),
+            "rps": len(latencies) / elapsed,
+            "errors": dict(errors[label]),
+        }
+    return {
+        "requests": requests,
+        "elapsed_s": elapsed,
+        "rps": requests / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+async def run_suite(args: argparse.Namespace, ctx: Context) -> Dict[str, Any]:
+    connect = (
+        in_process_client()
+        if args.server == "in-process"
+        else uvicorn_client(args.workers)
+    )
+    results: Dict[str, Any] = {}
+    async with connect as client:
+        for name in args.mixes:
+            if args.warmup:
+                await run_mix(client, name, args.clients, args.warmup, ctx)
+            results[name] = await run_mix(
+                client, name, args.clients, args.requests, ctx
+            )
+            print_mix(name, results[name])
+    return results
+
+
+def print_mix(name: str, result: Dict[str, Any]) -> None:
+    print(f"{name}: {result['rps']:.1f} req/s over {result['elapsed_s']:.2f} s")
+    for label, stats in result["endpoints"].items():
+        failed = sum(stats["errors"].values())
+        print(
+            f"  {label:<36} {stats['rps']:8.1f} req/s  "
+            f"p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}  "
+            f"p99 {stats['p99_ms']:7.2f} ms"
+            + (f"  {failed} failed {stats['errors']}" if failed else "")
+        )
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Regressions of ``current`` against ``baseline``, one line each.
+
+    An endpoint regresses when its throughput drops, or its p95 or p99
+    latency grows, by more than ``tolerance`` (a fraction).
+    """
+    regressions = []
+    for mix, result in current["mixes"].items():
+        before_mix = baseline["mixes"].get(mix)
+        if before_mix is None:
+            continue
+        for label, stats in result["endpoints"].items():
+            before = before_mix["endpoints"].get(label)
+            if before is None:
+                continue
+            if stats["rps"] < before["rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{mix} {label}: {stats['rps']:.1f} req/s, was {before['rps']:.1f}"
+                )
+            for key in ("p95_ms", "p99_ms"):
+                if stats[key] > before[key] * (1 + tolerance):
+                    regressions.append(
+                        f"{mix} {label}: {key[:3]} {stats[key]:.2f} ms, "
+                        f"was {before[key]:.2f}"
+                    )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--server", choices=("in-process", "uvicorn"), default="in-process"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument(
+        "--mixes",
+        default="feed,category,search,write,signin,mixed",
+        help=f"comma-separated, from {', '.join(MIXES)}",
+    )
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000, help="per mix")
+    parser.add_argument("--warmup", type=int, default=200, help="unrecorded, per mix")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--blogs", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra setting for the app; repeatable",
+    )
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with results saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+    args.mixes = [name.strip() for name in args.mixes.split(",")]
+    unknown = [name for name in args.mixes if name not in MIXES]
+    if unknown:
+        parser.error(f"unknown mixes: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+        os.environ.update(DATABASE_URL=url, DEBUG="False")
+        os.environ.update(setting.split("=", 1) for setting in args.env)
+
+        started = time.perf_counter()
+        dataset = seed(args.users, args.blogs, args.seed)
+        print(
+            f"Seeded {args.users:,} users and {args.blogs:,} posts "
+            f"in {time.perf_counter() - started:.1f} s"
+        )
+
+        from auth.jwt_handler import create_access_token
+
+        tokens = [create_access_token(n + 1) for n in range(min(args.users, 100))]
+        ctx = Context(dataset, tokens, random.Random(args.seed))
+        results = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "server": args.server,
+                "workers": args.workers,
+                "clients": args.clients,
+                "requests": args.requests,
+                "users": args.users,
+                "blogs": args.blogs,
+                "seed": args.seed,
+                "env": args.env,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+            },
+            "mixes": asyncio.run(run_suite(args, ctx)),
+        }
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"Saved {args.output}")
+    if args.baseline:
+        with open(args.baseline) as source:
+            baseline = json.load(source)
+        differing = [
+            key
+            for key in COMPARABLE
+            if baseline["meta"].get(key) != results["meta"][key]
+        ]
+        if differing:
+            print(f"Note: the baseline ran with different {', '.join(differing)}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions beyond {args.tolerance:.0%} of {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
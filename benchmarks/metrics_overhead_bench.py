@@ -0,0 +1,64 @@
+"""Per-request cost of MetricsMiddleware and ProfilingMiddleware.
+
+Calls a trivial ASGI app bare and wrapped directly (no server, no client), so
+the difference is what the middleware adds to every request. The profiler is
+measured at --profile-rate and with every request profiled::
+
+    python -m benchmarks.metrics_overhead_bench --requests 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+from config.settings import settings
+from monitoring.http import MetricsMiddleware
+from monitoring.profiler import ProfilingMiddleware
+
+
+class Route:
+    path = "/api/blogs/{blog_id}"
+
+
+async def endpoint(scope, receive, send) -> None:
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message) -> None:
+    pass
+
+
+async def per_request_us(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/api/blogs/1"}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--profile-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    bare = asyncio.run(per_request_us(endpoint, args.requests))
+    print(f"{'bare app':>24}: {bare:6.2f} us/request")
+    for label, app, rate in (
+        ("metrics", MetricsMiddleware(endpoint), 0.0),
+        (f"profiler at {args.profile_rate:g}", ProfilingMiddleware(endpoint), None),
+        ("profiler at 1", ProfilingMiddleware(endpoint), 1.0),
+    ):
+        settings.SQL_PROFILE_SAMPLE_RATE = args.profile_rate if rate is None else rate
+        wrapped = asyncio.run(per_request_us(app, args.requests))
+        print(f"{label:>24}: {wrapped:6.2f} us/request  (+{wrapped - bare:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Blog-read latency during a sign-in burst, hashing inline vs in the pool.
+
+A few clients sign in continuously while others read the blog feed. With
+inline hashing every bcrypt call stalls the event loop and the readers'
+latency climbs; with the pool it should stay close to the idle baseline::
+
+    python -m benchmarks.password_pool_bench --seconds 5
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import insert
+
+from auth.password import hash_password, hasher
+from benchmarks.common import sqlite_app_database, summarize
+from database.models import Blog, User
+from main import app
+
+
+async def run_mix(seconds: float, signin_clients: int, read_clients: int) -> Dict:
+    latencies: Dict[str, List[float]] = {"signin": [], "read": []}
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client: httpx.AsyncClient, kind: str) -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if kind == "signin":
+                response = await client.post(
+                    "/api/auth/signin",
+                    json={"email": "bench@example.com", "password": "password123"},
+                )
+            else:
+                response = await client.get("/api/blogs?limit=20")
+            latencies[kind].append(time.perf_counter() - started)
+            if response.status_code >= 500 and response.status_code != 503:
+                response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await asyncio.gather(
+            *(client_loop(client, "signin") for _ in range(signin_clients)),
+            *(client_loop(client, "read") for _ in range(read_clients)),
+        )
+    return {kind: summarize(samples) for kind, samples in latencies.items() if samples}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--signin-clients", type=int, default=8)
+    parser.add_argument("--read-clients", type=int, default=16)
+    args = parser.parse_args()
+
+    with sqlite_app_database() as engine:
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User).values(
+                    id=1,
+                    email="bench@example.com",
+                    hashed_password=hash_password("password123"),
+                )
+            )
+            conn.execute(
+                insert(Blog),
+                [
+                    {
+                        "title": f"Post {i}",
+                        "content": "text " * 50,
+                        "category": "Tech",
+                        "author_id": 1,
+                    }
+                    for i in range(200)
+                ],
+            )
+
+        for kind in ("inline", "thread"):
+            hasher.kind = kind
+            result = asyncio.run(
+                run_mix(args.seconds, args.signin_clients, args.read_clients)
+            )
+            hasher.shutdown()
+            for endpoint, stats in result.items():
+                print(
+                    f"{kind:>6} {endpoint:>6}: {stats['count']:6d} req  "
+                    f"p50 {stats['p50_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
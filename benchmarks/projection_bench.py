@@ -0,0 +1,87 @@
+"""Payload size and latency of a 100-post page: full posts vs projections.
+
+Seeds posts with long bodies and fetches ``GET /api/blogs?limit=100`` as full
+posts, as ``view=summary`` and as ``fields=id,title``, with the response
+cache off so every request reads and serializes the page::
+
+    python -m benchmarks.projection_bench --posts 1000 --content-bytes 8000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import insert
+
+from benchmarks.common import sqlite_app_database, summarize
+from database.models import Blog, User, make_excerpt
+from main import app
+from services.response_cache import response_cache
+
+VARIANTS = {
+    "full": "/api/blogs?limit=100",
+    "summary": "/api/blogs?limit=100&view=summary",
+    "id,title": "/api/blogs?limit=100&fields=id,title",
+}
+
+
+async def measure(url: str, requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await client.get(url)  # warm up
+        samples, size = [], 0
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(url)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+            size = len(response.content)
+    return size, summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--content-bytes", type=int, default=8000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    backend, response_cache.backend = response_cache.backend, None
+    with sqlite_app_database() as engine:
+        content = ("lorem ipsum dolor sit amet " * args.content_bytes)[
+            : args.content_bytes
+        ]
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User).values(
+                    id=1, email="bench@example.com", hashed_password="x"
+                )
+            )
+            conn.execute(
+                insert(Blog),
+                [
+                    {
+                        "title": f"Post {i}",
+                        "content": content,
+                        "excerpt": make_excerpt(content),
+                        "category": "Tech",
+                        "author_id": 1,
+                    }
+                    for i in range(args.posts)
+                ],
+            )
+
+        for label, url in VARIANTS.items():
+            size, stats = asyncio.run(measure(url, args.requests))
+            print(
+                f"{label:>9}: {size / 1024:8.1f} KiB  "
+                f"p50 {stats['p50_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f} ms"
+            )
+    response_cache.backend = backend
+
+
+if __name__ == "__main__":
+    main()
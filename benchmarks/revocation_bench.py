@@ -0,0 +1,93 @@
+"""Database queries per authenticated request, with and without the revocation filter.
+
+Drives ``GET /api/profile`` in-process with one valid access token and counts
+the SQL statements each request issues::
+
+    python -m benchmarks.revocation_bench --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Generator
+
+import httpx
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from auth.jwt_handler import create_access_token
+from auth.revocation import revocation_filter
+from config.settings import settings
+from database.connection import Base, get_db
+from database.models import User
+from main import app
+
+
+async def drive(requests: int, token: str) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/api/profile", headers=headers)
+            response.raise_for_status()
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(User).values(
+                    id=1, email="bench@example.com", hashed_password="x"
+                )
+            )
+        factory = sessionmaker(bind=engine, autoflush=False)
+
+        def override_get_db() -> Generator[Session, None, None]:
+            db = factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        statements = 0
+
+        def count(*_):
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+        app.dependency_overrides[get_db] = override_get_db
+        token = create_access_token(1)
+        asyncio.run(drive(20, token))  # warm up imports and the connection
+
+        for enabled in (False, True):
+            settings.TOKEN_REVOCATION_FILTER = enabled
+            revocation_filter.reset()
+            statements = 0
+            elapsed = asyncio.run(drive(args.requests, token))
+            label = "filter" if enabled else "no filter"
+            print(
+                f"{label:>9}: {statements / args.requests:.2f} queries/request, "
+                f"{elapsed / args.requests * 1000:.2f} ms/request"
+            )
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare LIKE scans with the indexed full-text search backend.
+
+Seeds a fresh SQLite database (FTS5) per size, or uses ``--url`` to point at a
+PostgreSQL database whose blogs table is rebuilt for each size::
+
+    python -m benchmarks.search_bench --sizes 10000,100000,1000000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import string
+import tempfile
+import time
+from typing import List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from database.connection import Base
+from database.models import Blog, User
+from services.search_service import BACKENDS
+
+VOCABULARY = 20_000
+# Zipfian word frequencies over random pseudo-words: a few very common words
+# and a long tail, so the benchmark queries (mid-frequency words) match a
+# small share of posts, as real searches do
+_rng = random.Random(7)
+WORDS = [
+    "".join(_rng.choices(string.ascii_lowercase, k=_rng.randint(4, 10)))
+    for _ in range(VOCABULARY)
+]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+QUERIES = [WORDS[150], f"{WORDS[40]} {WORDS[700]}", WORDS[2500], WORDS[12000]]
+BATCH = 10_000
+
+
+def seed(engine, size: int, rng: random.Random) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User).values(id=1, email="bench@example.com", hashed_password="x")
+        )
+        for start in range(0, size, BATCH):
+            conn.execute(
+                insert(Blog),
+                [
+                    {
+                        "title": " ".join(
+                            rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=5)
+                        ),
+                        "content": " ".join(
+                            rng.choices(
+                                WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(50, 400)
+                            )
+                        ),
+                        "category": rng.choice(WORDS[:8]),
+                        "author_id": 1,
+                    }
+                    for _ in range(min(BATCH, size - start))
+                ],
+            )
+
+
+def time_backend(engine, backend: str, query: str, repeat: int) -> float:
+    samples: List[float] = []
+    with Session(engine) as db:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            BACKENDS[backend].search(db, query, 0, 10, None, False)
+            samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--url", help="PostgreSQL URL; defaults to a temp SQLite file")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'search.db')}"
+        engine = create_engine(url)
+        fts = "postgresql" if engine.dialect.name == "postgresql" else "sqlite"
+        print(f"{'posts':>9} {'query':<24} {'like ms':>9} {'fts ms':>9} {'speedup':>8}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            seed(engine, size, rng)
+            for query in QUERIES:
+                like_ms = time_backend(engine, "like", query, args.repeat)
+                fts_ms = time_backend(engine, fts, query, args.repeat)
+                print(
+                    f"{size:>9} {query:<24} {like_ms:>9.2f} {fts_ms:>9.2f} "
+                    f"{like_ms / fts_ms:>7.1f}x"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Query latency and memory footprint of the in-process BM25 index.
+
+Builds the index straight from synthetic posts (no database involved) and
+reports per-query latency percentiles and bytes per indexed post::
+
+    python -m benchmarks.search_index_bench --posts 100000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.search_bench import CUM_WEIGHTS, QUERIES, WORDS
+from services.search_index import InvertedIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    index = InvertedIndex()
+    started = time.perf_counter()
+    index.load(
+        (
+            doc_id,
+            " ".join(rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=5)),
+            " ".join(
+                rng.choices(WORDS, cum_weights=CUM_WEIGHTS, k=rng.randint(50, 400))
+            ),
+            rng.choice(WORDS[:8]),
+        )
+        for doc_id in range(1, args.posts + 1)
+    )
+    build = time.perf_counter() - started
+    usage = index.memory_usage()
+    print(
+        f"indexed {usage['documents']} posts, {usage['terms']} terms in {build:.1f}s; "
+        f"{usage['bytes'] / 2**20:.1f} MiB, {usage['bytes_per_document']:.0f} bytes/post"
+    )
+
+    print(f"{'query':<24} {'p50 ms':>8} {'p99 ms':>8}")
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            index.search(query, limit=10)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{query:<24} {samples[len(samples) // 2]:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Serialization cost per row for a blog list page, old path vs batch path.
+
+Loads one page of posts both as ORM objects and as column rows, then times
+only the conversion to JSON bytes:
+
+* per-object: what FastAPI does with ``response_model=List[BlogResponse]``:
+  validate each ORM object into a model, dump to Python, then ``json.dumps``
+* adapter: validate the ORM objects with a ``List[BlogResponse]`` adapter
+  and ``dump_json`` the models
+* batch rows: the list routes' ``serialize_rows``, dumping row dicts through
+  the cached ``List[BlogRow]`` serializer in one call
+
+::
+
+    python -m benchmarks.serialization_bench --rows 100
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from database.connection import Base
+from database.models import Blog, User, make_excerpt
+from routers.blog import FULL_FIELDS, serialize_rows
+from schemas.blog import BlogResponse
+from services.blog_service import BlogService
+
+response_adapter = TypeAdapter(List[BlogResponse])
+
+
+def per_row_us(fn: Callable[[], bytes], rows: int, repeat: int) -> float:
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat / rows * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--content-bytes", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    content = "x" * args.content_bytes
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User).values(id=1, email="bench@example.com", hashed_password="x")
+        )
+        conn.execute(
+            insert(Blog),
+            [
+                {
+                    "title": f"Post {i}",
+                    "content": content,
+                    "excerpt": make_excerpt(content),
+                    "category": "Tech",
+                    "author_id": 1,
+                }
+                for i in range(args.rows)
+            ],
+        )
+
+    with Session(engine) as db:
+        blogs = BlogService.get_recent_blogs(db, limit=args.rows)
+        rows = BlogService.get_page_rows(db, FULL_FIELDS, limit=args.rows)
+
+        def per_object() -> bytes:
+            models = response_adapter.validate_python(blogs, from_attributes=True)
+            return json.dumps(
+                response_adapter.dump_python(models, mode="json")
+            ).encode()
+
+        def adapter() -> bytes:
+            return response_adapter.dump_json(
+                response_adapter.validate_python(blogs, from_attributes=True)
+            )
+
+        def batch_rows() -> bytes:
+            return serialize_rows(rows, FULL_FIELDS)
+
+        variants = {
+            "per-object": per_object,
+            "adapter": adapter,
+            "batch rows": batch_rows,
+        }
+        expected = json.loads(per_object())
+        assert all(json.loads(fn()) == expected for fn in variants.values())
+        costs = {
+            label: per_row_us(fn, args.rows, args.repeat)
+            for label, fn in variants.items()
+        }
+
+    baseline = costs["per-object"]
+    for label, cost in costs.items():
+        print(f"{label:>10}: {cost:6.2f} us/row ({baseline / cost:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,118 @@
+from pydantic import PositiveFloat
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "postgresql_url"
+    # Serve requests through AsyncSession; False falls back to sync sessions
+    DB_ASYNC: bool = True
+    # Defaults to DATABASE_URL with its async driver (asyncpg / aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Pool per engine and worker; at most DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # connections each
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Replace connections older than this many seconds (-1 = never); keep it
+    # below the server's or proxy's idle timeout
+    DB_POOL_RECYCLE: int = 1800
+    # Seconds a checkout waits for a free connection before erroring
+    DB_POOL_TIMEOUT: float = 30.0
+    # Liveness check on checkout: "always" (a round trip per checkout),
+    # "idle" (only after DB_POOL_PING_IDLE_SECONDS unused) or "off"
+    DB_POOL_PRE_PING: str = "idle"
+    DB_POOL_PING_IDLE_SECONDS: float = 60.0
+    # Log checkouts that wait at least this long for a connection
+    DB_POOL_WAIT_WARNING_MS: float = 100.0
+    # Log every SQL statement
+    DB_ECHO: bool = False
+    # Seconds between the background database probes behind /ready
+    DB_PROBE_INTERVAL_SECONDS: float = 5.0
+    # Read replicas for the read-only routes, as a JSON list of URLs
+    DATABASE_REPLICA_URLS: List[str] = []
+    # After a write, the client reads from the primary for this long (0 = off)
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Replicas failing a check, or lagging more than this, leave the rotation
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
 
     # JWT
     SECRET_KEY: str = "secret_key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Answer "not revoked" from a per-worker Bloom filter; revocations made by
+    # other workers are picked up within TOKEN_REVOCATION_SYNC_SECONDS
+    TOKEN_REVOCATION_FILTER: bool = True
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 1.0
+    # Verified token payloads kept until each token's exp (0 = off)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    # Per-worker cache of authenticated users; other workers' profile changes
+    # and deactivations show up within the TTL (0 = off)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    # Expired token_blacklist rows are deleted in batches every interval, by one
+    # worker (0 = off)
+    TOKEN_PRUNE_INTERVAL_SECONDS: int = 3600
+    TOKEN_PRUNE_BATCH_SIZE: int = 1000
+    # PostgreSQL: partition token_blacklist by expiry day (new tables only)
+    TOKEN_BLACKLIST_PARTITIONED: bool = False
+
+    # Search: "auto" uses the database's full-text index, "memory" an
+    # in-process BM25 index, "like" a plain scan
+    SEARCH_BACKEND: str = "auto"
+    # "memory" only: each worker re-reads posts other workers changed, by
+    # updated_at, every interval (0 = off)
+    SEARCH_INDEX_RESYNC_SECONDS: int = 60
+    # ...and drops posts deleted elsewhere: whenever the post counts differ,
+    # and by comparing ids at least this often (0 = every resync)
+    SEARCH_INDEX_ID_CHECK_SECONDS: int = 900
+
+    # Cache rendered blog read responses: "memory" (per worker, other workers
+    # see writes within the TTL), "redis" (shared, at REDIS_URL) or "off"
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10_000
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Largest request accepted by POST /api/blogs/bulk
+    BULK_CREATE_MAX_ITEMS: int = 500
+    # Rows fetched per round trip by GET /api/blogs/export
+    EXPORT_BATCH_SIZE: int = 1000
+    # Add X-Total-Count-Estimate to list pages, from the category counts
+    BLOG_LIST_TOTAL_ESTIMATE: bool = False
+    # Recount category_stats from blogs every interval, in one worker (0 = off)
+    CATEGORY_STATS_RECONCILE_SECONDS: int = 3600
+
+    # bcrypt work factor; hashes below it are upgraded on the next sign-in
+    BCRYPT_ROUNDS: int = 12
+    # If set, pick BCRYPT_ROUNDS at startup so one hash takes about this long
+    BCRYPT_TARGET_MS: Optional[PositiveFloat] = None
+    # Calibration never goes below this cost
+    BCRYPT_MIN_ROUNDS: int = 10
+    # Recount the hashes still to upgrade for the
+    # password_hash_upgrades_pending gauge every interval (0 = at startup only)
+    PASSWORD_UPGRADE_COUNT_SECONDS: int = 300
+    # Password hashing pool: "thread", "process" or "inline" (on the event loop)
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    # Concurrent hashes; 0 means one per CPU
+    PASSWORD_HASH_WORKERS: int = 0
+    # Hashes allowed to wait for a worker before requests get 503
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+
+    # Merge /metrics across uvicorn workers through snapshots in this
+    # directory (clear it before starting them); unset = per-worker metrics
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_SECONDS: float = 1.0
+    # Profile this fraction of requests (0 = off, 1 = all): statement counts
+    # and time, repeated statements and a Server-Timing header
+    SQL_PROFILE_SAMPLE_RATE: float = 0.0
+    # A profiled request running one statement this often is logged as N+1
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5
+    # Log every statement slower than this, sampled or not (0 = off)
+    SQL_SLOW_QUERY_MS: float = 0.0
 
     # Application
     APP_NAME: str = "Blog API"
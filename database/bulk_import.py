@@ -0,0 +1,408 @@
+"""Offline bulk loading of users and blogs from JSONL or CSV files.
+
+Records are streamed from the file and written in chunks of
+``commit_every`` rows, one transaction per chunk:
+
+* PostgreSQL gets one ``COPY ... FROM STDIN`` per chunk, fed from a
+  file-like object that encodes rows as they are read, so memory stays
+  bounded by the driver's read size rather than the chunk.
+* Other databases (SQLite) get ``executemany`` batches of ``batch_size``
+  rows inside the chunk's transaction.
+
+Each chunk commits together with a row in ``import_progress`` recording how
+many records of the file are loaded, so ``resume=True`` continues after the
+last committed chunk without loading anything twice.
+
+With ``defer_indexes`` the table's non-unique indexes and the full-text
+index are dropped for the load and rebuilt once at the end. Unique indexes
+and keys stay, since they enforce constraints. ``category_stats`` is
+recounted after every blogs load. Running workers do not see imported posts
+in their in-memory search index until they restart, nor in cached responses
+until RESPONSE_CACHE_TTL_SECONDS passes.
+
+``Importer`` reads the records from a file; ``dataset.DatasetLoader`` feeds
+generated ones through the same ``Loader``.
+"""
+
+import abc
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    insert,
+    select,
+    text,
+)
+from sqlalchemy.engine import Connection, Engine
+from database import category_stats
+from database.fulltext import resume_fulltext, suspend_fulltext
+from database.models import Blog, User, make_excerpt
+
+FORMATS = ("jsonl", "csv")
+
+progress_metadata = MetaData()
+
+# Records of each source file committed so far; kept out of Base.metadata
+import_progress = Table(
+    "import_progress",
+    progress_metadata,
+    Column("source", String, primary_key=True),
+    Column("records", Integer, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+)
+
+
+class BulkImportError(Exception):
+    """A record could not be loaded; earlier chunks stay committed."""
+
+
+def _now() -> datetime:
+    # Timestamps are stored as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _datetime(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _bool(value: Any, default: bool) -> bool:
+    if value in (None, ""):
+        return default
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "yes", "y")
+    return bool(value)
+
+
+def _optional(value: Any) -> Optional[str]:
+    return None if value in (None, "") else str(value)
+
+
+def _required(record: Dict[str, Any], name: str) -> Any:
+    value = record.get(name)
+    if value in (None, ""):
+        raise ValueError(f"missing {name}")
+    return value
+
+
+def prepare_user(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Passwords are loaded already hashed; bcrypt per row would dominate
+    return {
+        "email": str(_required(record, "email")),
+        "hashed_password": str(_required(record, "hashed_password")),
+        "first_name": _optional(record.get("first_name")),
+        "last_name": _optional(record.get("last_name")),
+        "mobile": _optional(record.get("mobile")),
+        "picture": _optional(record.get("picture")),
+        "country": _optional(record.get("country")),
+        "is_active": _bool(record.get("is_active"), True),
+        "created_at": _datetime(record.get("created_at")) or _now(),
+    }
+
+
+def prepare_blog(record: Dict[str, Any]) -> Dict[str, Any]:
+    content = str(_required(record, "content"))
+    created_at = _datetime(record.get("created_at")) or _now()
+    return {
+        "title": str(_required(record, "title")),
+        "content": content,
+        "excerpt": make_excerpt(content),
+        "category": str(_required(record, "category")),
+        "author_id": int(_required(record, "author_id")),
+        "created_at": created_at,
+        "updated_at": _datetime(record.get("updated_at")) or created_at,
+    }
+
+
+TABLES: Dict[str, Tuple[Table, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "users": (User.__table__, prepare_user),
+    "blogs": (Blog.__table__, prepare_blog),
+}
+
+
+def detect_format(path: Path) -> str:
+    fmt = path.suffix.lstrip(".").lower()
+    if fmt == "ndjson":
+        return "jsonl"
+    if fmt not in FORMATS:
+        raise BulkImportError(f"Cannot tell the format of {path}; pass --format")
+    return fmt
+
+
+def read_records(
+    path: Path, fmt: str, skip: int = 0
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """``(record number, record)`` pairs from ``path``, after the first ``skip``."""
+    with open(path, newline="", encoding="utf-8") as source:
+        if fmt == "csv":
+            for number, record in enumerate(csv.DictReader(source), 1):
+                if number > skip:
+                    yield number, record
+            return
+        number = 0
+        for line in source:
+            if not line.strip():
+                continue
+            number += 1
+            # Skipped lines are not parsed, so resuming late in a file is cheap
+            if number > skip:
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    raise BulkImportError(f"{path}: record {number}: {exc}") from exc
+
+
+def copy_value(value: Any) -> str:
+    """One field of a COPY ... (FORMAT csv) row.
+
+    NULL is the unquoted empty field, so every value is quoted: a quoted
+    empty field is the empty string.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, bool):
+        value = "true" if value else "false"
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class CopyStream(io.RawIOBase):
+    """File-like view of rows as COPY CSV text, encoded as the driver reads."""
+
+    def __init__(self, rows: Iterator[Dict[str, Any]], columns: List[str]):
+        self._rows = rows
+        self._columns = columns
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = ",".join(copy_value(row[name]) for name in self._columns)
+            self._buffer += line.encode() + b"\n"
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class Loader(abc.ABC):
+    """Chunked, resumable load of records into one table.
+
+    ``origin`` names the records in messages; ``source`` keys their progress
+    checkpoint. Subclasses supply the records.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        table: str,
+        origin: str,
+        source: str,
+        batch_size: int = 5000,
+        commit_every: int = 100_000,
+        resume: bool = False,
+        defer_indexes: bool = True,
+        report: Callable[[str], None] = lambda line: print(line, file=sys.stderr),
+    ):
+        if table not in TABLES:
+            raise BulkImportError(f"Unknown table {table!r}; use one of {list(TABLES)}")
+        self.engine = engine
+        self.table, self.prepare = TABLES[table]
+        self.origin = origin
+        self.source = source
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.resume = resume
+        self.defer_indexes = defer_indexes
+        self.report = report
+        self.columns: List[str] = []
+
+    @abc.abstractmethod
+    def records(self, skip: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """``(record number, record)`` pairs to load, after the first ``skip``."""
+
+    def _rows(
+        self, records: Iterator[Tuple[int, Dict[str, Any]]], limit: int
+    ) -> Iterator[Dict[str, Any]]:
+        """Up to ``limit`` prepared rows; ``self.loaded`` tracks the record number."""
+        for number, record in records:
+            try:
+                row = self.prepare(record)
+                if not self.columns:
+                    # The first record decides whether ids come from the file
+                    with_id = record.get("id") not in (None, "")
+                    self.columns = ["id"] * with_id + list(row)
+                if self.columns[0] == "id":
+                    row["id"] = int(_required(record, "id"))
+            except (TypeError, ValueError) as exc:
+                raise BulkImportError(f"{self.origin}: record {number}: {exc}") from exc
+            self.loaded = number
+            yield row
+            limit -= 1
+            if limit == 0:
+                return
+
+    def _copy(self, connection: Connection, rows: Iterator[Dict[str, Any]]) -> None:
+        # The first row settles the column list the COPY names
+        first = next(rows, None)
+        if first is None:
+            return
+        stream = CopyStream(itertools.chain([first], rows), self.columns)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({', '.join(self.columns)}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                stream,
+            )
+        finally:
+            cursor.close()
+
+    def _executemany(
+        self, connection: Connection, rows: Iterator[Dict[str, Any]]
+    ) -> None:
+        batch: List[Dict[str, Any]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                connection.execute(insert(self.table), batch)
+                batch = []
+        if batch:
+            connection.execute(insert(self.table), batch)
+
+    def _checkpoint(self, connection: Connection) -> None:
+        connection.execute(
+            delete(import_progress).where(import_progress.c.source == self.source)
+        )
+        connection.execute(
+            insert(import_progress).values(
+                source=self.source, records=self.loaded, updated_at=_now()
+            )
+        )
+
+    def _deferred_indexes(self):
+        return [index for index in self.table.indexes if not index.unique]
+
+    def _suspend_indexes(self, connection: Connection) -> None:
+        for index in self._deferred_indexes():
+            index.drop(connection, checkfirst=True)
+        if self.table is Blog.__table__:
+            suspend_fulltext(connection)
+
+    def _rebuild_indexes(self, connection: Connection) -> None:
+        for index in self._deferred_indexes():
+            index.create(connection, checkfirst=True)
+        if self.table is Blog.__table__:
+            resume_fulltext(connection)
+
+    def _reset_sequence(self, connection: Connection) -> None:
+        # Ids loaded from the file bypass the sequence new rows draw from
+        if connection.dialect.name == "postgresql" and "id" in self.columns:
+            connection.execute(
+                text(
+                    "SELECT setval(pg_get_serial_sequence(:table, 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {self.table.name}))"
+                ),
+                {"table": self.table.name},
+            )
+
+    def run(self) -> int:
+        """Load the file; returns the number of records loaded by this run."""
+        progress_metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            committed = connection.execute(
+                select(import_progress.c.records).where(
+                    import_progress.c.source == self.source
+                )
+            ).scalar()
+        if committed and not self.resume:
+            raise BulkImportError(
+                f"{committed:,} records of {self.origin} are already loaded; "
+                "pass --resume to continue"
+            )
+        skip = committed or 0
+        if skip:
+            self.report(f"Resuming {self.origin} after record {skip:,}")
+
+        write = (
+            self._copy
+            if self.engine.dialect.name == "postgresql"
+            else self._executemany
+        )
+        records = self.records(skip)
+        self.loaded = skip
+        started = time.perf_counter()
+
+        if self.defer_indexes:
+            with self.engine.begin() as connection:
+                self._suspend_indexes(connection)
+        try:
+            while True:
+                before = self.loaded
+                with self.engine.begin() as connection:
+                    write(connection, self._rows(records, self.commit_every))
+                    if self.loaded == before:
+                        break
+                    self._checkpoint(connection)
+                elapsed = time.perf_counter() - started
+                self.report(
+                    f"{self.table.name}: {self.loaded:,} records  "
+                    f"{(self.loaded - skip) / elapsed:,.0f} rows/s"
+                )
+        finally:
+            with self.engine.begin() as connection:
+                if self.defer_indexes:
+                    self.report(f"Rebuilding {self.table.name} indexes")
+                    self._rebuild_indexes(connection)
+                self._reset_sequence(connection)
+                if self.table is Blog.__table__:
+                    category_stats.recount(connection)
+        return self.loaded - skip
+
+
+class Importer(Loader):
+    """Loads a JSONL or CSV file."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        table: str,
+        path: Path,
+        fmt: Optional[str] = None,
+        **options: Any,
+    ):
+        self.path = Path(path)
+        self.fmt = fmt or detect_format(self.path)
+        super().__init__(
+            engine,
+            table,
+            str(self.path),
+            f"{table}:{self.path.resolve()}",
+            **options,
+        )
+
+    def records(self, skip: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        return read_records(self.path, self.fmt, skip)
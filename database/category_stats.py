@@ -0,0 +1,158 @@
+"""Post counts per category, kept in ``category_stats``.
+
+``BlogService`` writes adjust the counts in the same transaction as the
+post change, so the category facets and list totals never need a
+``GROUP BY`` over blogs. The adjustment is one multi-row upsert with its
+categories in a fixed order, so two writes moving posts between the same
+categories lock the rows in the same order instead of deadlocking.
+
+``recount`` corrects the table from blogs. It runs at startup for schemas
+that predate the table, after bulk loads (which bypass the service), and
+every CATEGORY_STATS_RECONCILE_SECONDS to correct drift from any other
+writes made outside the service.
+"""
+
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union, cast
+from sqlalchemy import Row, delete, func, insert, select, text, update
+from sqlalchemy.engine import Connection, CursorResult
+from sqlalchemy.orm import Session
+from database.connection import CONFLICT_INSERTS
+from database.models import Blog, CategoryStat
+
+Executor = Union[Session, Connection]
+
+
+def _dialect(db: Executor) -> str:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    return bind.dialect.name
+
+
+def adjust(db: Executor, deltas: Mapping[str, int]) -> None:
+    """Add ``deltas`` (category -> change in posts) to the stored counts."""
+    rows = [
+        {"category": category, "posts": delta}
+        for category, delta in sorted(deltas.items())
+        if delta
+    ]
+    if not rows:
+        return
+    conflict_insert = CONFLICT_INSERTS.get(_dialect(db))
+    if conflict_insert is None:
+        for row in rows:
+            result = cast(
+                CursorResult,
+                db.execute(
+                    update(CategoryStat)
+                    .where(CategoryStat.category == row["category"])
+                    .values(posts=CategoryStat.posts + row["posts"])
+                    .execution_options(synchronize_session=False)
+                ),
+            )
+            if not result.rowcount:
+                db.execute(insert(CategoryStat).values(row))
+        return
+    statement = conflict_insert(CategoryStat).values(rows)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[CategoryStat.category],
+            set_={"posts": CategoryStat.posts + statement.excluded.posts},
+        )
+    )
+
+
+def counts(db: Executor) -> Sequence[Row[Tuple[str, int]]]:
+    """``(category, posts)`` of every category with posts, most used first."""
+    return db.execute(
+        select(CategoryStat.category, CategoryStat.posts)
+        .where(CategoryStat.posts > 0)
+        .order_by(CategoryStat.posts.desc(), CategoryStat.category)
+    ).all()
+
+
+def total(db: Executor, category: Optional[str] = None) -> int:
+    """Posts in ``category``, or in all categories."""
+    query = select(func.coalesce(func.sum(CategoryStat.posts), 0))
+    if category is not None:
+        query = query.where(CategoryStat.category == category)
+    return db.execute(query).scalar_one()
+
+
+def _drift(db: Executor) -> Dict[str, Tuple[int, int]]:
+    """Categories whose stored count is off, as (stored, actual)."""
+    stored = {
+        category: posts
+        for category, posts in db.execute(
+            select(CategoryStat.category, CategoryStat.posts)
+        )
+    }
+    actual = {
+        category: count
+        for category, count in db.execute(
+            select(Blog.category, func.count()).group_by(Blog.category)
+        )
+    }
+    return {
+        category: (stored.get(category, 0), actual.get(category, 0))
+        for category in stored.keys() | actual.keys()
+        if stored.get(category, 0) != actual.get(category, 0)
+    }
+
+
+def recount(db: Executor) -> Dict[str, Tuple[int, int]]:
+    """Correct the counts that are off from blogs, as (stored, actual).
+
+    The full comparison runs without locks. Only the categories it finds
+    off are recounted and rewritten, with writes locked out of the table:
+    on PostgreSQL by an explicit table lock, on SQLite by the database
+    write lock the delete takes. A write that already adjusted the counts
+    commits before the recount reads blogs, and one that has not waits and
+    applies its change on top of the new counts. Row locks alone would miss
+    a category that a concurrent write is inserting. A category that only
+    looked off because a write was in flight comes out unchanged. The
+    caller commits.
+    """
+    drifted = sorted(_drift(db))
+    if not drifted:
+        return {}
+    if _dialect(db) == "postgresql":
+        db.execute(text("LOCK TABLE category_stats IN SHARE ROW EXCLUSIVE MODE"))
+    stored = {
+        category: posts
+        for category, posts in db.execute(
+            delete(CategoryStat)
+            .where(CategoryStat.category.in_(drifted))
+            .returning(CategoryStat.category, CategoryStat.posts)
+            .execution_options(synchronize_session=False)
+        )
+    }
+    actual = {
+        category: count
+        for category, count in db.execute(
+            select(Blog.category, func.count())
+            .where(Blog.category.in_(drifted))
+            .group_by(Blog.category)
+        )
+    }
+    if actual:
+        db.execute(
+            insert(CategoryStat),
+            [
+                {"category": category, "posts": count}
+                for category, count in sorted(actual.items())
+            ],
+        )
+    return {
+        category: (stored.get(category, 0), actual.get(category, 0))
+        for category in drifted
+        if stored.get(category, 0) != actual.get(category, 0)
+    }
+
+
+def backfill(db: Executor) -> bool:
+    """Count the posts of a schema created before ``category_stats``."""
+    if db.execute(select(CategoryStat.category).limit(1)).first() is not None:
+        return False
+    if db.execute(select(Blog.id).limit(1)).first() is None:
+        return False
+    recount(db)
+    return True
@@ -1,17 +1,89 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from starlette.concurrency import run_in_threadpool
 from config.settings import settings
-from typing import Generator
+from database.fulltext import install_fulltext
+from database.partitions import ensure_partitions
+from database.pool import engine_options, install_idle_ping
+from database.upgrades import upgrade_schema
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generator,
+    TypeVar,
+    Union,
+)
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, echo=settings.DEBUG)
+T = TypeVar("T")
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+# Dialects whose INSERT takes ON CONFLICT clauses
+ConflictInsert = Union[postgresql.Insert, sqlite.Insert]
+CONFLICT_INSERTS: Dict[str, Callable[[Any], ConflictInsert]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+engine = create_engine(
+    settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, "sync")
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching asyncio driver."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(
+    settings.DATABASE_URL
+)
+
+async_engine = (
+    create_async_engine(
+        ASYNC_DATABASE_URL,
+        **engine_options(ASYNC_DATABASE_URL, "async", asynchronous=True),
+    )
+    if settings.DB_ASYNC
+    else None
+)
+
+if settings.DB_POOL_PRE_PING == "idle":
+    install_idle_ping(engine)
+    if async_engine is not None:
+        install_idle_ping(async_engine.sync_engine)
+
+AsyncSessionLocal = (
+    async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+    if async_engine is not None
+    else None
+)
+
+DBSession = Union[Session, AsyncSession]
+
+
+def get_sync_db() -> Generator[Session, None, None]:
     db = SessionLocal()
     try:
         yield db
@@ -19,5 +91,51 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled (DB_ASYNC=False)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[DBSession]:
+    """A session for work outside a request, such as background tasks."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as async_db:
+            yield async_db
+    else:
+        with SessionLocal() as db:
+            yield db
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a sync-session service call without blocking the event loop.
+
+    AsyncSession work is driven through SQLAlchemy's greenlet bridge, so the
+    statements are awaited on the async driver. Plain sessions (the sync
+    fallback) run in the threadpool, as sync dependencies always did.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(lambda session: fn(session, *args, **kwargs))
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so bring older schemas up to date
+    upgrade_schema(engine, Base.metadata)
+    with engine.begin() as connection:
+        install_fulltext(connection)
+        if (
+            settings.TOKEN_BLACKLIST_PARTITIONED
+            and connection.dialect.name == "postgresql"
+        ):
+            ensure_partitions(
+                connection,
+                datetime.now(timezone.utc).date(),
+                settings.REFRESH_TOKEN_EXPIRE_DAYS + 1,
+            )
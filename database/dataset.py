@@ -0,0 +1,205 @@
+"""Deterministic synthetic users and blogs for testing at scale.
+
+The same seed, sizes and end date always give the same records (apart from
+the bcrypt salt of the one password hash all users share), so a pagination
+or search measurement can be repeated on an identical database. The shape
+follows what a real blog platform sees:
+
+* authors are Zipf-distributed: a few users write most of the posts
+* category popularity is skewed the same way
+* post length is log-normal, from a paragraph to a long essay
+* words follow a Zipf frequency over a generated vocabulary, so search terms
+  range from matching most posts to matching a handful
+* ``created_at`` spans ``days`` days up to ``end``, with posting volume
+  growing over time, and ids follow ``created_at`` as they do for live
+  inserts; some posts are edited later
+
+Every record is drawn from its own seeded generator, so resuming a load
+skips the loaded records without drawing them. Loading goes through
+``bulk_import.Loader``: COPY on PostgreSQL, batched executemany elsewhere,
+indexes rebuilt once at the end.
+"""
+
+import itertools
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Set, Tuple
+from sqlalchemy.engine import Engine
+from database.bulk_import import Loader
+
+# Every generated user signs in with this password
+DATASET_PASSWORD = "dataset-password"
+VOCABULARY_SIZE = 20_000
+# Words are drawn uniformly from a table holding each word in proportion to
+# its Zipf weight: far cheaper per word than a weighted draw
+WORD_TABLE_SIZE = 1 << 20
+# Posts are assembled from a pool of generated sentences (about 12 words
+# each), which is an order of magnitude faster than drawing every word
+SENTENCE_POOL_SIZE = 100_000
+WORDS_PER_SENTENCE = 12
+# Share of posts edited some days after publication
+EDITED_SHARE = 0.15
+SYLLABLES = (
+    "ka lo mi ra ten sol vi dor an el ust pre qua ri zo ber nal fi gor ex "
+    "mar tin sa ve lun cor da pho nis tra bel um os ca rel fen go hu li"
+).split()
+CATEGORIES = (
+    "Technology Lifestyle Travel Food Health Science Business Sports Culture "
+    "Music Politics Education Finance Gaming Fashion Environment History Art "
+    "Parenting Automotive Photography Books Film Design"
+).split()
+FIRST_NAMES = "Ada Ben Chloe Dev Elena Farid Grace Hiro Ines Jonas Kira Liam".split()
+LAST_NAMES = "Adams Brown Chen Diaz Evans Fischer Garcia Haddad Ito Jones".split()
+COUNTRIES = ("US", "INDIA", "UK", "DE", "BR", "FR", "JP", "CA", "NG", "AU")
+
+
+def user_email(number: int) -> str:
+    return f"user{number}@example.com"
+
+
+def zipf_table(words: List[str], exponent: float, size: int) -> List[str]:
+    """``words`` repeated in proportion to their Zipf weight by rank."""
+    weights = [1 / rank**exponent for rank in range(1, len(words) + 1)]
+    scale = size / sum(weights)
+    return [
+        word
+        for word, weight in zip(words, weights)
+        for _ in range(max(1, round(weight * scale)))
+    ]
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of ranks 1..count under a Zipf law."""
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1))
+    )
+
+
+class Dataset:
+    def __init__(
+        self,
+        users: int,
+        blogs: int,
+        hashed_password: str,
+        seed: int = 0,
+        end: datetime = datetime(2025, 1, 1),
+        days: int = 730,
+        author_skew: float = 1.1,
+        category_skew: float = 1.0,
+        median_words: int = 250,
+    ):
+        if users < 1:
+            raise ValueError("A dataset needs at least one user")
+        self.users = users
+        self.blogs = blogs
+        self.hashed_password = hashed_password
+        self.seed = seed
+        self.end = end
+        self.days = days
+        self.author_skew = author_skew
+        self.category_skew = category_skew
+        self.median_words = median_words
+
+        setup = self._random("setup")
+        words: Set[str] = set()
+        while len(words) < VOCABULARY_SIZE:
+            words.add("".join(setup.choices(SYLLABLES, k=setup.randint(1, 4))))
+        self.vocabulary = sorted(words)
+        setup.shuffle(self.vocabulary)
+        self.word_table = zipf_table(self.vocabulary, 1.0, WORD_TABLE_SIZE)
+        self.sentences = [
+            " ".join(
+                setup.choices(self.word_table, k=setup.randint(6, 18))
+            ).capitalize()
+            + "."
+            for _ in range(SENTENCE_POOL_SIZE)
+        ]
+        # Rank order of authors, so the most prolific is not always user 1
+        self.authors = list(range(1, users + 1))
+        setup.shuffle(self.authors)
+        self.author_weights = zipf_cum_weights(users, author_skew)
+        self.category_weights = zipf_cum_weights(len(CATEGORIES), category_skew)
+
+    def fingerprint(self) -> str:
+        return (
+            f"seed={self.seed},users={self.users},blogs={self.blogs},"
+            f"end={self.end.isoformat()},days={self.days}"
+        )
+
+    def _random(self, *parts: Any) -> random.Random:
+        return random.Random(":".join(map(str, (self.seed, *parts))))
+
+    def user_records(self, skip: int = 0) -> Iterator[Dict[str, Any]]:
+        for number in range(skip + 1, self.users + 1):
+            rng = self._random("user", number)
+            yield {
+                "id": number,
+                "email": user_email(number),
+                "hashed_password": self.hashed_password,
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "country": rng.choice(COUNTRIES),
+                # Accounts predate the posting period
+                "created_at": self.end - timedelta(days=self.days * (1 + rng.random())),
+            }
+
+    def _timestamps(self) -> List[float]:
+        """Sorted post times as days before ``end``; volume grows over time."""
+        rng = self._random("timestamps")
+        # Density rising linearly to the end date: inverse CDF of f(x) = 2x
+        return sorted(
+            (self.days * (1 - math.sqrt(rng.random())) for _ in range(self.blogs)),
+            reverse=True,
+        )
+
+    def _text(self, rng: random.Random, words: int) -> str:
+        sentences = rng.choices(
+            self.sentences, k=max(1, round(words / WORDS_PER_SENTENCE))
+        )
+        return "\n\n".join(
+            " ".join(sentences[i : i + 5]) for i in range(0, len(sentences), 5)
+        )
+
+    def blog_records(self, skip: int = 0) -> Iterator[Dict[str, Any]]:
+        ages = self._timestamps()
+        mu = math.log(self.median_words)
+        for number in range(skip, self.blogs):
+            rng = self._random("blog", number)
+            words = min(max(int(rng.lognormvariate(mu, 0.7)), 20), 5000)
+            created_at = self.end - timedelta(days=ages[number])
+            updated_at = created_at
+            if rng.random() < EDITED_SHARE:
+                edited = created_at + timedelta(days=rng.expovariate(1 / 3))
+                updated_at = min(edited, self.end)
+            title = rng.choices(self.word_table, k=rng.randint(3, 8))
+            (category,) = rng.choices(CATEGORIES, cum_weights=self.category_weights)
+            (author_id,) = rng.choices(self.authors, cum_weights=self.author_weights)
+            yield {
+                "title": " ".join(title).title(),
+                "content": self._text(rng, words),
+                "category": category,
+                "author_id": author_id,
+                "created_at": created_at,
+                "updated_at": updated_at,
+            }
+
+
+class DatasetLoader(Loader):
+    """Loads the users or blogs of a Dataset."""
+
+    def __init__(self, engine: Engine, table: str, dataset: Dataset, **options: Any):
+        super().__init__(
+            engine,
+            table,
+            f"generated {table}",
+            f"{table}:generated:{dataset.fingerprint()}",
+            **options,
+        )
+        self.dataset = dataset
+        self.generate = (
+            dataset.user_records if table == "users" else dataset.blog_records
+        )
+
+    def records(self, skip: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        return enumerate(self.generate(skip), skip + 1)
@@ -0,0 +1,110 @@
+"""Full-text index DDL for the blogs table.
+
+PostgreSQL keeps a weighted ``tsvector`` as a stored generated column with a
+GIN index, so every INSERT/UPDATE maintains it. SQLite uses an external-content
+FTS5 table kept in sync by triggers. Both are installed idempotently.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+FTS_TABLE = "blogs_fts"
+TS_CONFIG = "english"
+
+POSTGRES_DDL = [
+    f"""
+    ALTER TABLE blogs ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_blogs_search_vector ON blogs USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, content, category,
+        content='blogs', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blogs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, content, category)
+        VALUES (new.id, new.title, new.content, new.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blogs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, category)
+        VALUES ('delete', old.id, old.title, old.content, old.category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON blogs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content, category)
+        VALUES ('delete', old.id, old.title, old.content, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, title, content, category)
+        VALUES (new.id, new.title, new.content, new.category);
+    END
+    """,
+]
+
+
+def sqlite_has_fts(connection: Connection) -> bool:
+    return (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        is not None
+    )
+
+
+def install_fulltext(connection: Connection) -> None:
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.execute(text(statement))
+    elif dialect == "sqlite":
+        backfill = not sqlite_has_fts(connection)
+        for statement in SQLITE_DDL:
+            connection.execute(text(statement))
+        if backfill:
+            connection.execute(
+                text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            )
+
+
+def suspend_fulltext(connection: Connection) -> None:
+    """Stop maintaining the index per inserted row, ahead of a bulk load."""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(text("DROP INDEX IF EXISTS ix_blogs_search_vector"))
+    elif dialect == "sqlite":
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai"))
+
+
+def resume_fulltext(connection: Connection) -> None:
+    """Undo suspend_fulltext, indexing every row in one pass."""
+    install_fulltext(connection)
+    if connection.dialect.name == "sqlite":
+        connection.execute(
+            text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        )
+
+
+def drop_fulltext(connection: Connection) -> None:
+    # The generated column and triggers go with the blogs table itself
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+
+def on_blogs_created(target, connection: Connection, **kw) -> None:
+    install_fulltext(connection)
+
+
+def on_blogs_dropped(target, connection: Connection, **kw) -> None:
+    drop_fulltext(connection)
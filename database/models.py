@@ -1,7 +1,20 @@
-from sqlalchemy import String, Integer, Text, DateTime, Boolean, ForeignKey
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy import (
+    String,
+    Integer,
+    Text,
+    DateTime,
+    Boolean,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+    event,
+)
+from sqlalchemy.orm import relationship, Mapped, mapped_column, validates
 from datetime import datetime, timezone
+from config.settings import settings
 from database.connection import Base
+from database.fulltext import on_blogs_created, on_blogs_dropped
+from database.upgrades import BLOG_INDEXES, EXCERPT_LENGTH
 
 
 class User(Base):
@@ -28,12 +41,20 @@ class User(Base):
     )
 
 
+def make_excerpt(content: str) -> str:
+    return content[:EXCERPT_LENGTH]
+
+
 class Blog(Base):
     __tablename__ = "blogs"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # Maintained from content, so list pages can skip the TEXT column
+    excerpt: Mapped[str] = mapped_column(
+        String(EXCERPT_LENGTH), nullable=False, default="", server_default=""
+    )
     category: Mapped[str] = mapped_column(String, nullable=False, index=True)
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     created_at: Mapped[datetime] = mapped_column(
@@ -47,15 +68,69 @@ class Blog(Base):
 
     author: Mapped["User"] = relationship("User", back_populates="blogs")
 
+    @validates("content")
+    def _sync_excerpt(self, key: str, content: str) -> str:
+        self.excerpt = make_excerpt(content)
+        return content
+
+    __table_args__ = tuple(
+        Index(name, *columns) for name, columns in BLOG_INDEXES.items()
+    )
+
+
+class CategoryStat(Base):
+    """Posts per category, kept in step with blogs; see database.category_stats."""
+
+    __tablename__ = "category_stats"
+
+    category: Mapped[str] = mapped_column(String, primary_key=True)
+    posts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class MaintenanceRun(Base):
+    """When a periodic job last ran in any worker; see services.maintenance."""
+
+    __tablename__ = "maintenance_runs"
+
+    job: Mapped[str] = mapped_column(String, primary_key=True)
+    last_run: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+event.listen(Blog.__table__, "after_create", on_blogs_created)
+event.listen(Blog.__table__, "before_drop", on_blogs_dropped)
+
+
+PARTITIONED_BLACKLIST = settings.TOKEN_BLACKLIST_PARTITIONED
+
 
 class TokenBlacklist(Base):
     __tablename__ = "token_blacklist"
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    token: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    id: Mapped[int] = mapped_column(
+        Integer, primary_key=True, index=True, autoincrement=True
+    )
+    # SHA-256 of the JWT: a fixed 64-char key instead of the unbounded token
+    token_digest: Mapped[str] = mapped_column(
+        String(64), unique=not PARTITIONED_BLACKLIST, nullable=False, index=True
+    )
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     blacklisted_at: Mapped[datetime] = mapped_column(
-        DateTime, default=lambda: datetime.now(timezone.utc)
+        DateTime, default=lambda: datetime.now(timezone.utc), index=True
+    )
+    # The token's own exp; once past it the row can be pruned
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, index=True, primary_key=PARTITIONED_BLACKLIST
     )
 
     user: Mapped["User"] = relationship("User", back_populates="tokens")
+
+    # PostgreSQL only: range-partition by expiry day so pruning drops whole
+    # partitions. Unique keys on a partitioned table must include expires_at.
+    __table_args__ = (
+        (
+            UniqueConstraint("token_digest", "expires_at"),
+            {"postgresql_partition_by": "RANGE (expires_at)"},
+        )
+        if PARTITIONED_BLACKLIST
+        else ()
+    )
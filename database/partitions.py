@@ -0,0 +1,51 @@
+"""Daily range partitions for token_blacklist on PostgreSQL.
+
+Enabled with TOKEN_BLACKLIST_PARTITIONED. Partitions are named
+``token_blacklist_pYYYYMMDD``. Each one holds the rows whose ``expires_at``
+falls on that day. Once the day is over, every row in the partition has
+expired, so pruning drops the table instead of deleting rows.
+"""
+
+from datetime import date, timedelta
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+TABLE = "token_blacklist"
+
+
+def partition_name(day: date) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def ensure_partitions(connection: Connection, today: date, days_ahead: int) -> None:
+    """Create partitions from today through ``days_ahead`` days ahead, plus a default."""
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{day.isoformat()}') "
+                f"TO ('{(day + timedelta(days=1)).isoformat()}')"
+            )
+        )
+    connection.execute(
+        text(f"CREATE TABLE IF NOT EXISTS {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+    )
+
+
+def drop_expired_partitions(connection: Connection, today: date) -> int:
+    """Drop partitions for days before ``today``; returns how many were dropped."""
+    names = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND c.relname LIKE :pattern"
+        ),
+        {"table": TABLE, "pattern": f"{TABLE}_p%"},
+    ).scalars()
+    cutoff = partition_name(today)
+    expired = sorted(name for name in names if name < cutoff)
+    for name in expired:
+        connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    return len(expired)
@@ -0,0 +1,190 @@
+"""Connection pool configuration and instrumentation.
+
+Both engines (sync and async) get their pool settings from ``DB_POOL_*``
+and report the time each checkout spends getting a connection. Waits over
+DB_POOL_WAIT_WARNING_MS are logged as a sign the pool is too small for the
+load.
+
+Liveness checks on checkout follow DB_POOL_PRE_PING:
+
+* ``always``: SQLAlchemy's pre-ping, one extra round trip per checkout
+* ``idle``: ping only connections idle for DB_POOL_PING_IDLE_SECONDS or
+  more, which are the ones a server or proxy may have dropped
+* ``off``: no ping; a dead connection surfaces as a failed request
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from config.settings import settings
+from monitoring.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+PRE_PING_STRATEGIES = ("always", "idle", "off")
+
+CHECKOUTS = counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ("engine",)
+)
+CHECKOUT_WAIT = counter(
+    "db_pool_checkout_wait_seconds_total",
+    "Time spent waiting for a pooled connection",
+    ("engine",),
+)
+SLOW_CHECKOUTS = counter(
+    "db_pool_slow_checkouts_total",
+    "Checkouts that waited longer than DB_POOL_WAIT_WARNING_MS",
+    ("engine",),
+)
+CHECKED_OUT = gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    ("engine",),
+    multiprocess_mode="sum",
+)
+OVERFLOW = gauge(
+    "db_pool_overflow",
+    "Connections open beyond DB_POOL_SIZE",
+    ("engine",),
+    multiprocess_mode="sum",
+)
+IDLE_PINGS = counter(
+    "db_pool_idle_pings_total",
+    "Liveness pings sent for connections that sat idle",
+    ("engine",),
+)
+
+
+class TimedPool:
+    """QueuePool mixin timing how long each checkout takes to get a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record_wait(self, time.perf_counter() - started)
+
+
+class TimedQueuePool(TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+# Longest checkout wait per engine since the last /ready report
+_max_wait: Dict[str, float] = {}
+_max_wait_lock = threading.Lock()
+
+
+def pool_name(pool: Pool) -> str:
+    # Set from pool_logging_name, which survives engine.dispose()
+    return getattr(pool, "logging_name", None) or "default"
+
+
+def record_wait(pool: QueuePool, seconds: float) -> None:
+    name = pool_name(pool)
+    CHECKOUTS.inc(engine=name)
+    CHECKOUT_WAIT.inc(seconds, engine=name)
+    with _max_wait_lock:
+        _max_wait[name] = max(_max_wait.get(name, 0.0), seconds)
+    if seconds * 1000 >= settings.DB_POOL_WAIT_WARNING_MS:
+        SLOW_CHECKOUTS.inc(engine=name)
+        logger.warning(
+            "Waited %.0f ms for a %s database connection "
+            "(pool size %d, %d checked out, overflow %d)",
+            seconds * 1000,
+            name,
+            pool.size(),
+            pool.checkedout(),
+            max(pool.overflow(), 0),
+        )
+
+
+def engine_options(url: str, name: str, asynchronous: bool = False) -> Dict[str, Any]:
+    """create_engine / create_async_engine keyword arguments from settings."""
+    if settings.DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(f"DB_POOL_PRE_PING must be one of {PRE_PING_STRATEGIES}")
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING == "always",
+        "pool_logging_name": name,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        # In-memory SQLite keeps one connection; there is no pool to size
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool if asynchronous else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
+def install_idle_ping(engine: Engine) -> None:
+    """Ping connections idle for DB_POOL_PING_IDLE_SECONDS on checkout."""
+    dialect = engine.dialect
+    name = pool_name(engine.pool)
+
+    @event.listens_for(engine, "checkin")
+    def remember_checkin(dbapi_connection, record) -> None:
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def ping_if_idle(dbapi_connection, record, proxy) -> None:
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or (
+            time.monotonic() - checked_in_at < settings.DB_POOL_PING_IDLE_SECONDS
+        ):
+            return
+        IDLE_PINGS.inc(engine=name)
+        try:
+            alive = dialect.do_ping(dbapi_connection)
+        except dialect.loaded_dbapi.Error:
+            alive = False
+        if not alive:
+            # The pool discards this connection and retries with a new one
+            raise DisconnectionError("Idle connection failed its ping")
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Current pool occupancy plus checkout waits since the last call."""
+    pool = engine.pool
+    name = pool_name(pool)
+    with _max_wait_lock:
+        max_wait = _max_wait.pop(name, 0.0)
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+        CHECKED_OUT.set(pool.checkedout(), engine=name)
+        OVERFLOW.set(max(pool.overflow(), 0), engine=name)
+    checkouts = CHECKOUTS.value(engine=name)
+    status.update(
+        checkouts=int(checkouts),
+        slow_checkouts=int(SLOW_CHECKOUTS.value(engine=name)),
+        mean_wait_ms=(
+            CHECKOUT_WAIT.value(engine=name) / checkouts * 1000 if checkouts else 0.0
+        ),
+        max_wait_ms=max_wait * 1000,
+    )
+    return status
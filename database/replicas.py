@@ -0,0 +1,266 @@
+"""Read replicas for the read-only routes.
+
+Routes that only read take their session from ``get_read_db``. With
+DATABASE_REPLICA_URLS set, it hands out sessions on the replicas in
+rotation, skipping any that failed their last health check; with none
+configured or none healthy it is the primary session from ``get_db``.
+
+A replica trails the primary, so right after a client writes, its reads go
+to the primary: successful POST/PUT/PATCH/DELETE responses set a cookie that
+keeps that client on the primary for DB_READ_YOUR_WRITES_SECONDS. Clients
+that drop cookies may read their own writes slightly late. Requests served
+by a replica are marked in ``request.state.read_replica``. The response
+cache checks that mark so it does not store stale pages for everyone.
+
+Replicas are checked every DB_REPLICA_CHECK_INTERVAL_SECONDS with ``SELECT
+1`` (on PostgreSQL, by their replay lag, which must stay under
+DB_REPLICA_MAX_LAG_SECONDS). A replica that fails a check, or whose
+connection fails during a request, is out of rotation until a check passes.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.settings import settings
+from database.connection import DBSession, get_async_database_url, get_db, run_db
+from database.pool import engine_options, install_idle_ping
+from monitoring.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_COOKIE = "read_primary_until"
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+PRIMARY = "primary"
+
+READS = counter(
+    "db_read_sessions_total",
+    "Read-only requests by the database that served them",
+    ("database",),
+)
+REPLICA_UP = gauge(
+    "db_replica_up",
+    "1 if the replica passed its last health check",
+    ("replica",),
+    multiprocess_mode="min",
+)
+REPLICA_LAG = gauge(
+    "db_replica_lag_seconds",
+    "Replay lag of the replica at its last health check (PostgreSQL)",
+    ("replica",),
+    multiprocess_mode="max",
+)
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary does not read as lag
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def _replication_lag(db: Session) -> Optional[float]:
+    """Seconds the replica trails the primary; None where it cannot tell."""
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(text("SELECT 1"))
+        return None
+    lag = db.execute(POSTGRES_LAG_SQL).scalar()
+    return float(lag or 0.0)
+
+
+class Replica:
+    def __init__(self, name: str, url: str, asynchronous: bool):
+        self.name = name
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(url, **engine_options(url, name))
+        self.sessions = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.engine
+        )
+        self.async_engine: Optional[AsyncEngine] = None
+        self.async_sessions: Optional[async_sessionmaker[AsyncSession]] = None
+        if asynchronous:
+            async_url = get_async_database_url(url)
+            self.async_engine = create_async_engine(
+                async_url,
+                **engine_options(async_url, f"{name}-async", asynchronous=True),
+            )
+            self.async_sessions = async_sessionmaker(
+                self.async_engine,
+                autoflush=False,
+                expire_on_commit=False,
+                class_=AsyncSession,
+            )
+        if settings.DB_POOL_PRE_PING == "idle":
+            for engine in self.engines():
+                install_idle_ping(engine)
+        # Out of rotation until the first check passes
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def engines(self) -> List[Engine]:
+        """Sync engines to instrument, including the async engine's."""
+        engines = [self.engine]
+        if self.async_engine is not None:
+            engines.append(self.async_engine.sync_engine)
+        return engines
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[DBSession]:
+        if self.async_sessions is not None:
+            async with self.async_sessions() as async_db:
+                yield async_db
+        else:
+            with self.sessions() as db:
+                yield db
+
+    def mark_down(self, error: str) -> None:
+        if self.healthy:
+            logger.warning("Read replica %s out of rotation: %s", self.name, error)
+        self.healthy = False
+        self.error = error
+        REPLICA_UP.set(0, replica=self.name)
+
+    async def check(self) -> None:
+        try:
+            async with self.session() as db:
+                lag = await run_db(db, _replication_lag)
+        except Exception as exc:
+            self.mark_down(f"{type(exc).__name__}: {exc}")
+        else:
+            self.lag_seconds = lag
+            if lag is not None:
+                REPLICA_LAG.set(lag, replica=self.name)
+            if lag is not None and lag > settings.DB_REPLICA_MAX_LAG_SECONDS:
+                self.mark_down(f"replication lag {lag:.1f} s")
+            else:
+                if not self.healthy:
+                    logger.info("Read replica %s in rotation", self.name)
+                self.healthy = True
+                self.error = None
+                REPLICA_UP.set(1, replica=self.name)
+        self.checked_at = time.monotonic()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "error": self.error,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, urls: List[str], asynchronous: bool = settings.DB_ASYNC):
+        self.replicas = [
+            Replica(f"replica{number}", url, asynchronous)
+            for number, url in enumerate(urls, 1)
+        ]
+        self._turn = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """The next healthy replica in rotation, if any."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self) -> None:
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [replica.status() for replica in self.replicas]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            if replica.async_engine is not None:
+                await replica.async_engine.dispose()
+
+
+replica_set = ReplicaSet(settings.DATABASE_REPLICA_URLS)
+
+
+def wrote_recently(request: Request) -> bool:
+    until = request.cookies.get(PRIMARY_COOKIE)
+    if until is None:
+        return False
+    try:
+        return float(until) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(
+    request: Request, primary: DBSession = Depends(get_db)
+) -> AsyncGenerator[DBSession, None]:
+    """A session for read-only work: a healthy replica, else the primary."""
+    replica = None if wrote_recently(request) else replica_set.choose()
+    if replica is None:
+        READS.inc(database=PRIMARY)
+        yield primary
+        return
+    READS.inc(database=replica.name)
+    # Read by the response cache, which must not store a stale replica page
+    request.state.read_replica = replica.name
+    async with replica.session() as db:
+        try:
+            yield db
+        except DBAPIError as exc:
+            if exc.connection_invalidated:
+                replica.mark_down(f"{type(exc).__name__}: {exc.orig}")
+            raise
+
+
+class ReadYourWritesMiddleware:
+    """Keeps a client's reads on the primary for a while after it writes."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        window = settings.DB_READ_YOUR_WRITES_SECONDS
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or not replica_set
+            or window <= 0
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}={time.time() + window:.3f}; "
+                    f"Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,197 @@
+"""Columns and indexes added after the first release.
+
+``create_all`` skips tables that already exist, so schemas created by older
+versions get new columns and indexes here, idempotently, with any backfill
+they need.
+"""
+
+from datetime import timedelta
+from typing import Set
+from jose import JWTError
+from sqlalchemy import DateTime, MetaData, Table, bindparam, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from auth.jwt_handler import token_digest, token_expiry
+from config.settings import settings
+
+# Characters of content kept in blogs.excerpt for summary listings
+EXCERPT_LENGTH = 200
+
+# Keyset pagination: newest-first pages are range scans on these
+BLOG_INDEXES = {
+    "ix_blogs_created_at_id": ("created_at", "id"),
+    "ix_blogs_category_created_at_id": ("category", "created_at", "id"),
+}
+
+
+def column_names(connection: Connection, table: str) -> Set[str]:
+    return {column["name"] for column in inspect(connection).get_columns(table)}
+
+
+def add_blog_excerpt(connection: Connection) -> None:
+    if "excerpt" in column_names(connection, "blogs"):
+        return
+    connection.execute(
+        text(
+            f"ALTER TABLE blogs ADD COLUMN excerpt VARCHAR({EXCERPT_LENGTH}) "
+            "NOT NULL DEFAULT ''"
+        )
+    )
+    # Same rule as models.make_excerpt: the first EXCERPT_LENGTH characters
+    connection.execute(
+        text(f"UPDATE blogs SET excerpt = substr(content, 1, {EXCERPT_LENGTH})")
+    )
+
+
+def rebuild_sqlite_table(connection: Connection, table: Table) -> None:
+    """Recreate ``table`` from its model, keeping the columns both versions share.
+
+    SQLite cannot add NOT NULL to an existing column, so the old table is
+    renamed aside and copied into one created with every constraint.
+    """
+    old = f"{table.name}_old"
+    shared = ", ".join(
+        column.name
+        for column in table.columns
+        if column.name in column_names(connection, table.name)
+    )
+    for index in inspect(connection).get_indexes(table.name):
+        connection.execute(text(f"DROP INDEX {index['name']}"))
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {old}"))
+    table.create(connection)
+    connection.execute(
+        text(f"INSERT INTO {table.name} ({shared}) SELECT {shared} FROM {old}")
+    )
+    connection.execute(text(f"DROP TABLE {old}"))
+
+
+def add_token_expiry(connection: Connection) -> None:
+    """Add token_blacklist.expires_at, backfilled from each token's ``exp``.
+
+    Rows whose token is gone or unreadable get the longest a token can live
+    past its revocation, so pruning never drops one that still matters.
+    """
+    columns = column_names(connection, "token_blacklist")
+    if "expires_at" not in columns:
+        connection.execute(
+            text("ALTER TABLE token_blacklist ADD COLUMN expires_at TIMESTAMP")
+        )
+    token = "token" if "token" in columns else "NULL"
+    rows = connection.execute(
+        text(
+            f"SELECT id, {token} AS token, blacklisted_at FROM token_blacklist "
+            "WHERE expires_at IS NULL"
+        ).columns(blacklisted_at=DateTime)
+    ).all()
+    lifetime = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    backfill = []
+    for id_, jwt, blacklisted_at in rows:
+        try:
+            expires_at = token_expiry(jwt)
+        except (JWTError, KeyError, AttributeError):
+            expires_at = blacklisted_at + lifetime
+        backfill.append({"id": id_, "expires_at": expires_at})
+    if backfill:
+        connection.execute(
+            text(
+                "UPDATE token_blacklist SET expires_at = :expires_at WHERE id = :id"
+            ).bindparams(bindparam("expires_at", type_=DateTime)),
+            backfill,
+        )
+    if connection.dialect.name != "sqlite":
+        connection.execute(
+            text("ALTER TABLE token_blacklist ALTER COLUMN expires_at SET NOT NULL")
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_token_blacklist_expires_at "
+                "ON token_blacklist (expires_at)"
+            )
+        )
+
+
+def upgrade_token_blacklist(connection: Connection, table: Table) -> None:
+    """Bring token_blacklist from the first release to the digest-keyed table.
+
+    The expiry is backfilled before the digest step drops the raw tokens it
+    is read from. SQLite then rebuilds the table to enforce NOT NULL.
+    """
+    columns = column_names(connection, "token_blacklist")
+    if "token" not in columns and "expires_at" in columns:
+        return
+    add_token_expiry(connection)
+    key_blacklist_by_digest(connection)
+    if connection.dialect.name == "sqlite":
+        rebuild_sqlite_table(connection, table)
+
+
+def key_blacklist_by_digest(connection: Connection) -> None:
+    """Replace token_blacklist.token with the token_digest the app looks up.
+
+    The digests are backfilled from the stored tokens, so revoked tokens stay
+    revoked. The raw token column goes: inserts no longer set it.
+    """
+    columns = column_names(connection, "token_blacklist")
+    if "token" not in columns:
+        return
+    if "token_digest" not in columns:
+        connection.execute(
+            text("ALTER TABLE token_blacklist ADD COLUMN token_digest VARCHAR(64)")
+        )
+    rows = connection.execute(
+        text("SELECT id, token FROM token_blacklist WHERE token_digest IS NULL")
+    ).all()
+    if rows:
+        connection.execute(
+            text("UPDATE token_blacklist SET token_digest = :digest WHERE id = :id"),
+            [{"id": id_, "digest": token_digest(token)} for id_, token in rows],
+        )
+    if connection.dialect.name != "sqlite":
+        connection.execute(
+            text("ALTER TABLE token_blacklist ALTER COLUMN token_digest SET NOT NULL")
+        )
+    connection.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_token_blacklist_token_digest "
+            "ON token_blacklist (token_digest)"
+        )
+    )
+    # SQLite refuses to drop an indexed column
+    connection.execute(text("DROP INDEX IF EXISTS ix_token_blacklist_token"))
+    connection.execute(text("ALTER TABLE token_blacklist DROP COLUMN token"))
+
+
+def add_blog_indexes(connection: Connection) -> None:
+    """Create BLOG_INDEXES; on PostgreSQL without blocking writes.
+
+    PostgreSQL builds them ``CONCURRENTLY``, which cannot run in a
+    transaction, so ``connection`` must be in autocommit mode there. A build
+    that failed part way leaves an invalid index that ``IF NOT EXISTS``
+    would keep, so those are dropped and built again.
+    """
+    postgresql = connection.dialect.name == "postgresql"
+    for name, columns in BLOG_INDEXES.items():
+        if postgresql:
+            invalid = connection.execute(
+                text(
+                    "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = indexrelid "
+                    "WHERE relname = :name AND NOT indisvalid"
+                ),
+                {"name": name},
+            ).first()
+            if invalid is not None:
+                connection.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+        connection.execute(
+            text(
+                f"CREATE INDEX {'CONCURRENTLY ' if postgresql else ''}"
+                f"IF NOT EXISTS {name} ON blogs ({', '.join(columns)})"
+            )
+        )
+
+
+def upgrade_schema(engine: Engine, metadata: MetaData) -> None:
+    """Bring a schema created by an older ``metadata.create_all`` up to date."""
+    with engine.begin() as connection:
+        add_blog_excerpt(connection)
+        upgrade_token_blacklist(connection, metadata.tables["token_blacklist"])
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        add_blog_indexes(connection)
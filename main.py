@@ -1,8 +1,31 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config.settings import settings
-from database.connection import init_db
+from auth.password import (
+    PasswordHasherBusy,
+    calibrate_rounds,
+    configure_rounds,
+    hasher,
+)
+from database import category_stats
+from database.connection import SessionLocal, async_engine, engine, init_db
+from database.replicas import ReadYourWritesMiddleware, replica_set
 from routers import auth, profile, blog
+from services import search_index
+from services.maintenance import (
+    count_pending_hash_upgrades,
+    run_category_reconciliation,
+    run_hash_upgrade_count,
+    run_search_index_resync,
+    run_token_pruning,
+)
+from monitoring import metrics as monitoring_metrics
+from monitoring.http import MetricsMiddleware, count_queries
+from monitoring import profiler
+from monitoring.readiness import database_probe
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,6 +42,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(profiler.ProfilingMiddleware)
+# Outermost, so the latency covers every other middleware
+app.add_middleware(MetricsMiddleware)
+
+request_engines = [engine]
+if async_engine is not None:
+    request_engines.append(async_engine.sync_engine)
+for replica in replica_set.replicas:
+    request_engines.extend(replica.engines())
+for request_engine in request_engines:
+    count_queries(request_engine)
+    if profiler.enabled():
+        profiler.profile_queries(request_engine)
+
+logger = logging.getLogger(__name__)
+
+background_tasks: list = []
 
 # Include routers
 app.include_router(auth.router)
@@ -30,9 +71,74 @@ app.include_router(blog.router)
 async def startup_event():
     """Initialize database on startup"""
     init_db()
+    if settings.BCRYPT_TARGET_MS:
+        rounds = calibrate_rounds(settings.BCRYPT_TARGET_MS, settings.BCRYPT_MIN_ROUNDS)
+        configure_rounds(rounds)
+        logger.info("bcrypt cost calibrated to %d rounds", rounds)
+    with SessionLocal() as db:
+        count_pending_hash_upgrades(db)
+        if category_stats.backfill(db):
+            db.commit()
+    if search_index.enabled():
+        with SessionLocal() as db:
+            search_index.rebuild(db)
+        usage = search_index.index.memory_usage()
+        print(
+            f"Search index: {usage['documents']} posts, "
+            f"{usage['bytes_per_document']:.0f} bytes/post"
+        )
+    await database_probe.check()
+    background_tasks.append(asyncio.create_task(database_probe.run()))
+    if replica_set:
+        await replica_set.check()
+        background_tasks.append(
+            asyncio.create_task(
+                replica_set.run(settings.DB_REPLICA_CHECK_INTERVAL_SECONDS)
+            )
+        )
+    if settings.METRICS_MULTIPROC_DIR:
+        background_tasks.append(
+            asyncio.create_task(
+                monitoring_metrics.run_snapshot_writer(
+                    settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS
+                )
+            )
+        )
+    if settings.PASSWORD_UPGRADE_COUNT_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_hash_upgrade_count()))
+    if settings.TOKEN_PRUNE_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_token_pruning()))
+    if settings.CATEGORY_STATS_RECONCILE_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_category_reconciliation()))
+    if search_index.enabled() and settings.SEARCH_INDEX_RESYNC_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_search_index_resync()))
     print(f"{settings.APP_NAME} v{settings.APP_VERSION} started successfully!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background maintenance tasks and close database connections"""
+    for task in background_tasks:
+        task.cancel()
+    background_tasks.clear()
+    hasher.shutdown()
+    if settings.METRICS_MULTIPROC_DIR:
+        monitoring_metrics.REGISTRY.write_snapshot(settings.METRICS_MULTIPROC_DIR)
+    # aiosqlite connections hold threads that would keep the process alive
+    if async_engine is not None:
+        await async_engine.dispose()
+    await replica_set.dispose()
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many sign-in attempts in progress, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -47,3 +153,22 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: last database probe and connection pool usage"""
+    status_code = (
+        status.HTTP_200_OK
+        if database_probe.ready()
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return JSONResponse(database_probe.status(), status_code=status_code)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text format"""
+    return PlainTextResponse(
+        monitoring_metrics.render(), media_type="text/plain; version=0.0.4"
+    )
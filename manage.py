@@ -0,0 +1,174 @@
+"""Management commands for the Blog API.
+
+Usage::
+
+    python manage.py calibrate-bcrypt --target-ms 250
+    python manage.py password-upgrades
+    python manage.py import users users.csv
+    python manage.py import blogs posts.jsonl --resume
+    python manage.py generate --users 50000 --blogs 1000000 --seed 7
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from auth.password import calibrate_rounds, current_rounds, hash_password
+from config.settings import settings
+from database.bulk_import import FORMATS, TABLES, BulkImportError, Importer
+from database.connection import SessionLocal, engine, init_db
+from database.dataset import DATASET_PASSWORD, Dataset, DatasetLoader
+from services.user_service import UserService
+
+
+def calibrate_bcrypt(args: argparse.Namespace) -> None:
+    try:
+        rounds = calibrate_rounds(args.target_ms, args.min_rounds)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    print(f"BCRYPT_ROUNDS={rounds}  # ~{args.target_ms:g} ms per hash on this machine")
+
+
+def password_upgrades(args: argparse.Namespace) -> None:
+    rounds = args.rounds or current_rounds()
+    with SessionLocal() as db:
+        pending = UserService.count_outdated_password_hashes(db, rounds)
+    print(f"{pending} users have password hashes below {rounds} rounds")
+
+
+def import_data(args: argparse.Namespace) -> None:
+    init_db()
+    importer = Importer(
+        engine,
+        args.table,
+        args.path,
+        fmt=args.format,
+        batch_size=args.batch_size,
+        commit_every=args.commit_every,
+        resume=args.resume,
+        defer_indexes=not args.keep_indexes,
+    )
+    try:
+        loaded = importer.run()
+    except BulkImportError as exc:
+        sys.exit(f"Import stopped: {exc}")
+    print(f"Loaded {loaded:,} {args.table} records from {args.path}")
+
+
+def generate_data(args: argparse.Namespace) -> None:
+    init_db()
+    dataset = Dataset(
+        args.users,
+        args.blogs,
+        hash_password(DATASET_PASSWORD),
+        seed=args.seed,
+        end=args.end,
+        days=args.days,
+        author_skew=args.author_skew,
+        category_skew=args.category_skew,
+        median_words=args.median_words,
+    )
+    started = time.perf_counter()
+    for table in ("users", "blogs"):
+        loader = DatasetLoader(
+            engine,
+            table,
+            dataset,
+            batch_size=args.batch_size,
+            commit_every=args.commit_every,
+            resume=args.resume,
+            defer_indexes=not args.keep_indexes,
+        )
+        try:
+            loader.run()
+        except BulkImportError as exc:
+            sys.exit(f"Generation stopped: {exc}")
+    print(
+        f"Generated {args.users:,} users and {args.blogs:,} blogs "
+        f"in {time.perf_counter() - started:.0f} s; "
+        f"every user signs in with {DATASET_PASSWORD!r}"
+    )
+
+
+def add_load_options(command: argparse.ArgumentParser) -> None:
+    command.add_argument(
+        "--batch-size", type=int, default=5000, help="Rows per executemany (SQLite)"
+    )
+    command.add_argument(
+        "--commit-every", type=int, default=100_000, help="Records per transaction"
+    )
+    command.add_argument(
+        "--resume", action="store_true", help="Continue after the last commit"
+    )
+    command.add_argument(
+        "--keep-indexes",
+        action="store_true",
+        help="Maintain every index per row instead of rebuilding at the end",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Blog API management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    calibrate = commands.add_parser(
+        "calibrate-bcrypt", help="Pick the bcrypt cost that fits a hashing time"
+    )
+    calibrate.add_argument(
+        "--target-ms", type=float, default=settings.BCRYPT_TARGET_MS or 250.0
+    )
+    calibrate.add_argument("--min-rounds", type=int, default=settings.BCRYPT_MIN_ROUNDS)
+    calibrate.set_defaults(handler=calibrate_bcrypt)
+
+    upgrades = commands.add_parser(
+        "password-upgrades", help="Count users whose hash needs a cost upgrade"
+    )
+    upgrades.add_argument("--rounds", type=int, help="Defaults to BCRYPT_ROUNDS")
+    upgrades.set_defaults(handler=password_upgrades)
+
+    bulk = commands.add_parser(
+        "import", help="Load users or blogs from a JSONL or CSV file"
+    )
+    bulk.add_argument("table", choices=list(TABLES))
+    bulk.add_argument("path")
+    bulk.add_argument(
+        "--format", choices=FORMATS, help="Defaults to the file extension"
+    )
+    add_load_options(bulk)
+    bulk.set_defaults(handler=import_data)
+
+    generate = commands.add_parser(
+        "generate", help="Fill an empty database with a synthetic, seeded dataset"
+    )
+    generate.add_argument("--users", type=int, default=10_000)
+    generate.add_argument("--blogs", type=int, default=100_000)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument(
+        "--end",
+        type=datetime.fromisoformat,
+        default=datetime(2025, 1, 1),
+        help="Newest created_at (UTC)",
+    )
+    generate.add_argument(
+        "--days", type=int, default=730, help="Span of created_at before --end"
+    )
+    generate.add_argument(
+        "--author-skew", type=float, default=1.1, help="Zipf exponent of authorship"
+    )
+    generate.add_argument(
+        "--category-skew", type=float, default=1.0, help="Zipf exponent of categories"
+    )
+    generate.add_argument("--median-words", type=int, default=250)
+    add_load_options(generate)
+    generate.set_defaults(handler=generate_data)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
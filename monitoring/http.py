@@ -0,0 +1,105 @@
+"""Per-route request metrics, collected by a plain ASGI middleware.
+
+Requests are labelled by route template (``/api/blogs/{blog_id}``), never by
+raw path, so the number of series stays fixed. Database statements are
+attributed to the request that ran them through a context variable, which
+follows the request into the threadpool and SQLAlchemy's async bridge.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from monitoring.metrics import counter, gauge, histogram
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, including streaming the body",
+    ("method", "route"),
+)
+REQUESTS = counter(
+    "http_requests_total", "Requests handled", ("method", "route", "status")
+)
+IN_FLIGHT = gauge(
+    "http_requests_in_flight", "Requests being handled", multiprocess_mode="sum"
+)
+DB_QUERIES = counter(
+    "http_db_queries_total", "Database statements run by requests", ("route",)
+)
+DB_QUERY_SECONDS = counter(
+    "http_db_query_seconds_total",
+    "Time requests spent executing database statements",
+    ("route",),
+)
+
+# [statements, seconds] of the request being handled, if any
+request_queries: ContextVar[Optional[List[float]]] = ContextVar(
+    "request_queries", default=None
+)
+
+
+def _query_started(conn, cursor, statement, parameters, context, executemany) -> None:
+    if request_queries.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany) -> None:
+    totals = request_queries.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - context._metrics_started
+
+
+def count_queries(engine: Engine) -> None:
+    """Attribute ``engine``'s statements to the current request."""
+    event.listen(engine, "before_cursor_execute", _query_started)
+    event.listen(engine, "after_cursor_execute", _query_finished)
+
+
+def stop_counting_queries(engine: Engine) -> None:
+    event.remove(engine, "before_cursor_execute", _query_started)
+    event.remove(engine, "after_cursor_execute", _query_finished)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        totals = [0, 0.0]
+        token = request_queries.set(totals)
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            request_queries.reset(token)
+            method, route = scope["method"], route_template(scope)
+            REQUEST_SECONDS.observe(elapsed, method=method, route=route)
+            REQUESTS.inc(method=method, route=route, status=str(status_code))
+            if totals[0]:
+                DB_QUERIES.inc(totals[0], route=route)
+                DB_QUERY_SECONDS.inc(totals[1], route=route)
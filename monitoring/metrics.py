@@ -0,0 +1,361 @@
+"""Metrics rendered in the Prometheus text exposition format.
+
+Updates are lock-free: each thread writes to its own shard of a metric (a
+dict no other thread mutates) and a scrape sums the shards. The event loop
+and the threadpool workers never contend, and no increment is lost to a
+concurrent read-modify-write.
+
+By default every worker reports only its own numbers. With
+METRICS_MULTIPROC_DIR set, workers also write a snapshot of their metrics to
+``<dir>/<pid>.json`` every METRICS_FLUSH_SECONDS, and /metrics in any worker
+merges all snapshots: counters and histograms are summed (including those of
+workers that have exited), gauges of live workers are combined according to
+their ``multiprocess_mode``. Clear the directory before starting the workers.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config.settings import settings
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# How gauges of several workers combine: "all" keeps one series per pid
+GAUGE_MODES = ("all", "sum", "max", "min")
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Dict[LabelValues, Any]] = []
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if not self.labelnames:
+            return ()
+        return tuple([str(labels[name]) for name in self.labelnames])
+
+    def _shard(self) -> Dict[LabelValues, Any]:
+        """This thread's values; only this thread ever writes to it."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            self._shards.append(values)
+            return values
+
+    def value(self, **labels: str) -> float:
+        key = self._key(labels)
+        return sum(shard.get(key, 0.0) for shard in self._shards)
+
+    def reset(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        """Values per label set, summed over the thread shards."""
+        merged: Dict[LabelValues, Any] = {}
+        for shard in list(self._shards):
+            for key, value in shard.copy().items():
+                merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        multiprocess_mode: str = "all",
+    ):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in GAUGE_MODES:
+            raise ValueError(f"multiprocess_mode must be one of {GAUGE_MODES}")
+        self.multiprocess_mode = multiprocess_mode
+        # set() stores a base; inc()/dec() add per-thread deltas to it
+        self._base: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        deltas = sum(shard.get(key, 0.0) for shard in self._shards)
+        self._base[key] = value - deltas
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._base.get(self._key(labels), 0.0) + super().value(**labels)
+
+    def reset(self) -> None:
+        super().reset()
+        self._base.clear()
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        merged = super().collect()
+        for key, value in self._base.copy().items():
+            merged[key] = merged.get(key, 0.0) + value
+        return merged
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        # Per-bucket counts (the last one is +Inf), then the sum
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0.0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, **labels: str) -> float:
+        key = self._key(labels)
+        return sum(sum(shard[key][:-1]) for shard in self._shards if key in shard)
+
+    def total(self, **labels: str) -> float:
+        key = self._key(labels)
+        return sum(shard[key][-1] for shard in self._shards if key in shard)
+
+    value = count
+
+    def collect(self) -> Dict[LabelValues, Any]:
+        merged: Dict[LabelValues, Any] = {}
+        for shard in list(self._shards):
+            for key, state in shard.copy().items():
+                _add_into(merged, key, list(state))
+        return merged
+
+
+def _add_into(merged: Dict[LabelValues, Any], key: LabelValues, value: Any) -> None:
+    current = merged.get(key)
+    if current is None:
+        merged[key] = value
+    elif isinstance(value, list):
+        merged[key] = [a + b for a, b in zip(current, value)]
+    else:
+        merged[key] = current + value
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _render_family(
+    metric: Metric,
+    labelnames: Tuple[str, ...],
+    values: Dict[LabelValues, Any],
+    lines: List[str],
+) -> None:
+    name = metric.name
+    lines.append(f"# HELP {name} {metric.documentation}")
+    lines.append(f"# TYPE {name} {metric.type}")
+    for key, value in values.items():
+        if not isinstance(metric, Histogram):
+            lines.append(f"{name}{_format_labels(labelnames, key)} {value:g}")
+            continue
+        cumulative = 0.0
+        bounds = [f"{bound:g}" for bound in metric.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, value[:-1]):
+            cumulative += count
+            labels = _format_labels(labelnames + ("le",), key + (bound,))
+            lines.append(f"{name}_bucket{labels} {cumulative:g}")
+        labels = _format_labels(labelnames, key)
+        lines.append(f"{name}_sum{labels} {value[-1]:g}")
+        lines.append(f"{name}_count{labels} {cumulative:g}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kw):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, documentation, labelnames, **kw)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        multiprocess_mode: str = "all",
+    ) -> Gauge:
+        return self._get_or_create(
+            Gauge,
+            name,
+            documentation,
+            labelnames,
+            multiprocess_mode=multiprocess_mode,
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            _render_family(metric, metric.labelnames, metric.collect(), lines)
+        return "\n".join(lines) + "\n"
+
+    # Multi-process mode
+
+    def write_snapshot(self, directory: str) -> None:
+        """Save this process's metrics for the other workers to merge."""
+        snapshot = {
+            "pid": os.getpid(),
+            "metrics": {
+                name: [[list(key), value] for key, value in metric.collect().items()]
+                for name, metric in self._metrics.items()
+            },
+        }
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as out:
+            json.dump(snapshot, out)
+        os.replace(temporary, path)
+
+    def render_multiprocess(self, directory: str) -> str:
+        """Metrics of every worker that wrote a snapshot to ``directory``."""
+        self.write_snapshot(directory)
+        merged: Dict[str, Dict[LabelValues, Any]] = {name: {} for name in self._metrics}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as source:
+                    snapshot = json.load(source)
+            except (OSError, ValueError):
+                continue
+            pid = snapshot["pid"]
+            alive: Optional[bool] = None
+            for name, series in snapshot["metrics"].items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                if isinstance(metric, Gauge):
+                    # A gauge from an exited worker no longer describes anything
+                    if alive is None:
+                        alive = _pid_alive(pid)
+                    if not alive:
+                        continue
+                for key, value in series:
+                    self._merge(metric, merged[name], tuple(key), value, pid)
+
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            labelnames = metric.labelnames
+            if isinstance(metric, Gauge) and metric.multiprocess_mode == "all":
+                labelnames += ("pid",)
+            _render_family(metric, labelnames, merged[name], lines)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _merge(
+        metric: Metric,
+        merged: Dict[LabelValues, Any],
+        key: LabelValues,
+        value: Any,
+        pid: int,
+    ) -> None:
+        if not isinstance(metric, Gauge):
+            _add_into(merged, key, value)
+            return
+        mode = metric.multiprocess_mode
+        if mode == "all":
+            merged[key + (str(pid),)] = value
+        elif mode == "sum" or key not in merged:
+            merged[key] = merged.get(key, 0.0) + value
+        elif mode == "max":
+            merged[key] = max(merged[key], value)
+        else:
+            merged[key] = min(merged[key], value)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def render() -> str:
+    if settings.METRICS_MULTIPROC_DIR:
+        return REGISTRY.render_multiprocess(settings.METRICS_MULTIPROC_DIR)
+    return REGISTRY.render()
+
+
+async def run_snapshot_writer(directory: str, interval: float) -> None:
+    """Write this worker's snapshot every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        REGISTRY.write_snapshot(directory)
@@ -0,0 +1,218 @@
+"""Sampled per-request SQL profiling.
+
+With SQL_PROFILE_SAMPLE_RATE above zero, that fraction of requests is
+profiled. Every statement such a request runs is counted and timed under its
+SQL text, which SQLAlchemy renders with placeholders, so the same query with
+different parameters is one entry. A statement run
+SQL_REPEATED_STATEMENT_THRESHOLD times or more in one request is logged as a
+likely N+1 pattern. Profiled responses carry a ``Server-Timing`` header that
+splits the time to the response headers into ``db``, ``serialize`` and
+``app`` (everything else), which browser developer tools show per request.
+
+SQL_SLOW_QUERY_MS applies to every statement, profiled or not. Log lines are
+``event key=value ...`` and carry the same fields as ``extra`` attributes for
+JSON log formatters. Requests that are not sampled pay one random() call.
+"""
+
+import json
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config.settings import settings
+from monitoring.http import route_template
+from monitoring.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+# Logged statements are cut to this many characters
+MAX_STATEMENT_LENGTH = 2000
+
+REPEATED_STATEMENTS = counter(
+    "http_repeated_statements_total",
+    "Statements a profiled request ran SQL_REPEATED_STATEMENT_THRESHOLD "
+    "times or more (likely N+1 queries)",
+    ("route",),
+)
+SLOW_QUERIES = counter(
+    "db_slow_queries_total", "Statements slower than SQL_SLOW_QUERY_MS"
+)
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists vary in length with their parameters: IN (?, ?, ?)
+_PARAMETER_LIST = re.compile(
+    r"\(\s*(\?|%\(\w+\)s|%s|\$\d+|:\w+)(\s*,\s*(\?|%\(\w+\)s|%s|\$\d+|:\w+))+\s*\)"
+)
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace and parameter lists normalized."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    return _PARAMETER_LIST.sub("(...)", shape)
+
+
+def log_event(name: str, **fields: Any) -> None:
+    message = " ".join(
+        [name]
+        + [
+            f"{key}={json.dumps(value) if isinstance(value, str) else value}"
+            for key, value in fields.items()
+        ]
+    )
+    logger.warning(message, extra=fields)
+
+
+class RequestProfile:
+    __slots__ = ("scope", "statements", "db_seconds", "serialize_seconds", "by_sql")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        # SQL text -> [executions, seconds]
+        self.by_sql: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        totals = self.by_sql.get(statement)
+        if totals is None:
+            self.by_sql[statement] = [1, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int, float]]:
+        """``(shape, executions, seconds)`` of statements run ``threshold``+ times."""
+        shapes: Dict[str, List[float]] = {}
+        for statement, (count, seconds) in self.by_sql.items():
+            totals = shapes.setdefault(statement_shape(statement), [0, 0.0])
+            totals[0] += count
+            totals[1] += seconds
+        return [
+            (shape, int(count), seconds)
+            for shape, (count, seconds) in shapes.items()
+            if count >= threshold
+        ]
+
+    def server_timing(self, elapsed: float) -> str:
+        app = max(elapsed - self.db_seconds - self.serialize_seconds, 0.0)
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} queries", '
+            f"serialize;dur={self.serialize_seconds * 1000:.1f}, "
+            f"app;dur={app * 1000:.1f}"
+        )
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def enabled() -> bool:
+    return settings.SQL_PROFILE_SAMPLE_RATE > 0 or settings.SQL_SLOW_QUERY_MS > 0
+
+
+@contextmanager
+def serializing() -> Iterator[None]:
+    """Count the enclosed work as serialization time of the profiled request."""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serialize_seconds += time.perf_counter() - started
+
+
+def _statement_started(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    context._profile_started = time.perf_counter()
+
+
+def _statement_finished(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    seconds = time.perf_counter() - context._profile_started
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+    slow_ms = settings.SQL_SLOW_QUERY_MS
+    if slow_ms and seconds * 1000 >= slow_ms:
+        SLOW_QUERIES.inc()
+        fields: Dict[str, Any] = {"duration_ms": round(seconds * 1000, 1)}
+        if profile is not None:
+            fields.update(
+                method=profile.scope["method"], route=route_template(profile.scope)
+            )
+        fields["statement"] = statement_shape(statement)[:MAX_STATEMENT_LENGTH]
+        log_event("slow_query", **fields)
+
+
+def profile_queries(engine: Engine) -> None:
+    """Time ``engine``'s statements for profiled requests and the slow-query log."""
+    event.listen(engine, "before_cursor_execute", _statement_started)
+    event.listen(engine, "after_cursor_execute", _statement_finished)
+
+
+def stop_profiling_queries(engine: Engine) -> None:
+    event.remove(engine, "before_cursor_execute", _statement_started)
+    event.remove(engine, "after_cursor_execute", _statement_finished)
+
+
+def report_repeated(profile: RequestProfile) -> None:
+    threshold = settings.SQL_REPEATED_STATEMENT_THRESHOLD
+    if profile.statements < threshold:
+        return
+    route = route_template(profile.scope)
+    for shape, count, seconds in profile.repeated(threshold):
+        REPEATED_STATEMENTS.inc(route=route)
+        log_event(
+            "repeated_query",
+            method=profile.scope["method"],
+            route=route,
+            count=count,
+            duration_ms=round(seconds * 1000, 1),
+            statement=shape[:MAX_STATEMENT_LENGTH],
+        )
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        rate = settings.SQL_PROFILE_SAMPLE_RATE
+        if scope["type"] != "http" or rate <= 0 or random.random() >= rate:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    profile.server_timing(time.perf_counter() - started),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            report_repeated(profile)
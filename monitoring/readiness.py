@@ -0,0 +1,101 @@
+"""Readiness state for ``GET /ready``, kept fresh by a background probe.
+
+The probe runs ``SELECT 1`` every DB_PROBE_INTERVAL_SECONDS through the same
+engine requests use, so /ready answers from memory: load balancers polling
+it add no database traffic and never queue behind a saturated pool.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.connection import async_engine, engine, run_db, session_scope
+from database.pool import pool_status
+from database import replicas
+from monitoring.metrics import gauge
+
+logger = logging.getLogger(__name__)
+
+PROBE_LATENCY = gauge(
+    "db_probe_latency_seconds",
+    "Round trip of the last readiness probe query",
+    multiprocess_mode="max",
+)
+PROBE_UP = gauge(
+    "db_probe_up",
+    "1 if the last readiness probe succeeded",
+    multiprocess_mode="min",
+)
+
+
+def _select_one(db: Session) -> None:
+    db.execute(text("SELECT 1"))
+
+
+class DatabaseProbe:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    async def check(self) -> None:
+        started = time.perf_counter()
+        try:
+            async with session_scope() as db:
+                await run_db(db, _select_one)
+        except Exception as exc:
+            logger.warning("Database readiness probe failed: %s", exc)
+            self.error = f"{type(exc).__name__}: {exc}"
+            PROBE_UP.set(0)
+        else:
+            self.error = None
+            self.latency_ms = (time.perf_counter() - started) * 1000
+            PROBE_LATENCY.set(self.latency_ms / 1000)
+            PROBE_UP.set(1)
+        self.checked_at = time.monotonic()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    def ready(self) -> bool:
+        # A probe loop that stopped reporting is as bad as a failed probe
+        return (
+            self.checked_at is not None
+            and self.error is None
+            and time.monotonic() - self.checked_at < 3 * self.interval
+        )
+
+    def status(self) -> Dict[str, Any]:
+        pools = {"sync": pool_status(engine)}
+        if async_engine is not None:
+            pools["async"] = pool_status(async_engine.sync_engine)
+        for replica in replicas.replica_set.replicas:
+            for replica_engine in replica.engines():
+                name = replica_engine.pool.logging_name or replica.name
+                pools[name] = pool_status(replica_engine)
+        status: Dict[str, Any] = {
+            "status": "ready" if self.ready() else "unavailable",
+            "database": {
+                "latency_ms": self.latency_ms,
+                "checked_seconds_ago": (
+                    None
+                    if self.checked_at is None
+                    else round(time.monotonic() - self.checked_at, 3)
+                ),
+                "error": self.error,
+            },
+            "pools": pools,
+        }
+        if replicas.replica_set:
+            # Reads fall back to the primary, so replicas do not gate readiness
+            status["replicas"] = replicas.replica_set.status()
+        return status
+
+
+database_probe = DatabaseProbe(settings.DB_PROBE_INTERVAL_SECONDS)
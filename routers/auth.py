@@ -1,11 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from database.connection import DBSession, get_db
 from database.models import User
 from schemas.user import UserSignup, UserSignin, TokenResponse
-from services.user_service import UserService
-from auth.dependencies import security, get_current_user, is_token_blacklisted
+from services.user_service import AsyncUserService, UserService
+from auth.dependencies import security, get_current_user
 from auth.jwt_handler import decode_token
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -14,21 +13,22 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 @router.post(
     "/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED
 )
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
-    if UserService.get_user_by_email(db, user_data.email):
+async def signup(user_data: UserSignup, db: DBSession = Depends(get_db)):
+    user = await AsyncUserService.create_user(db, user_data)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered"
         )
-
-    user = UserService.create_user(db, user_data)
     access_token, refresh_token = UserService.generate_tokens(user.id)
 
     return TokenResponse(access_token=access_token, refresh_token=refresh_token)
 
 
 @router.post("/signin", response_model=TokenResponse)
-async def signin(credentials: UserSignin, db: Session = Depends(get_db)):
-    user = UserService.authenticate_user(db, credentials.email, credentials.password)
+async def signin(credentials: UserSignin, db: DBSession = Depends(get_db)):
+    user = await AsyncUserService.authenticate_user(
+        db, credentials.email, credentials.password
+    )
 
     if not user:
         raise HTTPException(
@@ -43,11 +43,11 @@ async def signin(credentials: UserSignin, db: Session = Depends(get_db)):
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_tokens(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
     token = credentials.credentials
 
-    if is_token_blacklisted(token, db):
+    if await AsyncUserService.is_token_blacklisted(db, token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
         )
@@ -65,7 +65,7 @@ async def refresh_tokens(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
         )
-    UserService.blacklist_token(db, token, int(user_id))
+    await AsyncUserService.blacklist_token(db, token, int(user_id))
     access_token, refresh_token = UserService.generate_tokens(int(user_id))
 
     return TokenResponse(access_token=access_token, refresh_token=refresh_token)
@@ -75,9 +75,9 @@ async def refresh_tokens(
 async def logout(
     current_user: User = Depends(get_current_user),
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
     token = credentials.credentials
-    UserService.blacklist_token(db, token, current_user.id)
+    await AsyncUserService.blacklist_token(db, token, current_user.id)
 
     return {"message": "Successfully logged out"}
@@ -1,71 +1,401 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-from database.connection import get_db
+from datetime import datetime
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+    Query,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Row
+from typing import (
+    Any,
+    AsyncIterator,
+    List,
+    Literal,
+    NoReturn,
+    Optional,
+    Union,
+    cast,
+)
+from config.settings import settings
+from database.connection import DBSession, get_db
 from database.models import User
-from schemas.blog import BlogCreate, BlogUpdate, BlogResponse
-from services.blog_service import BlogService
+from database.replicas import get_read_db
+from schemas.blog import (
+    BlogBulkResult,
+    BlogCreate,
+    BlogFields,
+    BlogUpdate,
+    BlogResponse,
+    BlogRow,
+    BlogSearchResult,
+    BlogSummary,
+    CategoryCount,
+)
+from services.blog_service import AsyncBlogService, BlogService
+from services.conditional import Version, etag_for_body, validator_headers
+from services.pagination import (
+    Cursor,
+    SearchCursor,
+    decode_cursor,
+    decode_search_cursor,
+    encode_search_cursor,
+    next_cursor,
+)
+from services.response_cache import (
+    CATEGORIES_TAG,
+    RECENT_TAG,
+    CachedResponse,
+    blog_tag,
+    category_tag,
+    response_cache,
+)
 from auth.dependencies import get_current_user
+from monitoring.profiler import serializing
 
 router = APIRouter(prefix="/api/blogs", tags=["Blogs"])
 
 SKIP_DESCRIPTION = "Number of records to skip"
 LIMIT_DESCRIPTION = "Number of records to return"
+CURSOR_DESCRIPTION = "Opaque token from the X-Next-Cursor header of the previous page"
 BLOG_NOT_FOUND_MSG = "Blog post not found"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_ESTIMATE_HEADER = "X-Total-Count-Estimate"
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. id,title,excerpt"
+VIEW_DESCRIPTION = "full: complete posts; summary: posts with an excerpt, no content"
+FULL_FIELDS = list(BlogResponse.model_fields)
+SUMMARY_FIELDS = list(BlogSummary.model_fields)
+# Documented shape of list pages; the body is serialized by render_page
+BlogListResponse = Union[List[BlogResponse], List[BlogSummary], List[BlogFields]]
+
+# Built once: compiling the serializer is far costlier than using it
+blog_rows_adapter = TypeAdapter(List[BlogRow])
+blog_row_adapter = TypeAdapter(BlogRow)
+category_counts_adapter = TypeAdapter(List[CategoryCount])
+
+
+def parse_fields(
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    view: Literal["full", "summary"] = Query("full", description=VIEW_DESCRIPTION),
+) -> List[str]:
+    """Columns a list page should return."""
+    if fields is None:
+        return SUMMARY_FIELDS if view == "summary" else FULL_FIELDS
+    if view != "full":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either fields or view=summary",
+        )
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+    unknown = [name for name in names if name not in BlogFields.model_fields]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}",
+        )
+    return names
+
+
+def render_page(
+    rows: List[Row],
+    limit: int,
+    list_tag: str,
+    fields: List[str],
+    total: Optional[int] = None,
+) -> CachedResponse:
+    """Body, validators and cache tags for a page of column rows."""
+    # Rows lead with (id, created_at, updated_at); see BlogService._row_query
+    headers = validator_headers(row._tuple()[:3] for row in rows)
+    token = next_cursor(rows, limit)
+    if token:
+        headers[NEXT_CURSOR_HEADER] = token
+    if total is not None:
+        headers[TOTAL_ESTIMATE_HEADER] = str(total)
+    return CachedResponse(
+        serialize_rows(rows, fields),
+        headers,
+        (list_tag, *(blog_tag(row[0]) for row in rows)),
+    )
+
+
+def serialize_rows(rows: List[Row], fields: List[str]) -> bytes:
+    """JSON array of ``fields`` from each column row, in one serializer call.
+
+    The rows come straight from typed columns, so they are dumped through
+    the BlogRow serializer without building or validating a model per post.
+    Columns are picked by position: named access on a Row costs several
+    times more than the serialization itself.
+    """
+    positions = [rows[0]._fields.index(name) for name in fields] if rows else []
+    with serializing():
+        return blog_rows_adapter.dump_json(
+            [
+                cast(BlogRow, dict(zip(fields, [row[i] for i in positions])))
+                for row in rows
+            ]
+        )
+
+
+async def estimate_total(db: DBSession, category: Optional[str]) -> Optional[int]:
+    """Approximate number of posts in a list, if BLOG_LIST_TOTAL_ESTIMATE is on."""
+    if not settings.BLOG_LIST_TOTAL_ESTIMATE:
+        return None
+    return await AsyncBlogService.estimate_total(db, category)
+
+
+def parse_cursor(
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+) -> Optional[Cursor]:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+def parse_search_cursor(
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+) -> Optional[SearchCursor]:
+    if cursor is None:
+        return None
+    try:
+        return decode_search_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
 
 
 @router.post("", response_model=BlogResponse, status_code=status.HTTP_201_CREATED)
 async def create_blog(
     blog_data: BlogCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
-    blog = BlogService.create_blog(db, blog_data, current_user.id)
-    return blog
+    blog = await AsyncBlogService.create_blog(db, blog_data, current_user.id)
+    return blog._asdict()
 
 
-@router.get("/search", response_model=List[BlogResponse])
+@router.post(
+    "/bulk", response_model=BlogBulkResult, status_code=status.HTTP_201_CREATED
+)
+async def create_blogs_bulk(
+    response: Response,
+    items: List[Any] = Body(
+        ...,
+        min_length=1,
+        max_length=settings.BULK_CREATE_MAX_ITEMS,
+        description="BlogCreate objects; invalid ones are reported, not created",
+    ),
+    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_db),
+):
+    """Create the valid items: 201 if all were, 207 with the rejected items
+    listed if only some were, and 422 with the rejections if none were."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append(BlogCreate.model_validate(item))
+        except ValidationError as exc:
+            errors.append(
+                {
+                    "index": index,
+                    "errors": exc.errors(include_url=False, include_context=False),
+                }
+            )
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors
+        )
+    rows = await AsyncBlogService.create_blogs(db, valid, current_user.id, FULL_FIELDS)
+    if errors:
+        response.status_code = status.HTTP_207_MULTI_STATUS
+    return {"created": [row._asdict() for row in rows], "errors": errors}
+
+
+@router.get("/search", response_model=List[BlogSearchResult])
 async def search_blogs(
     q: str = Query(..., min_length=1, description="Search query"),
     skip: int = Query(0, ge=0, description=SKIP_DESCRIPTION),
     limit: int = Query(10, ge=1, le=100, description=LIMIT_DESCRIPTION),
-    db: Session = Depends(get_db),
+    cursor: Optional[SearchCursor] = Depends(parse_search_cursor),
+    highlight: bool = Query(False, description="Include highlighted snippets"),
+    db: DBSession = Depends(get_read_db),
+):
+    hits = await AsyncBlogService.search(db, q, skip, limit, cursor, highlight)
+    headers = {}
+    if len(hits) == limit:
+        last = hits[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_search_cursor(last.score, last.blog.id)
+    with serializing():
+        body = blog_rows_adapter.dump_json(
+            [
+                cast(
+                    BlogRow,
+                    {
+                        **{name: getattr(hit.blog, name) for name in FULL_FIELDS},
+                        "snippet": hit.snippet,
+                    },
+                )
+                for hit in hits
+            ]
+        )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_blogs(
+    category: Optional[str] = Query(None, description="Only posts in this category"),
+    updated_since: Optional[datetime] = Query(
+        None, description="Only posts updated at or after this time"
+    ),
+    updated_before: Optional[datetime] = Query(
+        None, description="Only posts updated before this time"
+    ),
+    after_id: Optional[int] = Query(
+        None, ge=0, description="Resume after this id (the last line received)"
+    ),
+    current_user: User = Depends(get_current_user),
+    db: DBSession = Depends(get_read_db),
 ):
-    blogs = BlogService.search_blogs(db, q, skip, limit)
-    return blogs
+    """Stream every matching post as newline-delimited JSON, in id order."""
+    query = BlogService.export_query(
+        FULL_FIELDS, category, updated_since, updated_before, after_id
+    )
+
+    async def lines() -> AsyncIterator[bytes]:
+        batches = AsyncBlogService.stream_export(db, query, settings.EXPORT_BATCH_SIZE)
+        async for batch in batches:
+            yield b"".join(
+                blog_row_adapter.dump_json(cast(BlogRow, dict(zip(FULL_FIELDS, row))))
+                + b"\n"
+                for row in batch
+            )
 
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
-@router.get("", response_model=List[BlogResponse])
+
+@router.get("/categories", response_model=List[CategoryCount])
+async def list_categories(request: Request, db: DBSession = Depends(get_read_db)):
+    """Categories with their number of posts, most used first"""
+
+    async def render() -> CachedResponse:
+        rows = await AsyncBlogService.get_category_counts(db)
+        with serializing():
+            body = category_counts_adapter.dump_json(
+                [
+                    CategoryCount(category=category, posts=posts)
+                    for category, posts in rows
+                ]
+            )
+        return CachedResponse(body, {"ETag": etag_for_body(body)}, (CATEGORIES_TAG,))
+
+    return await response_cache.serve(request, "list_categories", render)
+
+
+@router.get("", response_model=BlogListResponse)
 async def list_blogs(
+    request: Request,
     skip: int = Query(0, ge=0, description=SKIP_DESCRIPTION),
     limit: int = Query(10, ge=1, le=100, description=LIMIT_DESCRIPTION),
-    db: Session = Depends(get_db),
+    cursor: Optional[Cursor] = Depends(parse_cursor),
+    fields: List[str] = Depends(parse_fields),
+    db: DBSession = Depends(get_read_db),
 ):
-    blogs = BlogService.get_recent_blogs(db, skip, limit)
-    return blogs
+    async def render() -> CachedResponse:
+        rows = await AsyncBlogService.get_page_rows(
+            db, fields, None, skip, limit, cursor
+        )
+        total = await estimate_total(db, None)
+        return render_page(rows, limit, RECENT_TAG, fields, total)
+
+    async def validate() -> dict:
+        return validator_headers(
+            await AsyncBlogService.get_page_versions(db, None, skip, limit, cursor)
+        )
+
+    return await response_cache.serve(request, "list_blogs", render, validate)
 
 
-@router.get("/category/{category}", response_model=List[BlogResponse])
+@router.get("/category/{category}", response_model=BlogListResponse)
 async def list_blogs_by_category(
     category: str,
+    request: Request,
     skip: int = Query(0, ge=0, description=SKIP_DESCRIPTION),
     limit: int = Query(10, ge=1, le=100, description=LIMIT_DESCRIPTION),
-    db: Session = Depends(get_db),
+    cursor: Optional[Cursor] = Depends(parse_cursor),
+    fields: List[str] = Depends(parse_fields),
+    db: DBSession = Depends(get_read_db),
 ):
-    blogs = BlogService.get_blogs_by_category(db, category, skip, limit)
-    return blogs
+    async def render() -> CachedResponse:
+        rows = await AsyncBlogService.get_page_rows(
+            db, fields, category, skip, limit, cursor
+        )
+        total = await estimate_total(db, category)
+        return render_page(rows, limit, category_tag(category), fields, total)
+
+    async def validate() -> dict:
+        return validator_headers(
+            await AsyncBlogService.get_page_versions(db, category, skip, limit, cursor)
+        )
+
+    return await response_cache.serve(
+        request, "list_blogs_by_category", render, validate
+    )
 
 
 @router.get("/{blog_id}", response_model=BlogResponse)
-async def get_blog(blog_id: int, db: Session = Depends(get_db)):
+async def get_blog(
+    blog_id: int, request: Request, db: DBSession = Depends(get_read_db)
+):
     """Get a specific blog post"""
-    blog = BlogService.get_blog_by_id(db, blog_id)
-    if not blog:
+
+    async def render() -> CachedResponse:
+        blog = await AsyncBlogService.get_blog_by_id(db, blog_id)
+        if not blog:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=BLOG_NOT_FOUND_MSG,
+            )
+        with serializing():
+            body = BlogResponse.model_validate(blog).model_dump_json().encode()
+        headers = validator_headers(
+            [Version(blog.id, blog.created_at, blog.updated_at)], blog.updated_at
+        )
+        return CachedResponse(body, headers, (blog_tag(blog.id),))
+
+    async def validate() -> Optional[dict]:
+        version = await AsyncBlogService.get_blog_version(db, blog_id)
+        if version is None:
+            return None
+        return validator_headers([version], version.updated_at)
+
+    return await response_cache.serve(request, "get_blog", render, validate)
+
+
+async def refuse_write(db: DBSession, blog_id: int, action: str) -> NoReturn:
+    """404 or 403 for a conditional write that matched no post."""
+    if await AsyncBlogService.get_blog_author(db, blog_id) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=BLOG_NOT_FOUND_MSG,
         )
-    return blog
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this blog post",
+    )
 
 
 @router.put("/{blog_id}", response_model=BlogResponse)
@@ -73,42 +403,20 @@ async def update_blog(
     blog_id: int,
     blog_data: BlogUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
-    blog = BlogService.get_blog_by_id(db, blog_id)
-    if not blog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=BLOG_NOT_FOUND_MSG,
-        )
-
-    if blog.author_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this blog post",
-        )
-
-    updated_blog = BlogService.update_blog(db, blog, blog_data)
-    return updated_blog
+    blog = await AsyncBlogService.update_blog(db, blog_id, current_user.id, blog_data)
+    if blog is None:
+        await refuse_write(db, blog_id, "update")
+    return blog._asdict()
 
 
 @router.delete("/{blog_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_blog(
     blog_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
-    blog = BlogService.get_blog_by_id(db, blog_id)
-    if not blog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=BLOG_NOT_FOUND_MSG,
-        )
-
-    if blog.author_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this blog post",
-        )
-    BlogService.delete_blog(db, blog)
+    if not await AsyncBlogService.delete_blog(db, blog_id, current_user.id):
+        await refuse_write(db, blog_id, "delete")
     return None
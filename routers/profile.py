@@ -1,24 +1,34 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from database.connection import DBSession, get_db
 from database.models import User
 from schemas.user import UserResponse, UserProfileUpdate
-from services.user_service import UserService
+from services.user_service import AsyncUserService
+from services.conditional import conditional_response, etag_for_body
 from auth.dependencies import get_current_user
+from monitoring.profiler import serializing
 
 router = APIRouter(prefix="/api/profile", tags=["Profile"])
 
 
 @router.get("", response_model=UserResponse)
-async def get_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+async def get_profile(request: Request, current_user: User = Depends(get_current_user)):
+    # users has no modification time, so the ETag hashes the (small) body
+    with serializing():
+        body = UserResponse.model_validate(current_user).model_dump_json().encode()
+    headers = {"ETag": etag_for_body(body), "Cache-Control": "private, no-cache"}
+    return conditional_response(request, body, headers)
 
 
 @router.put("", response_model=UserResponse)
 async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ):
-    updated_user = UserService.update_profile(db, current_user, profile_data)
+    updated_user = await AsyncUserService.update_profile(db, current_user, profile_data)
+    if updated_user is None:
+        # Same answer get_current_user gives once the cached principal is gone
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
     return updated_user
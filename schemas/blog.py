@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
 
 
@@ -26,3 +27,73 @@ class BlogResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BlogSummary(BaseModel):
+    id: int
+    title: str
+    excerpt: str = Field(..., description="First 200 characters of the content")
+    category: str
+    author_id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class BlogFields(BaseModel):
+    """A post restricted to the fields named in ``fields=``."""
+
+    id: Optional[int] = None
+    title: Optional[str] = None
+    content: Optional[str] = None
+    excerpt: Optional[str] = None
+    category: Optional[str] = None
+    author_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class BlogBulkError(BaseModel):
+    index: int = Field(..., description="Position of the rejected item in the request")
+    errors: List[Dict[str, Any]]
+
+
+class BlogBulkResult(BaseModel):
+    """Posts created by a bulk request, in request order, and the items rejected."""
+
+    created: List[BlogResponse]
+    errors: List[BlogBulkError]
+
+
+class CategoryCount(BaseModel):
+    category: str
+    posts: int = Field(..., description="Number of posts in the category")
+
+
+class BlogSearchResult(BlogResponse):
+    snippet: Optional[str] = Field(
+        None,
+        description="Matching excerpt as escaped HTML, with the matches in <mark>",
+    )
+
+
+class BlogRow(TypedDict, total=False):
+    """Serialization-only shape of a post read straight from the database.
+
+    List routes dump rows through a TypeAdapter of this type in one batch,
+    skipping per-object model validation; keys not present are omitted, so
+    the same type covers full posts, summaries, sparse fieldsets and search
+    results (field order matches those models).
+    """
+
+    id: int
+    title: str
+    content: str
+    excerpt: str
+    category: str
+    author_id: int
+    created_at: datetime
+    updated_at: datetime
+    snippet: Optional[str]
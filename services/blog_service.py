@@ -1,86 +1,475 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from database.models import Blog
+from sqlalchemy import Row, Select, delete, insert, select, tuple_, update
+from starlette.concurrency import iterate_in_threadpool
+from database import category_stats
+from database.connection import DBSession, run_db
+from database.models import Blog, make_excerpt
 from schemas.blog import BlogCreate, BlogUpdate
-from typing import List, Optional
+from services.conditional import Version
+from services.pagination import Cursor, SearchCursor
+from services.response_cache import (
+    CATEGORIES_TAG,
+    RECENT_TAG,
+    blog_tag,
+    category_tag,
+    response_cache,
+)
+from services.search_index import index_blog, unindex_blog
+from services.search_service import SearchHit, get_search_backend
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, Tuple
+from collections import Counter
 from datetime import datetime, timezone
 
 
+# Columns written rows are returned with, so no refresh SELECT is needed
+BLOG_COLUMNS = tuple(column.key for column in Blog.__table__.columns)
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Response cache tags a committed write invalidates
+Tags = Tuple[str, ...]
+
+
 class BlogService:
+    """Blog reads and writes on a sync session.
+
+    Each write has a ``write_*`` form that commits and returns the cache tags
+    to invalidate along with its result. The plain form invalidates them
+    inline; AsyncBlogService awaits the invalidation after the database work
+    instead, since a Redis cache would block the event loop inside
+    ``run_db``.
+    """
+
+    @staticmethod
+    def create_blog(db: Session, blog_data: BlogCreate, author_id: int) -> Row:
+        """Insert one post with ``INSERT ... RETURNING``; its row of BLOG_COLUMNS."""
+        (row,) = BlogService.create_blogs(db, [blog_data], author_id, BLOG_COLUMNS)
+        return row
+
     @staticmethod
-    def create_blog(db: Session, blog_data: BlogCreate, author_id: int) -> Blog:
-        blog = Blog(
-            title=blog_data.title,
-            content=blog_data.content,
-            category=blog_data.category,
-            author_id=author_id,
+    def create_blogs(
+        db: Session,
+        items: Sequence[BlogCreate],
+        author_id: int,
+        fields: Sequence[str],
+    ) -> List[Row]:
+        rows, tags = BlogService.write_blogs(db, items, author_id, fields)
+        response_cache.invalidate(*tags)
+        return rows
+
+    @staticmethod
+    def write_blogs(
+        db: Session,
+        items: Sequence[BlogCreate],
+        author_id: int,
+        fields: Sequence[str],
+    ) -> Tuple[List[Row], Tags]:
+        """Insert ``items`` in one transaction; rows of ``fields``, in order.
+
+        ``fields`` must start with id and include title, content and category
+        for the search index. The rows go out as multi-row ``INSERT ...
+        RETURNING`` statements, so there is no per-post flush or refresh
+        round trip. Bulk inserts skip ORM validators, so the excerpt is
+        filled in here.
+        """
+        if not items:
+            return [], ()
+        # RETURNING order is unspecified, but ids are drawn in VALUES order.
+        # (sort_by_parameter_order would fall back to one INSERT per row on
+        # SQLite, which has no way to tag the rows.)
+        rows = list(
+            db.execute(
+                insert(Blog).returning(*(getattr(Blog, name) for name in fields)),
+                [
+                    {
+                        "title": item.title,
+                        "content": item.content,
+                        "excerpt": make_excerpt(item.content),
+                        "category": item.category,
+                        "author_id": author_id,
+                    }
+                    for item in items
+                ],
+            ).all()
         )
-        db.add(blog)
+        rows.sort(key=lambda row: row[0])
+        posts = Counter(item.category for item in items)
+        category_stats.adjust(db, posts)
         db.commit()
-        db.refresh(blog)
-        return blog
+        for row in rows:
+            index_blog(row)
+        return rows, (RECENT_TAG, CATEGORIES_TAG, *map(category_tag, posts))
 
     @staticmethod
     def get_blog_by_id(db: Session, blog_id: int) -> Optional[Blog]:
         return db.query(Blog).filter(Blog.id == blog_id).first()
 
     @staticmethod
-    def get_recent_blogs(db: Session, skip: int = 0, limit: int = 10) -> List[Blog]:
+    def get_blog_version(db: Session, blog_id: int) -> Optional[Version]:
+        """``(id, created_at, updated_at)`` of a post, without its content."""
+        row = db.execute(
+            select(Blog.id, Blog.created_at, Blog.updated_at).where(Blog.id == blog_id)
+        ).first()
+        return None if row is None else Version(*row)
+
+    @staticmethod
+    def _paginate(query, skip: int, limit: int, cursor: Optional[Cursor]):
+        # Newest first with id as tie-breaker; a cursor turns the page into an
+        # index range scan on (created_at, id) instead of an OFFSET walk.
+        if cursor is not None:
+            query = query.filter(tuple_(Blog.created_at, Blog.id) < cursor)
         return (
-            db.query(Blog)
-            .order_by(Blog.created_at.desc())
+            query.order_by(Blog.created_at.desc(), Blog.id.desc())
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    @staticmethod
+    def _row_query(db: Session, fields: Sequence[str]):
+        """Rows of ``id, created_at, updated_at`` then ``fields``."""
+        names = dict.fromkeys(["id", "created_at", "updated_at", *fields])
+        return db.query(*(getattr(Blog, name) for name in names))
+
+    @staticmethod
+    def get_recent_blogs(
+        db: Session,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Blog]:
+        return BlogService._paginate(db.query(Blog), skip, limit, cursor)
+
     @staticmethod
     def get_blogs_by_category(
-        db: Session, category: str, skip: int = 0, limit: int = 10
+        db: Session,
+        category: str,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
     ) -> List[Blog]:
-        return (
-            db.query(Blog)
-            .filter(Blog.category == category)
-            .order_by(Blog.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = db.query(Blog).filter(Blog.category == category)
+        return BlogService._paginate(query, skip, limit, cursor)
+
+    @staticmethod
+    def get_page_rows(
+        db: Session,
+        fields: Sequence[str],
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Row]:
+        """Column rows of a recent (or category) page; see ``_row_query``."""
+        query = BlogService._row_query(db, fields)
+        if category is not None:
+            query = query.filter(Blog.category == category)
+        return BlogService._paginate(query, skip, limit, cursor)
+
+    @staticmethod
+    def get_page_versions(
+        db: Session,
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Version]:
+        """Versions of the posts on a recent (or category) page, from the index."""
+        query = BlogService._row_query(db, ())
+        if category is not None:
+            query = query.filter(Blog.category == category)
+        return BlogService._paginate(query, skip, limit, cursor)
+
+    @staticmethod
+    def get_category_counts(db: Session) -> Sequence[Row[Tuple[str, int]]]:
+        return category_stats.counts(db)
+
+    @staticmethod
+    def estimate_total(db: Session, category: Optional[str] = None) -> int:
+        """Posts in the list, from the maintained category counts."""
+        return category_stats.total(db, category)
+
+    @staticmethod
+    def export_query(
+        fields: Sequence[str],
+        category: Optional[str] = None,
+        updated_since: Optional[datetime] = None,
+        updated_before: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+    ) -> Select:
+        """Rows of ``fields`` for an export, in id order so it can resume."""
+        query = select(*(getattr(Blog, name) for name in fields))
+        if category is not None:
+            query = query.where(Blog.category == category)
+        if updated_since is not None:
+            query = query.where(Blog.updated_at >= _naive_utc(updated_since))
+        if updated_before is not None:
+            query = query.where(Blog.updated_at < _naive_utc(updated_before))
+        if after_id is not None:
+            query = query.where(Blog.id > after_id)
+        return query.order_by(Blog.id)
+
+    @staticmethod
+    def stream_export(
+        db: Session, query: Select, batch_size: int
+    ) -> Iterator[Sequence[Tuple]]:
+        """Batches of export rows read through a server-side cursor.
+
+        ``yield_per`` keeps only ``batch_size`` rows in memory at a time (and
+        turns on ``stream_results`` for drivers that buffer by default).
+        """
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        try:
+            for batch in result.partitions():
+                yield [tuple(row) for row in batch]
+        finally:
+            result.close()
+
+    @staticmethod
+    def search(
+        db: Session,
+        query: str,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[SearchCursor] = None,
+        highlight: bool = False,
+    ) -> List[SearchHit]:
+        backend = get_search_backend(db)
+        return backend.search(db, query, skip, limit, cursor, highlight)
 
     @staticmethod
     def search_blogs(
         db: Session, query: str, skip: int = 0, limit: int = 10
     ) -> List[Blog]:
-        search_pattern = f"%{query}%"
-
-        blogs = (
-            db.query(Blog)
-            .filter(
-                or_(
-                    func.lower(Blog.title).like(func.lower(search_pattern)),
-                    func.lower(Blog.content).like(func.lower(search_pattern)),
-                    func.lower(Blog.category).like(func.lower(search_pattern)),
-                )
-            )
-            .order_by(Blog.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return [hit.blog for hit in BlogService.search(db, query, skip, limit)]
+
+    @staticmethod
+    def get_blog_author(db: Session, blog_id: int) -> Optional[int]:
+        return db.scalar(select(Blog.author_id).where(Blog.id == blog_id))
 
-        return blogs
+    @staticmethod
+    def update_blog(
+        db: Session, blog_id: int, author_id: int, blog_data: BlogUpdate
+    ) -> Optional[Row]:
+        row, tags = BlogService.write_update(db, blog_id, author_id, blog_data)
+        response_cache.invalidate(*tags)
+        return row
 
     @staticmethod
-    def update_blog(db: Session, blog: Blog, blog_data: BlogUpdate) -> Blog:
-        update_data = blog_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(blog, field, value)
-        blog.updated_at = datetime.now(timezone.utc)
+    def write_update(
+        db: Session, blog_id: int, author_id: int, blog_data: BlogUpdate
+    ) -> Tuple[Optional[Row], Tags]:
+        """Update a post of ``author_id``; its new row, or None if none matched.
+
+        One conditional ``UPDATE ... WHERE id AND author_id RETURNING``
+        checks ownership and writes. RETURNING only reports new values, so
+        a category change first locks the row and reads the old category.
+        ``get_blog_author`` tells a missing post from someone else's.
+        """
+        values = blog_data.model_dump(exclude_unset=True)
+        if "content" in values:
+            # Core updates skip ORM validators
+            values["excerpt"] = make_excerpt(values["content"])
+        values["updated_at"] = datetime.now(timezone.utc)
+        owned = (Blog.id == blog_id, Blog.author_id == author_id)
+        old_category: Optional[str] = None
+        if "category" in values:
+            old_category = db.scalar(
+                select(Blog.category).where(*owned).with_for_update()
+            )
+            if old_category is None:
+                db.rollback()
+                return None, ()
+        row = db.execute(
+            update(Blog)
+            .where(*owned)
+            .values(values)
+            .returning(*(getattr(Blog, name) for name in BLOG_COLUMNS))
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            db.rollback()
+            return None, ()
+        tags: Tags = (blog_tag(blog_id),)
+        if old_category is not None and row.category != old_category:
+            category_stats.adjust(db, {old_category: -1, row.category: 1})
+            tags += (
+                CATEGORIES_TAG,
+                category_tag(old_category),
+                category_tag(row.category),
+            )
         db.commit()
-        db.refresh(blog)
-        return blog
+        index_blog(row)
+        return row, tags
+
+    @staticmethod
+    def delete_blog(db: Session, blog_id: int, author_id: int) -> bool:
+        tags = BlogService.write_delete(db, blog_id, author_id)
+        response_cache.invalidate(*tags)
+        return bool(tags)
 
     @staticmethod
-    def delete_blog(db: Session, blog: Blog) -> None:
-        db.delete(blog)
+    def write_delete(db: Session, blog_id: int, author_id: int) -> Tags:
+        """Delete a post of ``author_id`` with ``DELETE ... RETURNING``.
+
+        No tags means no post of ``author_id`` matched.
+        """
+        category = db.scalar(
+            delete(Blog)
+            .where(Blog.id == blog_id, Blog.author_id == author_id)
+            .returning(Blog.category)
+            .execution_options(synchronize_session=False)
+        )
+        if category is None:
+            db.rollback()
+            return ()
+        category_stats.adjust(db, {category: -1})
         db.commit()
+        unindex_blog(blog_id)
+        return (blog_tag(blog_id), RECENT_TAG, CATEGORIES_TAG, category_tag(category))
+
+
+class AsyncBlogService:
+    """Awaitable counterparts of BlogService for async route handlers."""
+
+    @staticmethod
+    async def create_blog(db: DBSession, blog_data: BlogCreate, author_id: int) -> Row:
+        (row,) = await AsyncBlogService.create_blogs(
+            db, [blog_data], author_id, BLOG_COLUMNS
+        )
+        return row
+
+    @staticmethod
+    async def create_blogs(
+        db: DBSession,
+        items: Sequence[BlogCreate],
+        author_id: int,
+        fields: Sequence[str],
+    ) -> List[Row]:
+        rows, tags = await run_db(db, BlogService.write_blogs, items, author_id, fields)
+        await response_cache.invalidate_async(*tags)
+        return rows
+
+    @staticmethod
+    async def get_blog_by_id(db: DBSession, blog_id: int) -> Optional[Blog]:
+        return await run_db(db, BlogService.get_blog_by_id, blog_id)
+
+    @staticmethod
+    async def get_blog_version(db: DBSession, blog_id: int) -> Optional[Version]:
+        return await run_db(db, BlogService.get_blog_version, blog_id)
+
+    @staticmethod
+    async def get_page_versions(
+        db: DBSession,
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Version]:
+        return await run_db(
+            db, BlogService.get_page_versions, category, skip, limit, cursor
+        )
+
+    @staticmethod
+    async def get_recent_blogs(
+        db: DBSession,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Blog]:
+        return await run_db(db, BlogService.get_recent_blogs, skip, limit, cursor)
+
+    @staticmethod
+    async def get_blogs_by_category(
+        db: DBSession,
+        category: str,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Blog]:
+        return await run_db(
+            db, BlogService.get_blogs_by_category, category, skip, limit, cursor
+        )
+
+    @staticmethod
+    async def get_page_rows(
+        db: DBSession,
+        fields: Sequence[str],
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[Cursor] = None,
+    ) -> List[Row]:
+        return await run_db(
+            db, BlogService.get_page_rows, fields, category, skip, limit, cursor
+        )
+
+    @staticmethod
+    async def get_category_counts(db: DBSession) -> Sequence[Row[Tuple[str, int]]]:
+        return await run_db(db, BlogService.get_category_counts)
+
+    @staticmethod
+    async def estimate_total(db: DBSession, category: Optional[str] = None) -> int:
+        return await run_db(db, BlogService.estimate_total, category)
+
+    @staticmethod
+    async def stream_export(
+        db: DBSession, query: Select, batch_size: int
+    ) -> AsyncIterator[Sequence[Tuple]]:
+        if isinstance(db, AsyncSession):
+            result = await db.stream(query.execution_options(yield_per=batch_size))
+            try:
+                async for rows in result.partitions():
+                    yield [tuple(row) for row in rows]
+            finally:
+                await result.close()
+        else:
+            batches = BlogService.stream_export(db, query, batch_size)
+            async for batch in iterate_in_threadpool(batches):
+                yield batch
+
+    @staticmethod
+    async def search(
+        db: DBSession,
+        query: str,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[SearchCursor] = None,
+        highlight: bool = False,
+    ) -> List[SearchHit]:
+        return await run_db(
+            db, BlogService.search, query, skip, limit, cursor, highlight
+        )
+
+    @staticmethod
+    async def search_blogs(
+        db: DBSession, query: str, skip: int = 0, limit: int = 10
+    ) -> List[Blog]:
+        return await run_db(db, BlogService.search_blogs, query, skip, limit)
+
+    @staticmethod
+    async def get_blog_author(db: DBSession, blog_id: int) -> Optional[int]:
+        return await run_db(db, BlogService.get_blog_author, blog_id)
+
+    @staticmethod
+    async def update_blog(
+        db: DBSession, blog_id: int, author_id: int, blog_data: BlogUpdate
+    ) -> Optional[Row]:
+        row, tags = await run_db(
+            db, BlogService.write_update, blog_id, author_id, blog_data
+        )
+        await response_cache.invalidate_async(*tags)
+        return row
+
+    @staticmethod
+    async def delete_blog(db: DBSession, blog_id: int, author_id: int) -> bool:
+        tags = await run_db(db, BlogService.write_delete, blog_id, author_id)
+        await response_cache.invalidate_async(*tags)
+        return bool(tags)
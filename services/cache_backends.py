@@ -0,0 +1,256 @@
+"""Storage backends for the response cache.
+
+Both store opaque byte values under string keys with a TTL, plus a set of
+tags per entry so writes can drop every entry that mentions a blog or a
+category:
+
+* ``MemoryBackend`` is a per-worker LRU. Invalidation is immediate in the
+  worker that made the write; other workers keep serving their copy until the
+  TTL runs out.
+* ``RedisBackend`` is shared by all workers and talks the Redis protocol
+  (RESP) over a plain socket, so any Redis-compatible server works without an
+  extra client library. Each tag is a Redis set of the keys carrying it.
+  Invalidation runs as one Lua script, so no entry can be tagged between
+  reading a tag's members and deleting them.
+
+Both also record when they last invalidated anything (``invalidated_at``),
+which the cache uses to avoid storing pages read from a lagging replica.
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+
+# KEYS[1] takes the time in ARGV[1]; the other KEYS are tag sets, whose
+# members are deleted with them. Returns the entries removed. Member keys are
+# not declared in KEYS, so this needs a single Redis instance rather than a
+# cluster.
+INVALIDATE_SCRIPT = """
+redis.call('SET', KEYS[1], ARGV[1])
+local removed = 0
+for i = 2, #KEYS do
+  local tag = KEYS[i]
+  local members = redis.call('SMEMBERS', tag)
+  for first = 1, #members, 1000 do
+    local last = math.min(first + 999, #members)
+    removed = removed + redis.call('DEL', unpack(members, first, last))
+  end
+  redis.call('DEL', tag)
+end
+return removed
+"""
+
+
+class CacheBackendError(Exception):
+    """The cache store could not be reached or rejected a command."""
+
+
+class MemoryBackend:
+    name = "memory"
+    # Calls never block, so async routes may make them inline
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = (
+            OrderedDict()
+        )
+        self._tags: Dict[str, Set[str]] = {}
+        self._invalidated_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], ttl: float) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidated_at(self) -> Optional[float]:
+        return self._invalidated_at
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            self._invalidated_at = time.time()
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+
+class RespConnection:
+    """One blocking connection speaking RESP2, with pipelining."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+
+    @staticmethod
+    def encode(args: Tuple[Any, ...]) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheBackendError("Connection closed by cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return CacheBackendError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise CacheBackendError(f"Unexpected reply from cache server: {line!r}")
+
+    def pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        """Send every command in one write, then read the replies in order."""
+        self._sock.sendall(b"".join(self.encode(command) for command in commands))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, CacheBackendError):
+                raise reply
+        return replies
+
+    def close(self) -> None:
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class RedisBackend:
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "blogcache:", timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        # One connection per thread: calls come from the threadpool
+        self._local = threading.local()
+
+    def _connection(self) -> RespConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = RespConnection(self.host, self.port, self.timeout)
+            setup: List[Tuple[Any, ...]] = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", self.db))
+            if setup:
+                connection.pipeline(setup)
+            self._local.connection = connection
+        return connection
+
+    def _pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        try:
+            return self._connection().pipeline(commands)
+        except (OSError, CacheBackendError) as exc:
+            # Start from a fresh connection next time; replies may be out of step
+            connection = getattr(self._local, "connection", None)
+            if connection is not None:
+                connection.close()
+                self._local.connection = None
+            if isinstance(exc, CacheBackendError):
+                raise
+            raise CacheBackendError(str(exc)) from exc
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._pipeline([("GET", self.prefix + key)])[0]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str], ttl: float) -> None:
+        ttl_ms = max(1, int(ttl * 1000))
+        commands: List[Tuple[Any, ...]] = [
+            ("SET", self.prefix + key, value, "PX", ttl_ms)
+        ]
+        for tag in tags:
+            # A tag set lives as long as the newest entry that carries it
+            commands.append(("SADD", self._tag_key(tag), self.prefix + key))
+            commands.append(("PEXPIRE", self._tag_key(tag), ttl_ms))
+        self._pipeline(commands)
+
+    def invalidated_at(self) -> Optional[float]:
+        """Wall-clock time of the last invalidation by any worker."""
+        stamp = self._pipeline([("GET", self.prefix + "invalidated_at")])[0]
+        return None if stamp is None else float(stamp)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop the entries carrying any of ``tags``; the number removed."""
+        keys = [self.prefix + "invalidated_at", *map(self._tag_key, tags)]
+        return self._pipeline(
+            [("EVAL", INVALIDATE_SCRIPT, len(keys), *keys, repr(time.time()))]
+        )[0]
+
+    def clear(self) -> None:
+        cursor = b"0"
+        while True:
+            cursor, keys = self._pipeline(
+                [("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 1000)]
+            )[0]
+            if keys:
+                self._pipeline([("DEL", *keys)])
+            if cursor in (b"0", "0"):
+                return
@@ -0,0 +1,105 @@
+"""Validators (ETag / Last-Modified) and 304 handling for conditional GETs.
+
+Blog responses get strong ETags derived from the ``(id, created_at,
+updated_at)`` of every post they contain. Those columns fully determine the
+body (and the next-page cursor), and the routes can read them without the
+``content`` column to answer a revalidation. Single posts also carry
+Last-Modified. List pages do not, because removing a post changes a page
+without moving any timestamp forward.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Mapping, NamedTuple, Optional
+from fastapi import Request, Response, status
+
+
+class Version(NamedTuple):
+    """What a post's validators are derived from; rows of these columns fit."""
+
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+# Headers a 304 repeats from the full response
+VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+def _utc(moment: datetime) -> datetime:
+    # SQLite returns naive datetimes; they are stored in UTC
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+def etag_for_versions(versions: Iterable[Version]) -> str:
+    # One join and one hash per page: this runs on every list render.
+    # Timestamps are hashed exactly as the database returns them.
+    text = ";".join(
+        f"{blog_id}:{created_at.isoformat()}:{updated_at.isoformat()}"
+        for blog_id, created_at, updated_at in versions
+    )
+    return f'"{hashlib.blake2b(text.encode(), digest_size=12).hexdigest()}"'
+
+
+def etag_for_body(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def http_date(moment: datetime) -> str:
+    return format_datetime(_utc(moment).replace(microsecond=0), usegmt=True)
+
+
+def validator_headers(
+    versions: Iterable[Version], last_modified: Optional[datetime] = None
+) -> dict:
+    headers = {"ETag": etag_for_versions(versions)}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, headers: Mapping[str, str]) -> bool:
+    """Whether the client's copy, per If-None-Match / If-Modified-Since, is current."""
+    etag = headers.get("ETag")
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence and uses the weak comparison
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return etag is not None and ("*" in candidates or etag in candidates)
+
+    last_modified = headers.get("Last-Modified")
+    if_modified_since = request.headers.get("if-modified-since")
+    if last_modified is None or if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return parsedate_to_datetime(last_modified) <= since
+
+
+def not_modified(headers: Mapping[str, str]) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={name: headers[name] for name in VALIDATOR_HEADERS if name in headers},
+    )
+
+
+def conditional_response(
+    request: Request, body: bytes, headers: Mapping[str, str]
+) -> Response:
+    """A JSON response, or 304 when the client's copy still matches."""
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return Response(content=body, media_type="application/json", headers=dict(headers))
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Tuple, cast
+from sqlalchemy import insert, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from auth.revocation import revocation_filter
+from config.settings import settings
+from database import category_stats
+from database.connection import run_db, session_scope
+from database.models import MaintenanceRun
+from database.partitions import drop_expired_partitions, ensure_partitions
+from monitoring.metrics import counter, gauge
+from services import search_index
+from services.response_cache import (
+    CATEGORIES_TAG,
+    RECENT_TAG,
+    category_tag,
+    response_cache,
+)
+from services.user_service import PENDING_HASH_UPGRADES, UserService
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_ROWS = gauge(
+    "token_blacklist_rows",
+    "Rows in token_blacklist after the last prune",
+    multiprocess_mode="max",
+)
+PRUNE_DURATION = gauge(
+    "token_blacklist_prune_duration_seconds",
+    "Duration of the last prune run",
+    multiprocess_mode="max",
+)
+PRUNED_ROWS = counter(
+    "token_blacklist_pruned_rows_total", "Expired token_blacklist rows deleted"
+)
+DROPPED_PARTITIONS = counter(
+    "token_blacklist_dropped_partitions_total",
+    "Expired token_blacklist day partitions dropped",
+)
+CATEGORY_CORRECTIONS = counter(
+    "category_stats_corrections_total",
+    "Category post counts found wrong and fixed by reconciliation",
+)
+
+# A run is due once this share of its interval has passed, so timer jitter
+# in the worker that ran it last does not skip a cycle
+CLAIM_TOLERANCE = 0.9
+
+
+def claim_run(db: Session, job: str, interval: float) -> bool:
+    """Whether this worker should run ``job`` now, and if so record the run.
+
+    Every worker wakes up for the periodic jobs, but only one per interval
+    gets to run each: the conditional UPDATE of the job's maintenance_runs
+    row matches for the first worker only, since the others then see its
+    new ``last_run``.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    due = now - timedelta(seconds=interval * CLAIM_TOLERANCE)
+    result = cast(
+        CursorResult,
+        db.execute(
+            update(MaintenanceRun)
+            .where(MaintenanceRun.job == job, MaintenanceRun.last_run <= due)
+            .values(last_run=now)
+        ),
+    )
+    if result.rowcount:
+        db.commit()
+        return True
+    if db.get(MaintenanceRun, job) is not None:
+        db.rollback()
+        return False
+    try:
+        db.execute(insert(MaintenanceRun).values(job=job, last_run=now))
+        db.commit()
+    except IntegrityError:
+        # Another worker claimed the job's first run
+        db.rollback()
+        return False
+    return True
+
+
+def prune_token_blacklist(db: Session) -> int:
+    """Remove expired blacklist entries and record table size and duration."""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    if (
+        settings.TOKEN_BLACKLIST_PARTITIONED
+        and db.get_bind().dialect.name == "postgresql"
+    ):
+        connection = db.connection()
+        DROPPED_PARTITIONS.inc(drop_expired_partitions(connection, now.date()))
+        ensure_partitions(
+            connection, now.date(), settings.REFRESH_TOKEN_EXPIRE_DAYS + 1
+        )
+        db.commit()
+
+    deleted = UserService.prune_expired_tokens(db, settings.TOKEN_PRUNE_BATCH_SIZE, now)
+    if deleted:
+        # Pruned digests would only cost confirmation queries; start fresh
+        revocation_filter.reset()
+
+    PRUNED_ROWS.inc(deleted)
+    BLACKLIST_ROWS.set(UserService.count_blacklisted_tokens(db))
+    PRUNE_DURATION.set(time.perf_counter() - started)
+    return deleted
+
+
+async def run_token_pruning() -> None:
+    """Prune the token blacklist every TOKEN_PRUNE_INTERVAL_SECONDS.
+
+    Only one worker per interval prunes, so the batched deletes do not run
+    concurrently against the same rows.
+    """
+    interval = settings.TOKEN_PRUNE_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_scope() as db:
+                if not await run_db(db, claim_run, "token_prune", interval):
+                    continue
+                await run_db(db, prune_token_blacklist)
+        except Exception:
+            logger.exception("Token blacklist pruning failed")
+
+
+def count_pending_hash_upgrades(db: Session) -> int:
+    """Set the pending hash upgrade gauge from the users table."""
+    pending = UserService.count_outdated_password_hashes(db)
+    PENDING_HASH_UPGRADES.set(pending)
+    return pending
+
+
+async def run_hash_upgrade_count() -> None:
+    """Recount pending hash upgrades every PASSWORD_UPGRADE_COUNT_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.PASSWORD_UPGRADE_COUNT_SECONDS)
+        try:
+            async with session_scope() as db:
+                await run_db(db, count_pending_hash_upgrades)
+        except Exception:
+            logger.exception("Counting pending password hash upgrades failed")
+
+
+def reconcile_category_stats(db: Session) -> int:
+    """Recount category_stats from blogs; returns the categories corrected."""
+    corrected = recount_category_stats(db)
+    response_cache.invalidate(*_stale_tags(corrected))
+    return len(corrected)
+
+
+def recount_category_stats(db: Session) -> List[str]:
+    """Commit a recount of category_stats; the categories it corrected."""
+    corrections = category_stats.recount(db)
+    db.commit()
+    if corrections:
+        logger.warning(
+            "Corrected category counts (stored -> actual): %s",
+            ", ".join(
+                f"{category} {stored} -> {actual}"
+                for category, (stored, actual) in sorted(corrections.items())
+            ),
+        )
+        CATEGORY_CORRECTIONS.inc(len(corrections))
+    return sorted(corrections)
+
+
+def _stale_tags(categories: List[str]) -> Tuple[str, ...]:
+    """Cache tags of pages showing the counts of corrected ``categories``."""
+    if not categories:
+        return ()
+    return (CATEGORIES_TAG, RECENT_TAG, *map(category_tag, categories))
+
+
+async def run_category_reconciliation() -> None:
+    """Reconcile category_stats every CATEGORY_STATS_RECONCILE_SECONDS.
+
+    The recount locks out blog writes while it fixes counts, so only one
+    worker per interval runs it.
+    """
+    interval = settings.CATEGORY_STATS_RECONCILE_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_scope() as db:
+                if not await run_db(db, claim_run, "category_stats", interval):
+                    continue
+                corrected = await run_db(db, recount_category_stats)
+            await response_cache.invalidate_async(*_stale_tags(corrected))
+        except Exception:
+            logger.exception("Category count reconciliation failed")
+
+
+async def run_search_index_resync() -> None:
+    """Pull other workers' blog writes into the search index periodically."""
+    while True:
+        await asyncio.sleep(settings.SEARCH_INDEX_RESYNC_SECONDS)
+        try:
+            async with session_scope() as db:
+                await run_db(db, search_index.resync)
+        except Exception:
+            logger.exception("Search index resync failed")
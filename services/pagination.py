@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+Cursor = Tuple[datetime, int]
+SearchCursor = Tuple[float, int]
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def _decode(token: str) -> list:
+    padded = token + "=" * (-len(token) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, blog_id: int) -> str:
+    """Build an opaque page token from the last row's ``(created_at, id)``."""
+    return _encode([created_at.isoformat(), blog_id])
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        created_at, blog_id = _decode(token)
+        return datetime.fromisoformat(created_at), int(blog_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def encode_search_cursor(score: float, blog_id: int) -> str:
+    """Page token for ranked search results, ordered by ``(score, id)``."""
+    return _encode([score, blog_id])
+
+
+def decode_search_cursor(token: str) -> SearchCursor:
+    try:
+        score, blog_id = _decode(token)
+        return float(score), int(blog_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Token for the page after ``rows``, or None when this was the last page."""
+    if len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
@@ -0,0 +1,202 @@
+"""Server-side cache of rendered blog read responses.
+
+The blog read endpoints store their JSON body (plus the X-Next-Cursor header)
+under the request path and query string. Every entry is tagged with the blog
+ids it contains and with the list it belongs to. ``BlogService`` writes then
+drop only the tags they affect:
+
+* create: the recent list and the post's category list, which gain a row
+* update: the post, plus both category lists if the category changed
+* delete: the post, the recent list and its category list, whose pages shift
+
+Writes that change a category's number of posts also drop the category
+facets.
+
+Entries keep their ETag / Last-Modified headers, so revalidations of cached
+responses are answered with 304 without touching the database.
+
+A page rendered from a read replica (``get_read_db`` marks the request) is
+not stored if any worker invalidated entries within the replica lag window.
+The replica may not have replayed that write yet, and storing its page would
+undo the invalidation until the TTL ran out.
+
+Lookups are counted per endpoint as ``response_cache_requests_total`` and
+summarised in ``response_cache_hit_ratio``.
+"""
+
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from config.settings import settings
+from monitoring.metrics import counter, gauge
+from services.conditional import (
+    conditional_response,
+    is_conditional,
+    is_not_modified,
+    not_modified,
+)
+from services.cache_backends import CacheBackendError, MemoryBackend, RedisBackend
+
+logger = logging.getLogger(__name__)
+
+RECENT_TAG = "recent"
+CATEGORIES_TAG = "categories"
+
+CACHE_REQUESTS = counter(
+    "response_cache_requests_total",
+    "Blog read responses looked up in the response cache",
+    ("endpoint", "result"),
+)
+HIT_RATIO = gauge(
+    "response_cache_hit_ratio",
+    "Share of blog read lookups served from the response cache",
+    ("endpoint",),
+)
+INVALIDATED_ENTRIES = counter(
+    "response_cache_invalidated_entries_total",
+    "Response cache entries dropped by blog writes",
+)
+
+
+def blog_tag(blog_id: int) -> str:
+    return f"blog:{blog_id}"
+
+
+def category_tag(category: str) -> str:
+    return f"category:{category}"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    headers: Dict[str, str]
+    tags: Tuple[str, ...] = ()
+
+    def encode(self) -> bytes:
+        # Header line first; the JSON body never contains a raw newline
+        return json.dumps(self.headers).encode() + b"\n" + self.body
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedResponse":
+        headers, _, body = data.partition(b"\n")
+        return cls(body, json.loads(headers))
+
+
+def cache_key(request: Request) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        # Bumped by every invalidation, so a render that raced a write in this
+        # worker is not stored
+        self.generation = 0
+
+    async def _call(self, fn: Callable, *args):
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    async def _may_predate_invalidation(self, request: Request) -> bool:
+        """Whether ``request`` read a replica that may lag the last invalidation."""
+        if getattr(request.state, "read_replica", None) is None:
+            return False
+        invalidated_at = await self._call(self.backend.invalidated_at)
+        # A replica in rotation lagged at most this much at its last check
+        window = (
+            settings.DB_REPLICA_MAX_LAG_SECONDS
+            + settings.DB_REPLICA_CHECK_INTERVAL_SECONDS
+        )
+        return invalidated_at is not None and time.time() - invalidated_at < window
+
+    def _record(self, endpoint: str, result: str) -> None:
+        CACHE_REQUESTS.inc(endpoint=endpoint, result=result)
+        hits = CACHE_REQUESTS.value(endpoint=endpoint, result="hit")
+        misses = CACHE_REQUESTS.value(endpoint=endpoint, result="miss")
+        HIT_RATIO.set(hits / (hits + misses), endpoint=endpoint)
+
+    async def serve(
+        self,
+        request: Request,
+        endpoint: str,
+        render: Callable[[], Awaitable[CachedResponse]],
+        validate: Optional[Callable[[], Awaitable[Optional[Dict[str, str]]]]] = None,
+    ) -> Response:
+        """The cached response for ``request``, rendering and storing it on a miss.
+
+        ``validate`` returns just the validator headers (or None if unknown);
+        on a miss it lets a conditional request get its 304 without a render.
+        """
+        if self.backend is not None:
+            key = cache_key(request)
+            try:
+                data = await self._call(self.backend.get, key)
+            except CacheBackendError:
+                logger.warning("Response cache lookup failed", exc_info=True)
+                data = None
+            if data is not None:
+                self._record(endpoint, "hit")
+                cached = CachedResponse.decode(data)
+                return conditional_response(request, cached.body, cached.headers)
+            self._record(endpoint, "miss")
+
+        if validate is not None and is_conditional(request):
+            headers = await validate()
+            if headers is not None and is_not_modified(request, headers):
+                return not_modified(headers)
+
+        generation = self.generation
+        cached = await render()
+        if self.backend is not None and generation == self.generation:
+            try:
+                if not await self._may_predate_invalidation(request):
+                    await self._call(
+                        self.backend.set, key, cached.encode(), cached.tags, self.ttl
+                    )
+            except CacheBackendError:
+                logger.warning("Response cache store failed", exc_info=True)
+        return conditional_response(request, cached.body, cached.headers)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying any of ``tags``; called from BlogService."""
+        self.generation += 1
+        if self.backend is None or not tags:
+            return
+        try:
+            INVALIDATED_ENTRIES.inc(self.backend.invalidate(tags))
+        except CacheBackendError:
+            # Entries then expire after RESPONSE_CACHE_TTL_SECONDS
+            logger.warning("Response cache invalidation failed", exc_info=True)
+
+    async def invalidate_async(self, *tags: str) -> None:
+        """``invalidate`` for async callers: a blocking backend runs off the loop."""
+        self.generation += 1
+        if self.backend is None or not tags:
+            return
+        try:
+            INVALIDATED_ENTRIES.inc(await self._call(self.backend.invalidate, tags))
+        except CacheBackendError:
+            logger.warning("Response cache invalidation failed", exc_info=True)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def build_backend(name: str):
+    if name == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    if name == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    return None
+
+
+response_cache = ResponseCache(
+    build_backend(settings.RESPONSE_CACHE_BACKEND), settings.RESPONSE_CACHE_TTL_SECONDS
+)
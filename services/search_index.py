@@ -0,0 +1,478 @@
+"""In-process inverted index with BM25 ranking.
+
+A zero-dependency search backend (``SEARCH_BACKEND=memory``) for deployments
+without database full-text support. Postings are kept per term in parallel
+``array`` columns (slots and term frequencies) rather than Python objects.
+Each indexed version of a document gets a new slot. Updates and deletes
+retire the old slot in O(1) instead of searching the postings for it. A
+term's postings are compacted once retired slots make up half of them, and
+the slots are renumbered once retired ones outnumber the live.
+
+Compaction also sorts a term's postings by impact (BM25 weight without
+idf) and records the highest impact of each BLOCK of them, so a search
+scores the most promising blocks first and stops once no remaining block
+can reach the top hits. New postings go to an unordered tail, which is
+sorted in once it outgrows an eighth of the ordered part.
+
+The index is per worker process: it is rebuilt from a streaming scan at
+startup, follows the writes this worker makes through BlogService, and
+every SEARCH_INDEX_RESYNC_SECONDS picks up other workers' writes by
+``updated_at`` (see ``resync``).
+"""
+
+import heapq
+import math
+import re
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from sqlalchemy import Row, func, select
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.models import Blog
+
+TOKEN_PATTERN = re.compile(r"\w+")
+MAX_TF = 0xFFFF
+# Field boosts folded into term frequency (a simple BM25F)
+FIELD_WEIGHTS = (("title", 3), ("category", 2), ("content", 1))
+SCAN_BATCH = 1000
+# Document of a retired slot. Slot 0 is permanently retired: renumbering
+# points the postings of every retired slot at it.
+RETIRED = -1
+# Postings per block of score upper bounds
+BLOCK = 64
+# Relative slack on the upper bounds, for float rounding
+BOUND_SLACK = 1e-9
+EMPTY_ENTRY = (array("I"), array("H"))
+
+
+Post = Tuple[int, str, str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._term_ids: Dict[str, int] = {}
+            self._postings: List[array] = []
+            self._freqs: List[array] = []
+            # Retired slots still in each term's postings
+            self._retired: List[int] = []
+            # Leading postings of each term that are in impact order
+            self._ordered: List[int] = []
+            # Highest impact in each BLOCK of a term's postings, measured
+            # against the average document length in _ref_lengths
+            self._block_impacts: List[array] = []
+            self._ref_lengths: List[float] = []
+            # Document and length of each slot; the document is RETIRED once
+            # replaced or removed
+            self._slot_docs = array("q", [RETIRED])
+            self._slot_lengths = array("I", [0])
+            self._doc_slots: Dict[int, int] = {}
+            # Term ids of each document, and their frequencies
+            self._doc_terms: Dict[int, Tuple[array, array]] = {}
+            self._doc_lengths: Dict[int, int] = {}
+            self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_lengths
+
+    def _average_length(self) -> float:
+        return self._total_length / len(self._doc_lengths) if self._doc_lengths else 1.0
+
+    def _impact(self, tf: int, length: int, avg_length: float) -> float:
+        """BM25 term weight without idf and the constant ``k1 + 1`` factor.
+
+        For a fixed ``tf`` and length it grows by at most the factor the
+        average length grows, so a stored impact bounds later scores too.
+        """
+        return tf / (tf + self.k1 * (1 - self.b + self.b * length / avg_length))
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self._postings)
+            self._postings.append(array("I"))
+            self._freqs.append(array("H"))
+            self._retired.append(0)
+            self._ordered.append(0)
+            self._block_impacts.append(array("d"))
+            self._ref_lengths.append(self._average_length())
+        return term_id
+
+    def _document_frequency(self, term_id: int) -> int:
+        return len(self._postings[term_id]) - self._retired[term_id]
+
+    def _unordered(self, term_id: int) -> bool:
+        ordered = self._ordered[term_id]
+        return len(self._postings[term_id]) - ordered > max(BLOCK, ordered // 8)
+
+    def _compact(self, term_id: int) -> None:
+        """Drop a term's retired postings and put the rest in impact order."""
+        slot_docs, slot_lengths = self._slot_docs, self._slot_lengths
+        avg_length = self._average_length()
+        # _impact, unrolled
+        base, per_length = self.k1 * (1 - self.b), self.k1 * self.b / avg_length
+        entries = sorted(
+            (
+                (tf / (tf + base + per_length * slot_lengths[slot]), slot, tf)
+                for slot, tf in zip(self._postings[term_id], self._freqs[term_id])
+                if slot_docs[slot] != RETIRED
+            ),
+            reverse=True,
+        )
+        self._postings[term_id] = array("I", [slot for _, slot, _ in entries])
+        self._freqs[term_id] = array("H", [tf for _, _, tf in entries])
+        self._block_impacts[term_id] = array(
+            "d", [entries[i][0] for i in range(0, len(entries), BLOCK)]
+        )
+        self._ref_lengths[term_id] = avg_length
+        self._ordered[term_id] = len(entries)
+        self._retired[term_id] = 0
+
+    def _unlink(self, doc_id: int) -> None:
+        entry = self._doc_terms.pop(doc_id, None)
+        if entry is None:
+            return
+        self._slot_docs[self._doc_slots.pop(doc_id)] = RETIRED
+        for term_id in entry[0]:
+            self._retired[term_id] += 1
+            if self._retired[term_id] * 2 >= len(self._postings[term_id]):
+                self._compact(term_id)
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        if (len(self._slot_docs) - len(self._doc_lengths)) * 2 > len(self._slot_docs):
+            self._renumber()
+
+    def _renumber(self) -> None:
+        """Give the live slots consecutive numbers and fold the rest into 0.
+
+        Runs once retired slots outnumber live ones, so the slot columns stay
+        within twice the document count. Postings keep their order, so the
+        block bounds and retired counts still hold; their retired entries
+        are dropped by term compaction as before. New arrays replace the old
+        ones, which a search may still be reading.
+        """
+        remap = array("I", [0]) * len(self._slot_docs)
+        slot_docs, slot_lengths = array("q", [RETIRED]), array("I", [0])
+        for slot, doc_id in enumerate(self._slot_docs):
+            if doc_id != RETIRED:
+                remap[slot] = self._doc_slots[doc_id] = len(slot_docs)
+                slot_docs.append(doc_id)
+                slot_lengths.append(self._slot_lengths[slot])
+        self._postings = [
+            array("I", map(remap.__getitem__, postings)) for postings in self._postings
+        ]
+        self._slot_docs, self._slot_lengths = slot_docs, slot_lengths
+
+    def add(self, doc_id: int, title: str, content: str, category: str) -> None:
+        """Index a post, replacing any previous version of it."""
+        self._add(doc_id, title, content, category, reorder=True)
+
+    def load(self, docs: Iterable[Post]) -> None:
+        """Index many ``(doc_id, title, content, category)`` posts.
+
+        Postings are put back in impact order once at the end, instead of
+        as each term's unordered tail outgrows its threshold.
+        """
+        for doc in docs:
+            self._add(*doc, reorder=False)
+        for term_id in range(len(self._postings)):
+            with self._lock:
+                if self._unordered(term_id):
+                    self._compact(term_id)
+
+    def _add(
+        self, doc_id: int, title: str, content: str, category: str, reorder: bool
+    ) -> None:
+        fields = {"title": title, "content": content, "category": category}
+        counts: Dict[str, int] = {}
+        length = 0
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(fields[field]):
+                counts[term] = counts.get(term, 0) + weight
+                length += weight
+
+        with self._lock:
+            self._unlink(doc_id)
+            slot = len(self._slot_docs)
+            self._slot_docs.append(doc_id)
+            self._slot_lengths.append(length)
+            self._doc_lengths[doc_id] = length
+            self._total_length += length
+            terms, freqs = array("I"), array("H")
+            for term, tf in counts.items():
+                term_id = self._term_id(term)
+                tf = min(tf, MAX_TF)
+                postings, blocks = self._postings[term_id], self._block_impacts[term_id]
+                impact = self._impact(tf, length, self._ref_lengths[term_id])
+                if len(postings) % BLOCK:
+                    blocks[-1] = max(blocks[-1], impact)
+                else:
+                    blocks.append(impact)
+                postings.append(slot)
+                self._freqs[term_id].append(tf)
+                terms.append(term_id)
+                freqs.append(tf)
+                if reorder and self._unordered(term_id):
+                    self._compact(term_id)
+            self._doc_slots[doc_id] = slot
+            self._doc_terms[doc_id] = (terms, freqs)
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._unlink(doc_id)
+
+    def doc_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._doc_lengths)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        skip: int = 0,
+        cursor: Optional[Tuple[float, int]] = None,
+    ) -> List[Tuple[float, int]]:
+        """Top ``limit`` ``(score, doc_id)`` pairs matching every query term.
+
+        Scores are negated BM25 so that, like the SQL backends, lower sorts
+        first and ``(score, doc_id)`` works as a keyset cursor.
+
+        Candidates come from the rarest term's postings, a BLOCK at a time in
+        order of the blocks' score upper bounds (block-max pruning). Once the
+        best score a block could reach cannot displace the current top hits,
+        the remaining blocks are skipped. The lock is held only to take a
+        snapshot of the postings: slots past the snapshot are not read, and
+        compaction replaces a term's arrays rather than changing them.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        wanted = skip + limit
+        if not terms or wanted <= 0:
+            return []
+        with self._lock:
+            found = [self._term_ids.get(term) for term in terms]
+            term_ids = [term_id for term_id in found if term_id is not None]
+            if len(term_ids) < len(found) or not self._doc_lengths:
+                return []
+            docs = len(self._doc_lengths)
+            avg_length = self._total_length / docs
+            # Rarest term first: it supplies the candidates
+            postings = [
+                (
+                    self._document_frequency(term_id),
+                    term_id,
+                    self._postings[term_id],
+                    self._freqs[term_id],
+                    len(self._postings[term_id]),
+                    self._block_impacts[term_id],
+                    self._ref_lengths[term_id],
+                )
+                for term_id in sorted(term_ids, key=self._document_frequency)
+            ]
+            slot_docs, slot_lengths = self._slot_docs, self._slot_lengths
+            doc_terms = self._doc_terms
+        if not postings[0][0]:
+            return []
+
+        k1, b = self.k1, self.b
+        weights, scales = [], []
+        for df, term_id, _, _, size, impacts, ref_length in postings:
+            idf = math.log(1 + (docs - df + 0.5) / (df + 0.5))
+            weights.append((idf, term_id))
+            # A stored impact bounds scores at any average length up to the
+            # factor the average grew by since it was measured
+            scales.append(
+                idf * (k1 + 1) * max(1.0, avg_length / ref_length) * (1 + BOUND_SLACK)
+            )
+        (lead_idf, _), others = weights[0], weights[1:]
+        _, _, lead_postings, lead_freqs, size, lead_impacts, _ = postings[0]
+        others_bound = sum(
+            scale * max(impacts[: -(-size // BLOCK)])
+            for scale, (_, _, _, _, size, impacts, _) in zip(scales[1:], postings[1:])
+        )
+        blocks = sorted(
+            (
+                (scales[0] * impact + others_bound, start)
+                for start, impact in zip(range(0, size, BLOCK), lead_impacts)
+            ),
+            reverse=True,
+        )
+
+        # The kept hits as (-score, -doc_id), so the worst is on top
+        top: List[Tuple[float, int]] = []
+        for bound, start in blocks:
+            if len(top) == wanted and -bound > -top[0][0]:
+                break
+            end = min(start + BLOCK, size)
+            for slot, tf in zip(lead_postings[start:end], lead_freqs[start:end]):
+                doc_id = slot_docs[slot]
+                if doc_id == RETIRED:
+                    continue
+                norm = k1 * (1 - b + b * slot_lengths[slot] / avg_length)
+                score = 0.0 - lead_idf * (tf * (k1 + 1) / (tf + norm))
+                if others and len(top) == wanted and score - others_bound > -top[0][0]:
+                    continue
+                terms_of, freqs_of = (
+                    doc_terms.get(doc_id, EMPTY_ENTRY) if others else EMPTY_ENTRY
+                )
+                for idf, term_id in others:
+                    if term_id not in terms_of:
+                        break
+                    tf = freqs_of[terms_of.index(term_id)]
+                    score -= idf * (tf * (k1 + 1) / (tf + norm))
+                else:
+                    if cursor is not None and (score, doc_id) <= cursor:
+                        continue
+                    hit = (-score, -doc_id)
+                    if len(top) < wanted:
+                        heapq.heappush(top, hit)
+                    elif hit > top[0]:
+                        heapq.heapreplace(top, hit)
+        return sorted((-score, -doc_id) for score, doc_id in top)[skip:]
+
+    def memory_usage(self) -> Dict[str, float]:
+        """Approximate bytes held by the index, overall and per document."""
+        with self._lock:
+            arrays = (
+                self._postings
+                + self._freqs
+                + self._block_impacts
+                + [a for entry in self._doc_terms.values() for a in entry]
+            )
+            size = sum(sys.getsizeof(a) for a in arrays)
+            size += sys.getsizeof(self._term_ids) + sum(
+                sys.getsizeof(term) for term in self._term_ids
+            )
+            size += sys.getsizeof(self._doc_terms) + sys.getsizeof(self._doc_lengths)
+            size += sys.getsizeof(self._doc_slots)
+            size += sys.getsizeof(self._slot_docs) + sys.getsizeof(self._slot_lengths)
+            size += sys.getsizeof(self._postings) + sys.getsizeof(self._freqs)
+            size += sys.getsizeof(self._block_impacts)
+            for column in (self._retired, self._ordered, self._ref_lengths):
+                size += sys.getsizeof(column)
+            documents = len(self._doc_lengths)
+            slots = len(self._slot_docs)
+        return {
+            "documents": documents,
+            "terms": len(self._term_ids),
+            "slots": slots,
+            "bytes": size,
+            "bytes_per_document": size / documents if documents else 0.0,
+        }
+
+
+index = InvertedIndex()
+# When the last scan of the blogs table started (naive UTC, as stored)
+synced_through: Optional[datetime] = None
+# blogs.updated_at of each indexed post, where known
+indexed_versions: Dict[int, datetime] = {}
+# time.monotonic() of the last comparison of indexed and live post ids
+ids_checked_at: Optional[float] = None
+
+
+def enabled() -> bool:
+    return settings.SEARCH_BACKEND == "memory"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _scan(db: Session, since: Optional[datetime] = None) -> Iterator[Post]:
+    """Posts to index, all or updated since ``since``.
+
+    Posts whose ``updated_at`` is the version already indexed are skipped.
+    """
+    query = select(Blog.id, Blog.title, Blog.content, Blog.category, Blog.updated_at)
+    if since is not None:
+        query = query.where(Blog.updated_at >= since)
+    rows = db.execute(query.execution_options(yield_per=SCAN_BATCH))
+    for blog_id, title, content, category, updated_at in rows:
+        if updated_at is not None:
+            if indexed_versions.get(blog_id) == updated_at:
+                continue
+            indexed_versions[blog_id] = updated_at
+        yield blog_id, title, content, category
+
+
+def rebuild(db: Session) -> None:
+    """Repopulate the index from a streaming scan over the blogs table."""
+    global synced_through, ids_checked_at
+    started = _now()
+    index.clear()
+    indexed_versions.clear()
+    index.load(_scan(db))
+    synced_through, ids_checked_at = started, time.monotonic()
+
+
+def resync(db: Session) -> None:
+    """Apply the blog writes other workers made since the last scan.
+
+    Posts updated since ``synced_through`` are indexed again, unless the
+    index already has that version. The lookback reaches one
+    SEARCH_INDEX_RESYNC_SECONDS further back, to catch a write that
+    committed after the last scan started. Deleted posts leave nothing to
+    find by ``updated_at``, so the indexed ids are checked against an
+    id-only scan when the counts differ, and every
+    SEARCH_INDEX_ID_CHECK_SECONDS regardless: a delete and a create in the
+    same interval leave the count unchanged.
+    """
+    global synced_through
+    if synced_through is None:
+        rebuild(db)
+        return
+    started = _now()
+    since = synced_through - timedelta(seconds=settings.SEARCH_INDEX_RESYNC_SECONDS)
+    index.load(_scan(db, since))
+    synced_through = started
+    if (
+        ids_checked_at is not None
+        and time.monotonic() - ids_checked_at < settings.SEARCH_INDEX_ID_CHECK_SECONDS
+        and db.scalar(select(func.count()).select_from(Blog)) == len(index)
+    ):
+        return
+    _drop_deleted(db)
+
+
+def _drop_deleted(db: Session) -> None:
+    global ids_checked_at
+    ids_checked_at = time.monotonic()
+    # Read the indexed ids first, so a post this worker creates in between
+    # is not taken for a deleted one
+    indexed = index.doc_ids()
+    live = set(db.scalars(select(Blog.id).execution_options(yield_per=SCAN_BATCH)))
+    for blog_id in indexed:
+        if blog_id not in live:
+            indexed_versions.pop(blog_id, None)
+            index.remove(blog_id)
+
+
+def index_blog(blog: Union[Blog, Row]) -> None:
+    if enabled():
+        updated_at = getattr(blog, "updated_at", None)
+        if updated_at is None:
+            indexed_versions.pop(blog.id, None)
+        else:
+            indexed_versions[blog.id] = updated_at
+        index.add(blog.id, blog.title, blog.content, blog.category)
+
+
+def unindex_blog(blog_id: int) -> None:
+    if enabled():
+        indexed_versions.pop(blog_id, None)
+        index.remove(blog_id)
@@ -0,0 +1,289 @@
+import html
+import re
+from typing import Dict, List, NamedTuple, Optional, Protocol
+from sqlalchemy import (
+    Float,
+    String,
+    and_,
+    cast,
+    column,
+    func,
+    literal_column,
+    or_,
+    select,
+    table,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session
+from config.settings import settings
+from database.fulltext import FTS_TABLE, TS_CONFIG
+from database.models import Blog
+from services import search_index
+from services.pagination import SearchCursor
+from services.search_index import tokenize
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Private-use characters the databases put around matches in the snippets
+# they build, turned into HIGHLIGHT_START/END once the text is escaped
+MATCH_START = "\ue000"
+MATCH_END = "\ue001"
+SNIPPET_CONTEXT = 60
+
+
+class SearchHit(NamedTuple):
+    blog: Blog
+    # Lower is better; results are ordered by (score, blog id)
+    score: float
+    snippet: Optional[str] = None
+
+
+class SearchBackend(Protocol):
+    name: str
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[SearchCursor],
+        highlight: bool,
+    ) -> List[SearchHit]: ...
+
+
+def highlight_text(text: str, terms: List[str]) -> Optional[str]:
+    """Excerpt of ``text`` around the first term match, as escaped HTML with
+    the matches in ``<mark>``."""
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t) for t in terms) if p >= 0]
+    if not positions:
+        return None
+    start = max(0, min(positions) - SNIPPET_CONTEXT)
+    excerpt = text[start : min(positions) + SNIPPET_CONTEXT * 2]
+    pattern = re.compile(
+        "(" + "|".join(re.escape(t) for t in terms) + ")", re.IGNORECASE
+    )
+    # split() puts the matches at the odd positions
+    marked = "".join(
+        HIGHLIGHT_START + html.escape(part) + HIGHLIGHT_END
+        if i % 2
+        else html.escape(part)
+        for i, part in enumerate(pattern.split(excerpt))
+    )
+    return ("…" if start else "") + marked
+
+
+def render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """A database-built snippet as escaped HTML with the matches in ``<mark>``."""
+    if snippet is None:
+        return None
+    return (
+        html.escape(snippet)
+        .replace(MATCH_START, HIGHLIGHT_START)
+        .replace(MATCH_END, HIGHLIGHT_END)
+    )
+
+
+def _after(score, blog_id, cursor: SearchCursor):
+    last_score, last_id = cursor
+    return or_(score > last_score, and_(score == last_score, blog_id > last_id))
+
+
+class LikeSearch:
+    """Unindexed substring match; newest first. Used where no FTS is available."""
+
+    name = "like"
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[SearchCursor],
+        highlight: bool,
+    ) -> List[SearchHit]:
+        pattern = func.lower(f"%{query}%")
+        stmt = db.query(Blog).filter(
+            or_(
+                func.lower(Blog.title).like(pattern),
+                func.lower(Blog.content).like(pattern),
+                func.lower(Blog.category).like(pattern),
+            )
+        )
+        if cursor is not None:
+            stmt = stmt.filter(Blog.id < cursor[1])
+        blogs = stmt.order_by(Blog.id.desc()).offset(skip).limit(limit).all()
+        return [
+            SearchHit(
+                blog,
+                float(-blog.id),
+                highlight_text(blog.content, [query]) if highlight else None,
+            )
+            for blog in blogs
+        ]
+
+
+class SqliteFtsSearch:
+    """FTS5 MATCH ranked with bm25 (title > category > content)."""
+
+    name = "sqlite_fts"
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[SearchCursor],
+        highlight: bool,
+    ) -> List[SearchHit]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        fts = table(FTS_TABLE, column("rowid"))
+        match = " ".join(f'"{term}"*' for term in terms)
+        score = literal_column(f"bm25({FTS_TABLE}, 10.0, 1.0, 5.0)", Float).label(
+            "score"
+        )
+        snippet = literal_column(
+            f"snippet({FTS_TABLE}, 1, '{MATCH_START}', '{MATCH_END}', '…', 16)"
+            if highlight
+            else "NULL",
+            String,
+        ).label("snippet")
+
+        ranked = (
+            select(fts.c.rowid.label("id"), score, snippet)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match))
+            .subquery()
+        )
+        # Rank and limit inside the FTS query so only the page's rows are
+        # joined back to blogs, instead of every match
+        page = select(ranked.c.id, ranked.c.score, ranked.c.snippet)
+        if cursor is not None:
+            page = page.where(_after(ranked.c.score, ranked.c.id, cursor))
+        page_sq = (
+            page.order_by(ranked.c.score, ranked.c.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        stmt = (
+            select(Blog, page_sq.c.score, page_sq.c.snippet)
+            .join(page_sq, Blog.id == page_sq.c.id)
+            .order_by(page_sq.c.score, Blog.id)
+        )
+        return [
+            SearchHit(blog, score, render_snippet(snippet))
+            for blog, score, snippet in db.execute(stmt).all()
+        ]
+
+
+class PostgresSearch:
+    """tsvector @@ tsquery over the GIN index, ranked with ts_rank_cd."""
+
+    name = "postgres_fts"
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[SearchCursor],
+        highlight: bool,
+    ) -> List[SearchHit]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        tsquery = func.to_tsquery(TS_CONFIG, " & ".join(f"{t}:*" for t in terms))
+        vector = literal_column("blogs.search_vector", TSVECTOR)
+        # ts_rank_cd is float4; as double precision the score round-trips
+        # through the cursor exactly, so the equality in _after matches
+        score = -cast(func.ts_rank_cd(vector, tsquery), Float(53))
+
+        ranked = (
+            select(Blog.id, score.label("score"))
+            .where(vector.op("@@")(tsquery))
+            .subquery()
+        )
+        page = select(ranked.c.id, ranked.c.score)
+        if cursor is not None:
+            page = page.where(_after(ranked.c.score, ranked.c.id, cursor))
+        page_sq = (
+            page.order_by(ranked.c.score, ranked.c.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        # Headlines are costly, so only build them for the rows on this page
+        snippet = (
+            func.ts_headline(
+                TS_CONFIG,
+                Blog.content,
+                tsquery,
+                f'StartSel="{MATCH_START}", StopSel="{MATCH_END}", MaxWords=30',
+            )
+            if highlight
+            else literal_column("NULL")
+        )
+        stmt = (
+            select(Blog, page_sq.c.score, snippet)
+            .join(page_sq, Blog.id == page_sq.c.id)
+            .order_by(page_sq.c.score, Blog.id)
+        )
+        return [
+            SearchHit(blog, score, render_snippet(snippet))
+            for blog, score, snippet in db.execute(stmt).all()
+        ]
+
+
+class MemorySearch:
+    """BM25 over the in-process inverted index; the database only hydrates."""
+
+    name = "memory"
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        skip: int,
+        limit: int,
+        cursor: Optional[SearchCursor],
+        highlight: bool,
+    ) -> List[SearchHit]:
+        ranked = search_index.index.search(query, limit, skip, cursor)
+        if not ranked:
+            return []
+        blogs = {
+            blog.id: blog
+            for blog in db.query(Blog).filter(Blog.id.in_([i for _, i in ranked]))
+        }
+        terms = tokenize(query)
+        return [
+            SearchHit(
+                blogs[blog_id],
+                score,
+                highlight_text(blogs[blog_id].content, terms) if highlight else None,
+            )
+            for score, blog_id in ranked
+            if blog_id in blogs
+        ]
+
+
+BACKENDS: Dict[str, SearchBackend] = {
+    "like": LikeSearch(),
+    "memory": MemorySearch(),
+    "sqlite": SqliteFtsSearch(),
+    "postgresql": PostgresSearch(),
+}
+
+
+def get_search_backend(db: Session) -> SearchBackend:
+    """Pick the search backend for SEARCH_BACKEND and the session's dialect."""
+    if settings.SEARCH_BACKEND in ("like", "memory"):
+        return BACKENDS[settings.SEARCH_BACKEND]
+    dialect = db.get_bind().dialect.name
+    return BACKENDS.get(dialect, BACKENDS["like"])
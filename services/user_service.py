@@ -1,43 +1,148 @@
+from sqlalchemy import Insert, Row, delete, func, insert, select
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from database.connection import CONFLICT_INSERTS, DBSession, run_db
 from database.models import User, TokenBlacklist
 from schemas.user import UserSignup, UserProfileUpdate
-from auth.password import hash_password, verify_password
-from auth.jwt_handler import create_access_token, create_refresh_token
-from typing import Optional, Tuple
+from auth.password import (
+    current_rounds,
+    hash_password,
+    hash_password_async,
+    verify_and_update,
+    verify_and_update_async,
+)
+from auth import revocation
+from auth.principal_cache import principal_cache
+from auth.jwt_handler import (
+    create_access_token,
+    create_refresh_token,
+    token_digest,
+    token_expiry,
+)
+from monitoring.metrics import gauge
+from typing import Optional, Tuple, cast
+from datetime import datetime, timezone
+
+# Each worker sets it from a periodic count; the backlog only shrinks, so
+# the lowest value is the freshest
+PENDING_HASH_UPGRADES = gauge(
+    "password_hash_upgrades_pending",
+    "Users whose password hash uses less than the configured bcrypt cost",
+    multiprocess_mode="min",
+)
+
+USER_COLUMNS = tuple(getattr(User, column.key) for column in User.__table__.columns)
 
 
 class UserService:
     @staticmethod
-    def create_user(db: Session, user_data: UserSignup) -> User:
-        user = User(
-            email=user_data.email, hashed_password=hash_password(user_data.password)
+    def create_user(db: Session, user_data: UserSignup) -> Optional[Row]:
+        return UserService.insert_user(
+            db, user_data.email, hash_password(user_data.password)
         )
-        db.add(user)
+
+    @staticmethod
+    def insert_user(db: Session, email: str, hashed_password: str) -> Optional[Row]:
+        """The new user's row, or None if the email is already registered.
+
+        ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` checks and inserts in
+        one statement, and cannot race a concurrent signup the way a lookup
+        followed by an insert can.
+        """
+        values = {"email": email, "hashed_password": hashed_password}
+        conflict_insert = CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+        statement: Insert
+        try:
+            if conflict_insert is not None:
+                statement = conflict_insert(User).on_conflict_do_nothing(
+                    index_elements=[User.email]
+                )
+            else:
+                statement = insert(User)
+            row = db.execute(statement.values(values).returning(*USER_COLUMNS)).first()
+        except IntegrityError:
+            row = None
+        if row is None:
+            db.rollback()
+            return None
         db.commit()
-        db.refresh(user)
-        return user
+        return row
 
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
+    @staticmethod
+    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+        return db.query(User).filter(User.id == user_id).first()
+
     @staticmethod
     def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         user = UserService.get_user_by_email(db, email)
-        if not user or not verify_password(password, user.hashed_password):
+        if not user:
+            return None
+        valid, new_hash = verify_and_update(password, user.hashed_password)
+        if not valid:
             return None
+        if new_hash:
+            UserService.update_password_hash(db, user, new_hash)
         return user
 
+    @staticmethod
+    def update_password_hash(db: Session, user: User, hashed_password: str) -> None:
+        """Store a rehashed password after a successful sign-in."""
+        user.hashed_password = hashed_password
+        db.commit()
+
+    @staticmethod
+    def count_outdated_password_hashes(
+        db: Session, rounds: Optional[int] = None
+    ) -> int:
+        """Users whose bcrypt hash (``$2b$NN$...``) has a cost below ``rounds``."""
+        cost = f"{rounds or current_rounds():02d}"
+        return (
+            db.scalar(
+                select(func.count())
+                .select_from(User)
+                .where(
+                    User.hashed_password.like("$2%"),
+                    func.substr(User.hashed_password, 5, 2) < cost,
+                )
+            )
+            or 0
+        )
+
     @staticmethod
     def update_profile(
         db: Session, user: User, profile_data: UserProfileUpdate
-    ) -> User:
+    ) -> Optional[User]:
+        """Apply ``profile_data``; None if the user no longer exists."""
+        if user not in db:
+            # Principals served from the cache are not attached to a session,
+            # and the user may have been deleted since it was cached
+            attached = db.get(User, user.id)
+            if attached is None:
+                principal_cache.invalidate(user.id)
+                return None
+            user = attached
         update_data = profile_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(user, field, value)
 
         db.commit()
         db.refresh(user)
+        principal_cache.invalidate(user.id)
+        return user
+
+    @staticmethod
+    def deactivate_user(db: Session, user_id: int) -> Optional[User]:
+        user = db.get(User, user_id)
+        if user is None:
+            return None
+        user.is_active = False
+        db.commit()
+        principal_cache.invalidate(user_id)
         return user
 
     @staticmethod
@@ -46,8 +151,119 @@ class UserService:
         refresh_token = create_refresh_token(user_id)
         return access_token, refresh_token
 
+    @staticmethod
+    def is_token_blacklisted(db: Session, token: str) -> bool:
+        digest = token_digest(token)
+        if revocation.enabled():
+            if revocation.revocation_filter.is_stale():
+                revocation.revocation_filter.sync(db)
+            if not revocation.revocation_filter.might_contain(digest):
+                return False
+        return (
+            db.query(TokenBlacklist.id)
+            .filter(TokenBlacklist.token_digest == digest)
+            .first()
+            is not None
+        )
+
     @staticmethod
     def blacklist_token(db: Session, token: str, user_id: int) -> None:
-        blacklist_entry = TokenBlacklist(token=token, user_id=user_id)
+        digest = token_digest(token)
+        blacklist_entry = TokenBlacklist(
+            token_digest=digest, user_id=user_id, expires_at=token_expiry(token)
+        )
         db.add(blacklist_entry)
         db.commit()
+        revocation.revocation_filter.add(digest)
+
+    @staticmethod
+    def prune_expired_tokens(
+        db: Session, batch_size: int = 1000, now: Optional[datetime] = None
+    ) -> int:
+        """Delete expired blacklist rows in bounded batches; returns the count."""
+        cutoff = now or datetime.now(timezone.utc)
+        expired = (
+            select(TokenBlacklist.id)
+            .where(TokenBlacklist.expires_at < cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        deleted = 0
+        while True:
+            result = cast(
+                CursorResult,
+                db.execute(
+                    delete(TokenBlacklist)
+                    .where(TokenBlacklist.id.in_(expired))
+                    .execution_options(synchronize_session=False)
+                ),
+            )
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
+
+    @staticmethod
+    def count_blacklisted_tokens(db: Session) -> int:
+        return db.scalar(select(func.count()).select_from(TokenBlacklist)) or 0
+
+
+class AsyncUserService:
+    """Awaitable counterparts of UserService for async route handlers."""
+
+    @staticmethod
+    async def create_user(db: DBSession, user_data: UserSignup) -> Optional[Row]:
+        hashed_password = await hash_password_async(user_data.password)
+        return await run_db(
+            db, UserService.insert_user, user_data.email, hashed_password
+        )
+
+    @staticmethod
+    async def get_user_by_email(db: DBSession, email: str) -> Optional[User]:
+        return await run_db(db, UserService.get_user_by_email, email)
+
+    @staticmethod
+    async def get_user_by_id(db: DBSession, user_id: int) -> Optional[User]:
+        return await run_db(db, UserService.get_user_by_id, user_id)
+
+    @staticmethod
+    async def get_principal(db: DBSession, user_id: int) -> Optional[User]:
+        """The user behind an access token, from the principal cache if fresh."""
+        user = principal_cache.get(user_id)
+        if user is None:
+            user = await run_db(db, UserService.get_user_by_id, user_id)
+            if user is not None and user.is_active:
+                principal_cache.put(user)
+        return user
+
+    @staticmethod
+    async def authenticate_user(
+        db: DBSession, email: str, password: str
+    ) -> Optional[User]:
+        user = await run_db(db, UserService.get_user_by_email, email)
+        if not user:
+            return None
+        valid, new_hash = await verify_and_update_async(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            await run_db(db, UserService.update_password_hash, user, new_hash)
+        return user
+
+    @staticmethod
+    async def update_profile(
+        db: DBSession, user: User, profile_data: UserProfileUpdate
+    ) -> Optional[User]:
+        return await run_db(db, UserService.update_profile, user, profile_data)
+
+    @staticmethod
+    async def deactivate_user(db: DBSession, user_id: int) -> Optional[User]:
+        return await run_db(db, UserService.deactivate_user, user_id)
+
+    @staticmethod
+    async def is_token_blacklisted(db: DBSession, token: str) -> bool:
+        return await run_db(db, UserService.is_token_blacklisted, token)
+
+    @staticmethod
+    async def blacklist_token(db: DBSession, token: str, user_id: int) -> None:
+        await run_db(db, UserService.blacklist_token, token, user_id)
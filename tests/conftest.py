@@ -1,4 +1,9 @@
-import pytest
+import os
+
+# Minimum bcrypt cost keeps the suite fast; set before settings are loaded
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -7,7 +12,10 @@ from main import app
 from database.connection import Base, get_db
 from database.models import User, Blog
 from auth.password import hash_password
-from auth.jwt_handler import create_access_token, create_refresh_token
+from auth.jwt_handler import create_access_token, create_refresh_token, token_cache
+from auth.principal_cache import principal_cache
+from auth.revocation import revocation_filter
+from services.response_cache import response_cache
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
 
@@ -20,6 +28,15 @@ engine = create_engine(
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def reset_worker_caches():
+    # Per-worker state outlives the per-test database; start each test cold
+    revocation_filter.reset()
+    principal_cache.clear()
+    token_cache.clear()
+    response_cache.clear()
+
+
 @pytest.fixture(scope="function")
 def db_session():
     Base.metadata.create_all(bind=engine)
@@ -118,7 +135,7 @@ def multiple_blogs(db_session, test_user):
     for i in range(4):
         blog = Blog(
             title=titles[i],
-            content=f"Content for blog post {i+1}",
+            content=f"Content for blog post {i + 1}",
             category=categories[i],
             author_id=test_user.id,
         )
@@ -0,0 +1,143 @@
+"""In-process Redis-protocol server covering the commands RedisBackend uses."""
+
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Set, Union
+from services.cache_backends import INVALIDATE_SCRIPT
+
+Value = Union[bytes, Set[bytes]]
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data: Dict[bytes, Value] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def start(self) -> "RedisStandIn":
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def _members(self, key: bytes) -> Set[bytes]:
+        members = self._live(key)
+        return members if isinstance(members, set) else set()
+
+    def _live(self, key: bytes) -> Optional[Value]:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def run(self, args: List[bytes]):
+        command = args[0].upper()
+        if command == b"PING":
+            return "PONG"
+        if command == b"GET":
+            return self._live(args[1])
+        if command == b"SET":
+            self.data[args[1]] = args[2]
+            self.expires.pop(args[1], None)
+            if len(args) == 5 and args[3].upper() == b"PX":
+                self.expires[args[1]] = time.monotonic() + int(args[4]) / 1000
+            return "OK"
+        if command == b"DEL":
+            removed = sum(self._live(key) is not None for key in args[1:])
+            for key in args[1:]:
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+        if command == b"SADD":
+            members = self._members(args[1])
+            self.data[args[1]] = members
+            before = len(members)
+            members.update(args[2:])
+            return len(members) - before
+        if command == b"SMEMBERS":
+            return sorted(self._members(args[1]))
+        if command == b"PEXPIRE":
+            if self._live(args[1]) is None:
+                return 0
+            self.expires[args[1]] = time.monotonic() + int(args[2]) / 1000
+            return 1
+        if command == b"EVAL":
+            # Only the invalidation script, run natively; atomic under the lock
+            if args[1].decode() != INVALIDATE_SCRIPT:
+                return ValueError("unknown script")
+            keys = args[3 : 3 + int(args[2])]
+            self.data[keys[0]] = args[3 + len(keys)]
+            self.expires.pop(keys[0], None)
+            removed = 0
+            for tag in keys[1:]:
+                for key in self._members(tag):
+                    removed += self._live(key) is not None
+                    self.data.pop(key, None)
+                    self.expires.pop(key, None)
+                self.data.pop(tag, None)
+                self.expires.pop(tag, None)
+            return removed
+        if command == b"SCAN":
+            pattern = (
+                args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+            )
+            keys = [
+                key
+                for key in list(self.data)
+                if self._live(key) is not None
+                and fnmatch.fnmatch(key.decode(), pattern)
+            ]
+            return [b"0", keys]
+        return ValueError(f"unknown command '{command.decode()}'")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: RedisStandIn
+    disable_nagle_algorithm = True
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _encode(self, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-ERR %s\r\n" % str(reply).encode()
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(self._encode(r) for r in reply)
+
+    def handle(self) -> None:
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            with self.server.lock:
+                reply = self.server.run(args)
+            self.wfile.write(self._encode(reply))
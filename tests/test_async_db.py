@@ -0,0 +1,211 @@
+import json
+import threading
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from database import replicas
+from database.connection import Base, get_async_database_url, get_db
+from database.replicas import ReplicaSet
+from database.models import User
+from services.blog_service import AsyncBlogService
+from services.cache_backends import MemoryBackend
+from services.response_cache import response_cache
+from services.user_service import AsyncUserService
+from schemas.blog import BlogCreate, BlogUpdate
+from schemas.user import UserSignup
+from main import app
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    Base.metadata.create_all(bind=create_engine(url))
+    engine = create_async_engine(get_async_database_url(url))
+    factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with factory() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_client(async_db):
+    async def override_get_db():
+        yield async_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+def test_async_database_url_mapping():
+    assert (
+        get_async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    )
+    assert (
+        get_async_database_url("postgresql://u:p@db:5432/blog")
+        == "postgresql+asyncpg://u:p@db:5432/blog"
+    )
+
+
+@pytest.mark.asyncio
+class TestAsyncServices:
+    async def test_create_and_fetch_blog(self, async_db):
+        user = await AsyncUserService.create_user(
+            async_db, UserSignup(email="async@example.com", password="password123")
+        )
+        blog = await AsyncBlogService.create_blog(
+            async_db,
+            BlogCreate(title="Async", content="Body", category="Tech"),
+            user.id,
+        )
+
+        fetched = await AsyncBlogService.get_blog_by_id(async_db, blog.id)
+        assert fetched is not None
+        assert fetched.title == "Async"
+
+        recent = await AsyncBlogService.get_recent_blogs(async_db)
+        assert [b.id for b in recent] == [blog.id]
+
+    async def test_writes_invalidate_cache_off_the_event_loop(self, async_db):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        class BlockingBackend(MemoryBackend):
+            blocking = True
+
+            def invalidate(self, tags):
+                threads.append(threading.get_ident())
+                return super().invalidate(tags)
+
+        user = await AsyncUserService.create_user(
+            async_db, UserSignup(email="async@example.com", password="password123")
+        )
+        memory_backend = response_cache.backend
+        response_cache.backend = BlockingBackend(10)
+        try:
+            blog = await AsyncBlogService.create_blog(
+                async_db,
+                BlogCreate(title="Async", content="Body", category="Tech"),
+                user.id,
+            )
+            await AsyncBlogService.update_blog(
+                async_db, blog.id, user.id, BlogUpdate(category="Science")
+            )
+            assert await AsyncBlogService.delete_blog(async_db, blog.id, user.id)
+            assert not await AsyncBlogService.delete_blog(async_db, blog.id, user.id)
+        finally:
+            response_cache.backend = memory_backend
+
+        assert len(threads) == 3
+        assert loop_thread not in threads
+
+    async def test_authenticate_user(self, async_db):
+        await AsyncUserService.create_user(
+            async_db, UserSignup(email="async@example.com", password="password123")
+        )
+
+        user = await AsyncUserService.authenticate_user(
+            async_db, "async@example.com", "password123"
+        )
+        assert isinstance(user, User)
+        assert (
+            await AsyncUserService.authenticate_user(
+                async_db, "async@example.com", "wrong"
+            )
+            is None
+        )
+
+
+@pytest.mark.asyncio
+class TestAsyncRoutes:
+    async def test_signup_create_and_list(self, async_client):
+        response = await async_client.post(
+            "/api/auth/signup",
+            json={"email": "route@example.com", "password": "password123"},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        response = await async_client.post(
+            "/api/blogs",
+            headers=headers,
+            json={"title": "Async route", "content": "Body", "category": "Tech"},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = await async_client.get("/api/blogs")
+        assert response.status_code == status.HTTP_200_OK
+        assert [b["title"] for b in response.json()] == ["Async route"]
+
+        response = await async_client.get("/api/profile", headers=headers)
+        assert response.json()["email"] == "route@example.com"
+
+    async def test_bulk_create_through_async_session(self, async_client):
+        response = await async_client.post(
+            "/api/auth/signup",
+            json={"email": "bulk@example.com", "password": "password123"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        items = [
+            {"title": title, "content": "Body", "category": "Tech"}
+            for title in ("First", "Second")
+        ]
+
+        response = await async_client.post(
+            "/api/blogs/bulk", json=items, headers=headers
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        created = [blog["title"] for blog in response.json()["created"]]
+        assert created == ["First", "Second"]
+
+    async def test_export_streams_from_async_session(self, async_client):
+        response = await async_client.post(
+            "/api/auth/signup",
+            json={"email": "export@example.com", "password": "password123"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for title in ("First", "Second"):
+            await async_client.post(
+                "/api/blogs",
+                headers=headers,
+                json={"title": title, "content": "Body", "category": "Tech"},
+            )
+
+        response = await async_client.get("/api/blogs/export", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        lines = response.text.splitlines()
+        assert [json.loads(line)["title"] for line in lines] == ["First", "Second"]
+
+    async def test_reads_from_async_replica(self, async_client, tmp_path, monkeypatch):
+        url = f"sqlite:///{tmp_path / 'replica.db'}"
+        Base.metadata.create_all(bind=create_engine(url))
+        replica_set = ReplicaSet([url], asynchronous=True)
+        await replica_set.check()
+        monkeypatch.setattr(replicas, "replica_set", replica_set)
+        response = await async_client.post(
+            "/api/auth/signup",
+            json={"email": "replica@example.com", "password": "password123"},
+        )
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        await async_client.post(
+            "/api/blogs",
+            headers=headers,
+            json={"title": "Primary only", "content": "Body", "category": "Tech"},
+        )
+
+        # Just wrote: read from the primary
+        response = await async_client.get("/api/blogs")
+        assert [b["title"] for b in response.json()] == ["Primary only"]
+
+        response_cache.clear()
+        async_client.cookies.clear()
+        response = await async_client.get("/api/blogs")
+        assert response.json() == []
+        await replica_set.dispose()
@@ -1,5 +1,31 @@
+import threading
+from datetime import timedelta
+import pytest
 from fastapi import status
+from sqlalchemy import event
+from auth.jwt_handler import (
+    create_token,
+    decode_token,
+    token_cache,
+    token_digest,
+    token_expiry,
+)
+from auth.password import (
+    calibrate_rounds,
+    configure_rounds,
+    current_rounds,
+    hash_password_async,
+    hash_rounds,
+    hasher,
+    verify_password,
+)
+from auth.principal_cache import CACHE_HITS, CACHE_MISSES, principal_cache
+from auth.revocation import BloomFilter, revocation_filter
+from auth.token_cache import VerifiedTokenCache
+from config.settings import settings
 from database.models import TokenBlacklist
+from services.user_service import UserService
+from tests.conftest import engine
 
 
 class TestSignup:
@@ -93,7 +119,11 @@ class TestRefreshToken:
     def test_refresh_blacklisted_token(
         self, client, refresh_token, test_user, db_session
     ):
-        blacklist_entry = TokenBlacklist(token=refresh_token, user_id=test_user.id)
+        blacklist_entry = TokenBlacklist(
+            token_digest=token_digest(refresh_token),
+            user_id=test_user.id,
+            expires_at=token_expiry(refresh_token),
+        )
         db_session.add(blacklist_entry)
         db_session.commit()
         response = client.post(
@@ -119,3 +149,229 @@ class TestLogout:
             "/api/auth/logout", headers={"Authorization": "Bearer invalid_token"}
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestRevocationFilter:
+    def test_logged_out_token_is_rejected(self, client, auth_headers):
+        client.post("/api/auth/logout", headers=auth_headers)
+
+        response = client.get("/api/profile", headers=auth_headers)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unrevoked_token_skips_blacklist_query(self, db_session, auth_token):
+        revocation_filter.sync(db_session)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert not UserService.is_token_blacklisted(db_session, auth_token)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert statements == []
+
+    def test_revocation_from_other_worker_seen_after_sync(
+        self, db_session, auth_token, test_user
+    ):
+        revocation_filter.sync(db_session)
+        db_session.add(
+            TokenBlacklist(
+                token_digest=token_digest(auth_token),
+                user_id=test_user.id,
+                expires_at=token_expiry(auth_token),
+            )
+        )
+        db_session.commit()
+
+        assert not revocation_filter.might_contain(token_digest(auth_token))
+        revocation_filter.sync(db_session)
+        assert UserService.is_token_blacklisted(db_session, auth_token)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [token_digest(str(i)) for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+        assert bloom.count == 1000
+
+
+class TestPasswordHashingPool:
+    def test_signin_sheds_load_when_pool_is_full(self, client, test_user, monkeypatch):
+        monkeypatch.setattr(hasher, "pending", hasher.capacity)
+
+        response = client.post(
+            "/api/auth/signin",
+            json={"email": test_user.email, "password": "password123"},
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
+    @pytest.mark.asyncio
+    async def test_hashing_runs_off_the_event_loop(self):
+        thread_name = await hasher.run(lambda: threading.current_thread().name)
+
+        assert thread_name.startswith("bcrypt")
+        assert verify_password("secret", await hash_password_async("secret"))
+        assert hasher.pending == 0
+
+
+class TestPasswordRehash:
+    @pytest.fixture
+    def raised_rounds(self):
+        original = current_rounds()
+        configure_rounds(original + 1)
+        yield original + 1
+        configure_rounds(original)
+
+    def test_signin_upgrades_outdated_hash(
+        self, client, db_session, test_user, raised_rounds
+    ):
+        assert UserService.count_outdated_password_hashes(db_session) == 1
+
+        response = client.post(
+            "/api/auth/signin",
+            json={"email": test_user.email, "password": "password123"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user = UserService.get_user_by_email(db_session, test_user.email)
+        assert hash_rounds(user.hashed_password) == raised_rounds
+        assert verify_password("password123", user.hashed_password)
+        assert UserService.count_outdated_password_hashes(db_session) == 0
+
+    def test_failed_signin_keeps_hash(
+        self, client, db_session, test_user, raised_rounds
+    ):
+        original_hash = test_user.hashed_password
+
+        response = client.post(
+            "/api/auth/signin",
+            json={"email": test_user.email, "password": "wrong"},
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        user = UserService.get_user_by_email(db_session, test_user.email)
+        assert user.hashed_password == original_hash
+
+    def test_calibration_respects_minimum(self):
+        assert calibrate_rounds(target_ms=0.001, min_rounds=5, samples=1) == 5
+
+    def test_calibration_rejects_non_positive_target(self):
+        for target_ms in (0, -250):
+            with pytest.raises(ValueError, match="positive number of milliseconds"):
+                calibrate_rounds(target_ms=target_ms)
+
+
+class TestPrincipalCache:
+    @pytest.fixture(autouse=True)
+    def fresh_filter(self, monkeypatch):
+        # Keep the revocation filter from re-syncing mid-test
+        monkeypatch.setattr(settings, "TOKEN_REVOCATION_SYNC_SECONDS", 3600)
+
+    def test_cached_request_runs_no_queries(self, client, auth_headers):
+        client.get("/api/profile", headers=auth_headers)
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        hits = CACHE_HITS.value()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/api/profile", headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == "test@example.com"
+        assert statements == []
+        assert CACHE_HITS.value() == hits + 1
+
+    def test_profile_update_invalidates_entry(self, client, auth_headers):
+        misses = CACHE_MISSES.value()
+        client.get("/api/profile", headers=auth_headers)
+        client.put("/api/profile", headers=auth_headers, json={"first_name": "New"})
+
+        response = client.get("/api/profile", headers=auth_headers)
+
+        assert response.json()["first_name"] == "New"
+        assert CACHE_MISSES.value() == misses + 2
+
+    def test_profile_update_of_deleted_user_is_rejected(
+        self, client, db_session, auth_headers, test_user
+    ):
+        client.get("/api/profile", headers=auth_headers)
+        db_session.delete(test_user)
+        db_session.commit()
+
+        response = client.put(
+            "/api/profile", headers=auth_headers, json={"first_name": "New"}
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "User not found"
+        assert len(principal_cache) == 0
+
+    def test_deactivated_user_is_rejected(
+        self, client, db_session, auth_headers, test_user
+    ):
+        client.get("/api/profile", headers=auth_headers)
+        assert len(principal_cache) == 1
+
+        UserService.deactivate_user(db_session, test_user.id)
+
+        response = client.get("/api/profile", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert len(principal_cache) == 0
+
+
+class TestVerifiedTokenCache:
+    def test_repeat_decode_is_served_from_cache(self, auth_token, monkeypatch):
+        payload = decode_token(auth_token)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("token was verified again")
+
+        monkeypatch.setattr("auth.jwt_handler.jwt.decode", fail)
+        assert decode_token(auth_token) == payload
+
+    def test_tampered_token_is_not_served_from_cache(self, auth_token):
+        decode_token(auth_token)
+        header, claims, signature = auth_token.split(".")
+
+        with pytest.raises(ValueError):
+            decode_token(f"{header}.{claims}.{signature[::-1]}")
+
+    def test_entry_evicted_at_expiry(self):
+        token = create_token({"sub": "1", "type": "access"}, timedelta(minutes=1))
+        payload = decode_token(token)
+        digest = token_digest(token)
+
+        assert token_cache.get(digest, now=payload["exp"] - 1) == payload
+        assert token_cache.get(digest, now=payload["exp"]) is None
+        assert len(token_cache) == 0
+
+    def test_expired_entries_purged_on_insert(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.put("old", {"exp": 100}, now=50)
+        cache.put("new", {"exp": 300}, now=200)
+
+        assert len(cache) == 1
+        assert cache.get("new", now=200) == {"exp": 300}
+
+    def test_size_cap_evicts_least_recently_used(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        cache.put("a", {"exp": 100}, now=0)
+        cache.put("b", {"exp": 100}, now=0)
+        cache.get("a", now=0)
+        cache.put("c", {"exp": 100}, now=0)
+
+        assert cache.get("b", now=0) is None
+        assert cache.get("a", now=0) is not None
+        assert cache.get("c", now=0) is not None
@@ -1,5 +1,22 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
 from fastapi import status
+from sqlalchemy import event
 from auth.jwt_handler import create_access_token
+from config.settings import settings
+from database import replicas
+from database.connection import Base
+from database.models import Blog, make_excerpt
+from database.replicas import PRIMARY_COOKIE, READS, ReplicaSet
+from schemas.blog import BlogResponse, BlogSummary
+from services.blog_service import BlogService
+from services import search_index
+from services.cache_backends import RedisBackend
+from services.response_cache import CACHE_REQUESTS, response_cache
+from tests.conftest import engine
+from tests.redis_standin import RedisStandIn
 
 
 class TestCreateBlog:
@@ -34,6 +51,86 @@ class TestCreateBlog:
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+class TestBulkCreateBlogs:
+    def test_bulk_create_returns_posts_in_order(self, client, auth_headers, test_user):
+        author_id = test_user.id
+        items = [
+            {"title": f"Post {i}", "content": f"Body {i}", "category": "Bulk"}
+            for i in range(3)
+        ]
+
+        response = client.post("/api/blogs/bulk", json=items, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        created = response.json()["created"]
+        assert [blog["title"] for blog in created] == ["Post 0", "Post 1", "Post 2"]
+        assert all(blog["author_id"] == author_id for blog in created)
+        assert response.json()["errors"] == []
+        fetched = client.get(f"/api/blogs/{created[1]['id']}").json()
+        assert fetched == created[1]
+
+    def test_bulk_create_reports_invalid_items(self, client, auth_headers):
+        items = [
+            {"title": "Good", "content": "Body", "category": "Bulk"},
+            {"title": "", "content": "Body", "category": "Bulk"},
+            "not an object",
+            {"title": "Also good", "content": "Body", "category": "Bulk"},
+        ]
+
+        response = client.post("/api/blogs/bulk", json=items, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_207_MULTI_STATUS
+        body = response.json()
+        assert [blog["title"] for blog in body["created"]] == ["Good", "Also good"]
+        assert [error["index"] for error in body["errors"]] == [1, 2]
+        assert body["errors"][0]["errors"][0]["loc"] == ["title"]
+
+    def test_bulk_create_rejects_all_invalid(self, client, auth_headers):
+        items = [{"title": "", "content": "Body", "category": "Bulk"}, "nope"]
+
+        response = client.post("/api/blogs/bulk", json=items, headers=auth_headers)
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        errors = response.json()["detail"]
+        assert [error["index"] for error in errors] == [0, 1]
+        assert errors[0]["errors"][0]["loc"] == ["title"]
+        assert client.get("/api/blogs").json() == []
+
+    def test_bulk_create_sets_excerpt(self, client, db_session, auth_headers):
+        content = "x" * 500
+        items = [{"title": "Long", "content": content, "category": "Bulk"}]
+
+        created = client.post(
+            "/api/blogs/bulk", json=items, headers=auth_headers
+        ).json()["created"]
+
+        blog = db_session.get(Blog, created[0]["id"])
+        assert blog.excerpt == make_excerpt(content)
+
+    def test_bulk_create_invalidates_cached_lists(
+        self, client, auth_headers, multiple_blogs
+    ):
+        assert len(client.get("/api/blogs/category/Science").json()) == 1
+        items = [{"title": "New", "content": "Body", "category": "Science"}]
+
+        client.post("/api/blogs/bulk", json=items, headers=auth_headers)
+
+        assert len(client.get("/api/blogs/category/Science").json()) == 2
+        assert client.get("/api/blogs?limit=1").json()[0]["title"] == "New"
+
+    def test_bulk_create_limits(self, client, auth_headers):
+        item = {"title": "Post", "content": "Body", "category": "Bulk"}
+        too_many = [item] * (settings.BULK_CREATE_MAX_ITEMS + 1)
+
+        empty = client.post("/api/blogs/bulk", json=[], headers=auth_headers)
+        oversized = client.post("/api/blogs/bulk", json=too_many, headers=auth_headers)
+        unauthenticated = client.post("/api/blogs/bulk", json=[item])
+
+        assert empty.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert oversized.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert unauthenticated.status_code == status.HTTP_403_FORBIDDEN
+
+
 class TestListBlogs:
     def test_list_blogs_success(self, client, multiple_blogs):
         response = client.get("/api/blogs")
@@ -56,6 +153,23 @@ class TestListBlogs:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == []
 
+    def test_list_blogs_cursor_pagination(self, client, multiple_blogs):
+        first = client.get("/api/blogs?limit=3")
+        assert first.status_code == status.HTTP_200_OK
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = client.get(f"/api/blogs?limit=3&cursor={cursor}")
+        assert second.status_code == status.HTTP_200_OK
+        assert "X-Next-Cursor" not in second.headers
+
+        ids = [b["id"] for b in first.json() + second.json()]
+        assert sorted(ids) == sorted(b.id for b in multiple_blogs)
+
+    def test_list_blogs_invalid_cursor(self, client):
+        response = client.get("/api/blogs?cursor=not-a-cursor")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
 
 class TestGetBlog:
     def test_get_blog_success(self, client, test_blog):
@@ -82,6 +196,16 @@ class TestListBlogsByCategory:
         assert len(data) == 2
         assert all(blog["category"] == "Technology" for blog in data)
 
+    def test_list_by_category_cursor(self, client, multiple_blogs):
+        first = client.get("/api/blogs/category/Technology?limit=1")
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = client.get(f"/api/blogs/category/Technology?limit=1&cursor={cursor}")
+
+        assert len(second.json()) == 1
+        assert second.json()[0]["category"] == "Technology"
+        assert second.json()[0]["id"] != first.json()[0]["id"]
+
     def test_list_by_category_empty(self, client, multiple_blogs):
         response = client.get("/api/blogs/category/NonExistent")
 
@@ -118,12 +242,143 @@ class TestSearchBlogs:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == []
 
+    def test_search_blogs_ranked_by_relevance(self, client, db_session, test_user):
+        for title, content in [
+            ("Gardening", "A short note that mentions python once"),
+            ("Python tips", "Python idioms and python tooling"),
+        ]:
+            db_session.add(
+                Blog(
+                    title=title,
+                    content=content,
+                    category="Misc",
+                    author_id=test_user.id,
+                )
+            )
+        db_session.commit()
+
+        response = client.get("/api/blogs/search?q=python")
+
+        assert [b["title"] for b in response.json()] == ["Python tips", "Gardening"]
+
+    def test_search_blogs_highlight(self, client, multiple_blogs):
+        response = client.get("/api/blogs/search?q=content&highlight=true")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert all("<mark>" in b["snippet"] for b in response.json())
+
+    def test_search_highlight_escapes_content(
+        self, client, db_session, test_user, monkeypatch
+    ):
+        db_session.add(
+            Blog(
+                title="Scripts",
+                content='Beware <script>alert("xss")</script> in scripts',
+                category="Misc",
+                author_id=test_user.id,
+            )
+        )
+        db_session.commit()
+        search_index.rebuild(db_session)
+
+        for backend in ("auto", "like", "memory"):
+            monkeypatch.setattr(settings, "SEARCH_BACKEND", backend)
+            response = client.get("/api/blogs/search?q=beware&highlight=true")
+
+            snippet = response.json()[0]["snippet"]
+            assert "<script>" not in snippet
+            assert "&lt;script&gt;" in snippet
+            assert "<mark>Beware</mark>" in snippet
+
+    def test_search_blogs_cursor(self, client, multiple_blogs):
+        first = client.get("/api/blogs/search?q=content&limit=2")
+        cursor = first.headers["X-Next-Cursor"]
+
+        second = client.get(f"/api/blogs/search?q=content&limit=2&cursor={cursor}")
+
+        ids = [b["id"] for b in first.json() + second.json()]
+        assert sorted(ids) == sorted(b.id for b in multiple_blogs)
+
+    def test_search_reflects_updates(self, client, auth_headers, test_blog):
+        client.put(
+            f"/api/blogs/{test_blog.id}",
+            headers=auth_headers,
+            json={"title": "Quantum computing"},
+        )
+
+        assert len(client.get("/api/blogs/search?q=quantum").json()) == 1
+        assert client.get("/api/blogs/search?q=test blog post").json() == []
+
     def test_search_blogs_missing_query(self, client):
         response = client.get("/api/blogs/search")
 
         assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
 
 
+class TestExportBlogs:
+    @staticmethod
+    def lines(response):
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    def test_export_streams_ndjson_in_id_order(
+        self, client, auth_headers, multiple_blogs
+    ):
+        response = client.get("/api/blogs/export", headers=auth_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text.endswith("\n")
+        assert self.lines(response) == [
+            BlogResponse.model_validate(blog).model_dump(mode="json")
+            for blog in sorted(multiple_blogs, key=lambda blog: blog.id)
+        ]
+
+    def test_export_requires_auth(self, client):
+        response = client.get("/api/blogs/export")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_export_resumes_after_id(self, client, auth_headers, multiple_blogs):
+        first = self.lines(client.get("/api/blogs/export", headers=auth_headers))
+
+        response = client.get(
+            f"/api/blogs/export?after_id={first[1]['id']}", headers=auth_headers
+        )
+
+        assert self.lines(response) == first[2:]
+
+    def test_export_filters_category_and_updated_range(
+        self, client, db_session, auth_headers, multiple_blogs
+    ):
+        ids = [blog.id for blog in multiple_blogs]
+        db_session.get(Blog, ids[0]).updated_at = datetime(2020, 1, 1)
+        db_session.commit()
+        since = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+
+        recent = client.get(
+            "/api/blogs/export",
+            params={"category": "Technology", "updated_since": since},
+            headers=auth_headers,
+        )
+        old = client.get(
+            "/api/blogs/export",
+            params={"updated_before": "2021-01-01T00:00:00Z"},
+            headers=auth_headers,
+        )
+
+        assert [blog["id"] for blog in self.lines(recent)] == [ids[3]]
+        assert [blog["id"] for blog in self.lines(old)] == [ids[0]]
+
+    def test_stream_export_reads_in_batches(self, db_session, multiple_blogs):
+        query = BlogService.export_query(["id", "title"])
+
+        batches = list(BlogService.stream_export(db_session, query, batch_size=3))
+
+        assert [len(batch) for batch in batches] == [3, 1]
+        assert [row[0] for batch in batches for row in batch] == sorted(
+            blog.id for blog in multiple_blogs
+        )
+
+
 class TestUpdateBlog:
     def test_update_blog_success(self, client, auth_headers, test_blog):
         update_data = {
@@ -143,6 +398,7 @@ class TestUpdateBlog:
         assert data["category"] == update_data["category"]
 
     def test_update_blog_partial(self, client, auth_headers, test_blog):
+        content = test_blog.content
         response = client.put(
             f"/api/blogs/{test_blog.id}",
             headers=auth_headers,
@@ -152,7 +408,7 @@ class TestUpdateBlog:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["title"] == "Only Title Updated"
-        assert data["content"] == test_blog.content
+        assert data["content"] == content
 
     def test_update_blog_unauthorized(self, client, test_blog, test_user_2):
         other_user_token = create_access_token(test_user_2.id)
@@ -180,12 +436,13 @@ class TestUpdateBlog:
 
 class TestDeleteBlog:
     def test_delete_blog_success(self, client, auth_headers, test_blog):
-        response = client.delete(f"/api/blogs/{test_blog.id}", headers=auth_headers)
+        blog_id = test_blog.id
+        response = client.delete(f"/api/blogs/{blog_id}", headers=auth_headers)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
 
         # Verify blog is deleted
-        get_response = client.get(f"/api/blogs/{test_blog.id}")
+        get_response = client.get(f"/api/blogs/{blog_id}")
         assert get_response.status_code == status.HTTP_404_NOT_FOUND
 
     def test_delete_blog_unauthorized(self, client, test_blog, test_user_2):
@@ -205,3 +462,419 @@ class TestDeleteBlog:
         response = client.delete(f"/api/blogs/{test_blog.id}")
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestResponseCache:
+    @pytest.fixture(params=["memory", "redis"])
+    def cache_backend(self, request):
+        if request.param == "memory":
+            yield response_cache.backend
+            return
+        server = RedisStandIn().start()
+        memory_backend = response_cache.backend
+        response_cache.backend = RedisBackend(server.url)
+        try:
+            yield response_cache.backend
+        finally:
+            response_cache.backend = memory_backend
+            server.stop()
+
+    def count_queries(self, client, url):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return response, len(statements)
+
+    def test_repeat_read_served_from_cache(self, client, multiple_blogs, cache_backend):
+        first = client.get("/api/blogs?limit=2")
+        hits = CACHE_REQUESTS.value(endpoint="list_blogs", result="hit")
+
+        second, queries = self.count_queries(client, "/api/blogs?limit=2")
+
+        assert queries == 0
+        assert second.json() == first.json()
+        assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+        assert CACHE_REQUESTS.value(endpoint="list_blogs", result="hit") == hits + 1
+
+    def test_update_invalidates_only_pages_with_the_post(
+        self, client, auth_headers, multiple_blogs, cache_backend
+    ):
+        python_post = multiple_blogs[0]
+        client.get(f"/api/blogs/{python_post.id}")
+        client.get("/api/blogs/category/Technology")
+        client.get("/api/blogs/category/Science")
+
+        client.put(
+            f"/api/blogs/{python_post.id}",
+            headers=auth_headers,
+            json={"title": "Rust Programming"},
+        )
+
+        detail, detail_queries = self.count_queries(
+            client, f"/api/blogs/{python_post.id}"
+        )
+        listing, _ = self.count_queries(client, "/api/blogs/category/Technology")
+        _, science_queries = self.count_queries(client, "/api/blogs/category/Science")
+        assert detail_queries > 0
+        assert detail.json()["title"] == "Rust Programming"
+        assert "Rust Programming" in [b["title"] for b in listing.json()]
+        assert science_queries == 0
+
+    def test_category_change_invalidates_both_categories(
+        self, client, auth_headers, multiple_blogs, cache_backend
+    ):
+        client.get("/api/blogs/category/Science")
+
+        client.put(
+            f"/api/blogs/{multiple_blogs[0].id}",
+            headers=auth_headers,
+            json={"category": "Science"},
+        )
+
+        response = client.get("/api/blogs/category/Science")
+        assert len(response.json()) == 2
+
+    def test_create_and_delete_invalidate_lists(
+        self, client, auth_headers, multiple_blogs, cache_backend
+    ):
+        assert len(client.get("/api/blogs").json()) == 4
+
+        created = client.post(
+            "/api/blogs",
+            headers=auth_headers,
+            json={"title": "New", "content": "Body", "category": "Health"},
+        ).json()
+        assert len(client.get("/api/blogs").json()) == 5
+        assert len(client.get("/api/blogs/category/Health").json()) == 2
+
+        client.delete(f"/api/blogs/{created['id']}", headers=auth_headers)
+        assert len(client.get("/api/blogs").json()) == 4
+        assert len(client.get("/api/blogs/category/Health").json()) == 1
+        assert client.get(f"/api/blogs/{created['id']}").status_code == 404
+
+    def test_unreachable_cache_server_falls_back_to_database(
+        self, client, multiple_blogs
+    ):
+        server = RedisStandIn()
+        url = server.url
+        server.server_close()
+        memory_backend = response_cache.backend
+        response_cache.backend = RedisBackend(url)
+        try:
+            response = client.get("/api/blogs")
+        finally:
+            response_cache.backend = memory_backend
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 4
+
+
+class TestCategoryFacets:
+    def create(self, client, auth_headers, *categories):
+        return [
+            client.post(
+                "/api/blogs",
+                headers=auth_headers,
+                json={"title": "Post", "content": "Body", "category": category},
+            ).json()["id"]
+            for category in categories
+        ]
+
+    def test_counts_follow_writes(self, client, auth_headers):
+        tech, _, _ = self.create(client, auth_headers, "Tech", "Tech", "Food")
+
+        response = client.get("/api/blogs/categories")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [
+            {"category": "Tech", "posts": 2},
+            {"category": "Food", "posts": 1},
+        ]
+        assert response.headers["ETag"]
+
+        client.put(
+            f"/api/blogs/{tech}", headers=auth_headers, json={"category": "Food"}
+        )
+        assert client.get("/api/blogs/categories").json() == [
+            {"category": "Food", "posts": 2},
+            {"category": "Tech", "posts": 1},
+        ]
+
+        client.delete(f"/api/blogs/{tech}", headers=auth_headers)
+        assert client.get("/api/blogs/categories").json() == [
+            {"category": "Food", "posts": 1},
+            {"category": "Tech", "posts": 1},
+        ]
+
+    def test_served_from_cache_until_a_write(self, client, auth_headers):
+        self.create(client, auth_headers, "Tech")
+        client.get("/api/blogs/categories")
+        hits = CACHE_REQUESTS.value(endpoint="list_categories", result="hit")
+
+        client.get("/api/blogs/categories")
+        assert (
+            CACHE_REQUESTS.value(endpoint="list_categories", result="hit") == hits + 1
+        )
+
+        self.create(client, auth_headers, "Tech")
+        assert client.get("/api/blogs/categories").json() == [
+            {"category": "Tech", "posts": 2}
+        ]
+
+    def test_total_estimate_header(self, client, auth_headers, monkeypatch):
+        self.create(client, auth_headers, "Tech", "Tech", "Food")
+
+        assert "X-Total-Count-Estimate" not in client.get("/api/blogs").headers
+        monkeypatch.setattr(settings, "BLOG_LIST_TOTAL_ESTIMATE", True)
+        response_cache.clear()
+
+        listing = client.get("/api/blogs?limit=1")
+        category = client.get("/api/blogs/category/Tech?limit=1")
+        assert listing.headers["X-Total-Count-Estimate"] == "3"
+        assert category.headers["X-Total-Count-Estimate"] == "2"
+
+
+class TestConditionalGet:
+    def test_single_post_revalidates_with_etag(self, client, test_blog):
+        first = client.get(f"/api/blogs/{test_blog.id}")
+        etag = first.headers["ETag"]
+
+        response = client.get(
+            f"/api/blogs/{test_blog.id}", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    def test_single_post_honours_if_modified_since(self, client, test_blog):
+        last_modified = client.get(f"/api/blogs/{test_blog.id}").headers[
+            "Last-Modified"
+        ]
+
+        current = client.get(
+            f"/api/blogs/{test_blog.id}", headers={"If-Modified-Since": last_modified}
+        )
+        stale = client.get(
+            f"/api/blogs/{test_blog.id}",
+            headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+        )
+
+        assert current.status_code == status.HTTP_304_NOT_MODIFIED
+        assert stale.status_code == status.HTTP_200_OK
+
+    def test_update_changes_etag(self, client, auth_headers, test_blog):
+        etag = client.get(f"/api/blogs/{test_blog.id}").headers["ETag"]
+        client.put(
+            f"/api/blogs/{test_blog.id}", headers=auth_headers, json={"title": "New"}
+        )
+
+        response = client.get(
+            f"/api/blogs/{test_blog.id}", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["ETag"] != etag
+
+    def test_revalidation_skips_content_column(self, client, multiple_blogs):
+        etag = client.get("/api/blogs?limit=2").headers["ETag"]
+        response_cache.clear()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/api/blogs?limit=2", headers={"If-None-Match": etag})
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert statements
+        assert not any("content" in statement for statement in statements)
+
+    def test_list_etag_changes_when_post_deleted(
+        self, client, auth_headers, multiple_blogs
+    ):
+        etag = client.get("/api/blogs/category/Technology").headers["ETag"]
+        assert "Last-Modified" not in client.get("/api/blogs").headers
+
+        client.delete(f"/api/blogs/{multiple_blogs[0].id}", headers=auth_headers)
+        response = client.get(
+            "/api/blogs/category/Technology", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()) == 1
+
+
+class TestListProjections:
+    def test_full_page_matches_response_model(self, client, multiple_blogs):
+        response = client.get("/api/blogs")
+
+        expected = {
+            blog.id: BlogResponse.model_validate(blog).model_dump(mode="json")
+            for blog in multiple_blogs
+        }
+        assert response.json() == [expected[blog["id"]] for blog in response.json()]
+        assert list(response.json()[0]) == list(BlogResponse.model_fields)
+
+    def test_fields_returns_only_requested_keys(self, client, multiple_blogs):
+        response = client.get("/api/blogs?fields=id,title&limit=2")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [set(blog) for blog in response.json()] == [{"id", "title"}] * 2
+        assert "X-Next-Cursor" in response.headers
+
+    def test_summary_view_has_excerpt_without_content(
+        self, client, db_session, test_user
+    ):
+        db_session.add(
+            Blog(
+                title="Long",
+                content="z" * 1000,
+                category="Tech",
+                author_id=test_user.id,
+            )
+        )
+        db_session.commit()
+
+        response = client.get("/api/blogs/category/Tech?view=summary")
+
+        (blog,) = response.json()
+        assert "content" not in blog
+        assert blog["excerpt"] == "z" * 200
+        assert set(blog) == set(BlogSummary.model_fields)
+
+    def test_projection_query_skips_content_column(self, client, multiple_blogs):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            client.get("/api/blogs?view=summary")
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert not any("blogs.content" in statement for statement in statements)
+
+    def test_unknown_field_rejected(self, client):
+        response = client.get("/api/blogs?fields=id,password")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "password" in response.json()["detail"]
+
+    def test_fields_and_summary_view_are_exclusive(self, client):
+        response = client.get("/api/blogs?fields=id&view=summary")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_openapi_documents_every_shape(self, client):
+        schema = client.get("/openapi.json").json()
+        content = schema["paths"]["/api/blogs"]["get"]["responses"]["200"]["content"]
+
+        refs = str(content["application/json"]["schema"])
+        assert all(
+            name in refs for name in ("BlogResponse", "BlogSummary", "BlogFields")
+        )
+
+
+@pytest.fixture
+def replica_set(tmp_path, monkeypatch):
+    """Two SQLite files: the test database as primary, an empty replica."""
+    replica_set = ReplicaSet([f"sqlite:///{tmp_path / 'replica.db'}"], False)
+    Base.metadata.create_all(bind=replica_set.replicas[0].engine)
+    asyncio.run(replica_set.check())
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    yield replica_set
+    asyncio.run(replica_set.dispose())
+
+
+class TestReadReplicas:
+    def test_reads_served_by_replica(self, client, test_blog, replica_set):
+        blog_id = test_blog.id
+        before = READS.value(database="replica1")
+
+        # The replica has not caught up with the primary's post
+        assert client.get(f"/api/blogs/{blog_id}").status_code == 404
+        assert client.get("/api/blogs").json() == []
+        assert READS.value(database="replica1") == before + 2
+
+    def test_client_reads_own_writes_from_primary(
+        self, client, auth_headers, replica_set
+    ):
+        created = client.post(
+            "/api/blogs",
+            headers=auth_headers,
+            json={"title": "Fresh", "content": "Body", "category": "Tech"},
+        )
+        blog_id = created.json()["id"]
+
+        assert PRIMARY_COOKIE in created.cookies
+        assert client.get(f"/api/blogs/{blog_id}").status_code == 200
+
+        response_cache.clear()
+        client.cookies.clear()
+        assert client.get(f"/api/blogs/{blog_id}").status_code == 404
+
+    def test_replica_page_not_cached_right_after_invalidation(
+        self, client, auth_headers, replica_set
+    ):
+        client.post(
+            "/api/blogs",
+            headers=auth_headers,
+            json={"title": "Fresh", "content": "Body", "category": "Tech"},
+        )
+        client.cookies.clear()
+        misses = CACHE_REQUESTS.value(endpoint="list_blogs", result="miss")
+
+        # The lagging replica's page must not replace the invalidated one
+        assert client.get("/api/blogs").json() == []
+        assert client.get("/api/blogs").json() == []
+        assert CACHE_REQUESTS.value(endpoint="list_blogs", result="miss") == misses + 2
+
+    def test_failed_replica_leaves_rotation(self, client, test_blog, replica_set):
+        blog_id = test_blog.id
+        replica = replica_set.replicas[0]
+        replica.mark_down("OperationalError: connection refused")
+
+        assert client.get(f"/api/blogs/{blog_id}").status_code == 200
+        assert client.get("/ready").json()["replicas"][0]["healthy"] is False
+
+        asyncio.run(replica_set.check())
+        assert replica.healthy
+
+    def test_rotation_skips_unreachable_replicas(self, tmp_path):
+        replica_set = ReplicaSet(
+            [
+                f"sqlite:///{tmp_path / 'a.db'}",
+                f"sqlite:///{tmp_path / 'missing' / 'b.db'}",
+                f"sqlite:///{tmp_path / 'c.db'}",
+            ],
+            False,
+        )
+        asyncio.run(replica_set.check())
+
+        chosen = [replica_set.choose().name for _ in range(4)]
+
+        assert chosen == ["replica1", "replica3", "replica1", "replica3"]
+        assert replica_set.replicas[1].error.startswith("OperationalError")
+        asyncio.run(replica_set.dispose())
+
+    def test_no_cookie_without_replicas(self, client, auth_headers):
+        response = client.post(
+            "/api/blogs",
+            headers=auth_headers,
+            json={"title": "Fresh", "content": "Body", "category": "Tech"},
+        )
+
+        assert PRIMARY_COOKIE not in response.cookies
@@ -0,0 +1,328 @@
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, text
+from auth.password import HASH_SECONDS
+from config.settings import settings
+from database.pool import (
+    IDLE_PINGS,
+    SLOW_CHECKOUTS,
+    engine_options,
+    install_idle_ping,
+    pool_status,
+)
+from monitoring.http import (
+    DB_QUERIES,
+    IN_FLIGHT,
+    REQUEST_SECONDS,
+    REQUESTS,
+    count_queries,
+    stop_counting_queries,
+)
+from monitoring.metrics import Registry
+from monitoring.profiler import (
+    REPEATED_STATEMENTS,
+    ProfilingMiddleware,
+    profile_queries,
+    statement_shape,
+    stop_profiling_queries,
+)
+from monitoring.readiness import database_probe
+from tests.conftest import engine as test_engine
+
+
+@pytest.fixture
+def pool_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_WAIT_WARNING_MS", 20.0)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url, "test"))
+    yield engine
+    engine.dispose()
+
+
+class TestConnectionPool:
+    def test_pool_settings_applied(self, pool_engine):
+        status_ = pool_status(pool_engine)
+        assert status_["pool"] == "TimedQueuePool"
+        assert status_["size"] == 1
+        assert status_["max_overflow"] == 0
+
+    def test_slow_checkout_logged_and_counted(self, pool_engine, caplog):
+        slow_before = SLOW_CHECKOUTS.value(engine="test")
+        held = pool_engine.connect()
+        threading.Timer(0.05, held.close).start()
+
+        with caplog.at_level(logging.WARNING, logger="database.pool"):
+            with pool_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+
+        assert SLOW_CHECKOUTS.value(engine="test") == slow_before + 1
+        assert "database connection" in caplog.text
+        assert pool_status(pool_engine)["max_wait_ms"] >= 40
+        # The maximum is reported once, then starts over
+        assert pool_status(pool_engine)["max_wait_ms"] < 40
+
+    def test_idle_ping_only_after_idle_period(self, pool_engine, monkeypatch):
+        install_idle_ping(pool_engine)
+        pings_before = IDLE_PINGS.value(engine="test")
+        monkeypatch.setattr(settings, "DB_POOL_PING_IDLE_SECONDS", 0.05)
+
+        for _ in range(2):
+            with pool_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        assert IDLE_PINGS.value(engine="test") == pings_before
+
+        time.sleep(0.06)
+        with pool_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert IDLE_PINGS.value(engine="test") == pings_before + 1
+
+    def test_unknown_pre_ping_strategy_rejected(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL_PRE_PING", "sometimes")
+        with pytest.raises(ValueError):
+            engine_options("sqlite:///pool.db", "test")
+
+
+class TestReadiness:
+    def test_ready_reports_probe_and_pools(self, client):
+        response = client.get("/ready")
+
+        assert response.status_code == status.HTTP_200_OK
+        body = response.json()
+        assert body["status"] == "ready"
+        assert body["database"]["latency_ms"] >= 0
+        assert body["database"]["error"] is None
+        assert "checked_out" in body["pools"]["sync"]
+
+    def test_failed_probe_makes_service_unavailable(self, client, monkeypatch):
+        monkeypatch.setattr(database_probe, "error", "OperationalError: gone")
+
+        response = client.get("/ready")
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["database"]["error"] == "OperationalError: gone"
+
+    def test_stale_probe_makes_service_unavailable(self, client, monkeypatch):
+        monkeypatch.setattr(database_probe, "checked_at", time.monotonic() - 3600)
+
+        assert client.get("/ready").status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+class TestMetricsRegistry:
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = Registry()
+        latency = registry.histogram("latency_seconds", "Latency", ("route",), (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value, route="/a")
+
+        rendered = registry.render()
+
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in rendered
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in rendered
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in rendered
+        assert 'latency_seconds_count{route="/a"} 4' in rendered
+        assert 'latency_seconds_sum{route="/a"} 3.65' in rendered
+
+    def test_concurrent_increments_are_not_lost(self):
+        registry = Registry()
+        hits = registry.counter("hits_total", "Hits")
+
+        def work():
+            for _ in range(10_000):
+                hits.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert hits.value() == 80_000
+
+    def test_gauge_set_overrides_increments(self):
+        registry = Registry()
+        pending = registry.gauge("pending", "Pending")
+        pending.inc(5)
+        pending.set(2)
+        pending.dec()
+        assert pending.value() == 1
+
+    def test_multiprocess_merges_worker_snapshots(self, tmp_path):
+        registry = Registry()
+        hits = registry.counter("hits_total", "Hits")
+        workers = registry.gauge("busy", "Busy", multiprocess_mode="sum")
+        ratio = registry.gauge("ratio", "Ratio")
+        hits.inc(2)
+        workers.set(1)
+        ratio.set(0.5)
+        # A worker that has since exited
+        other_pid = int(
+            subprocess.check_output(
+                [sys.executable, "-c", "import os; print(os.getpid())"]
+            )
+        )
+        snapshot = {
+            "pid": other_pid,
+            "metrics": {
+                "hits_total": [[[], 3]],
+                "busy": [[[], 4]],
+                "ratio": [[[], 0.9]],
+            },
+        }
+        (tmp_path / f"{other_pid}.json").write_text(json.dumps(snapshot))
+
+        rendered = registry.render_multiprocess(str(tmp_path))
+
+        # Counters of exited workers still count; their gauges are dropped
+        assert "hits_total 5" in rendered
+        assert "busy 1" in rendered
+        assert 'ratio{pid="' in rendered and "0.9" not in rendered
+
+
+class TestRequestMetrics:
+    @pytest.fixture(autouse=True)
+    def count_test_queries(self):
+        count_queries(test_engine)
+        yield
+        stop_counting_queries(test_engine)
+
+    def test_requests_labelled_by_route_template(self, client, test_blog):
+        route = "/api/blogs/{blog_id}"
+        before = REQUEST_SECONDS.count(method="GET", route=route)
+        ok = REQUESTS.value(method="GET", route=route, status="200")
+        missing = REQUESTS.value(method="GET", route=route, status="404")
+        queries = DB_QUERIES.value(route=route)
+
+        client.get(f"/api/blogs/{test_blog.id}")
+        client.get("/api/blogs/999999")
+
+        assert REQUEST_SECONDS.count(method="GET", route=route) == before + 2
+        assert REQUESTS.value(method="GET", route=route, status="200") == ok + 1
+        assert REQUESTS.value(method="GET", route=route, status="404") == missing + 1
+        assert DB_QUERIES.value(route=route) >= queries + 2
+        assert IN_FLIGHT.value() == 0
+
+    def test_unknown_paths_share_one_label(self, client):
+        before = REQUESTS.value(method="GET", route="unmatched", status="404")
+
+        client.get("/no/such/path")
+        client.get("/another/missing/path")
+
+        assert REQUESTS.value(method="GET", route="unmatched", status="404") == (
+            before + 2
+        )
+
+    def test_password_hashing_timed(self, client):
+        before = HASH_SECONDS.count(operation="hash_password")
+
+        client.post(
+            "/api/auth/signup",
+            json={"email": "timed@example.com", "password": "password123"},
+        )
+
+        assert HASH_SECONDS.count(operation="hash_password") == before + 1
+
+    def test_metrics_endpoint_exposes_histograms(self, client):
+        client.get("/health")
+
+        body = client.get("/metrics").text
+
+        assert (
+            'http_request_duration_seconds_bucket{method="GET",route="/health",le="0.005"}'
+            in body
+        )
+        assert "# TYPE http_request_duration_seconds histogram" in body
+
+
+class TestSqlProfiler:
+    @pytest.fixture(autouse=True)
+    def profile_test_queries(self, monkeypatch):
+        monkeypatch.setattr(settings, "SQL_PROFILE_SAMPLE_RATE", 1.0)
+        profile_queries(test_engine)
+        yield
+        stop_profiling_queries(test_engine)
+
+    @staticmethod
+    def run_queries(statements: int):
+        """An ASGI app running ``SELECT :n`` once per id, like an N+1 loop."""
+
+        async def app(scope, receive, send):
+            with test_engine.connect() as connection:
+                for n in range(statements):
+                    connection.execute(text("SELECT :n"), {"n": n})
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        return ProfilingMiddleware(app)
+
+    @staticmethod
+    def call(app) -> dict:
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/loop", "headers": []}
+        asyncio.run(app(scope, receive, send))
+        return dict(messages[0]["headers"])
+
+    def test_server_timing_header(self, client, test_blog):
+        response = client.get("/api/blogs")
+
+        timing = response.headers["Server-Timing"]
+        assert timing.startswith("db;dur=")
+        assert "queries" in timing
+        assert "serialize;dur=" in timing
+        assert "app;dur=" in timing
+
+    def test_unsampled_requests_have_no_header(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "SQL_PROFILE_SAMPLE_RATE", 0.0)
+
+        assert "Server-Timing" not in client.get("/health").headers
+
+    def test_repeated_statement_logged(self, caplog):
+        before = REPEATED_STATEMENTS.value(route="unmatched")
+
+        with caplog.at_level(logging.WARNING, logger="monitoring.profiler"):
+            headers = self.call(self.run_queries(6))
+
+        assert b'desc="6 queries"' in headers[b"server-timing"]
+        assert REPEATED_STATEMENTS.value(route="unmatched") == before + 1
+        record = next(r for r in caplog.records if r.msg.startswith("repeated_query"))
+        assert record.count == 6
+        assert record.statement == "SELECT ?"
+
+    def test_few_repeats_not_logged(self, caplog):
+        with caplog.at_level(logging.WARNING, logger="monitoring.profiler"):
+            self.call(self.run_queries(2))
+
+        assert "repeated_query" not in caplog.text
+
+    def test_slow_query_logged(self, caplog, monkeypatch):
+        monkeypatch.setattr(settings, "SQL_SLOW_QUERY_MS", 1e-6)
+
+        with caplog.at_level(logging.WARNING, logger="monitoring.profiler"):
+            self.call(self.run_queries(1))
+
+        record = next(r for r in caplog.records if r.msg.startswith("slow_query"))
+        assert record.statement == "SELECT ?"
+        assert record.duration_ms >= 0
+
+    def test_statement_shape_collapses_parameter_lists(self):
+        assert statement_shape("SELECT *\n  FROM blogs WHERE id IN (?, ?, ?)") == (
+            "SELECT * FROM blogs WHERE id IN (...)"
+        )
+        assert statement_shape("WHERE id IN (%(id_1)s, %(id_2)s)") == (
+            "WHERE id IN (...)"
+        )
@@ -61,3 +61,26 @@ class TestUpdateProfile:
         response = client.put("/api/profile", headers=auth_headers, json={})
 
         assert response.status_code == status.HTTP_200_OK
+
+
+class TestProfileConditionalGet:
+    def test_unchanged_profile_returns_304(self, client, auth_headers):
+        etag = client.get("/api/profile", headers=auth_headers).headers["ETag"]
+
+        response = client.get(
+            "/api/profile", headers={**auth_headers, "If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    def test_profile_update_changes_etag(self, client, auth_headers):
+        etag = client.get("/api/profile", headers=auth_headers).headers["ETag"]
+        client.put("/api/profile", headers=auth_headers, json={"country": "Canada"})
+
+        response = client.get(
+            "/api/profile", headers={**auth_headers, "If-None-Match": etag}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["country"] == "Canada"
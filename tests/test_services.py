@@ -1,8 +1,55 @@
-from services.user_service import UserService
+import json
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import create_engine, event, inspect, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from services.user_service import PENDING_HASH_UPGRADES, UserService
 from services.blog_service import BlogService
 from schemas.user import UserSignup, UserProfileUpdate
 from schemas.blog import BlogCreate, BlogUpdate
+from datetime import datetime, timedelta, timezone
+from auth.jwt_handler import create_token, token_digest, token_expiry
 from auth.password import verify_password
+from database import category_stats
+from database.bulk_import import BulkImportError, CopyStream, Importer
+from database.connection import Base
+from database.dataset import CATEGORIES, Dataset, DatasetLoader
+from database.models import Blog, MaintenanceRun, TokenBlacklist, make_excerpt
+from database.upgrades import (
+    BLOG_INDEXES,
+    EXCERPT_LENGTH,
+    add_blog_excerpt,
+    upgrade_schema,
+)
+from monitoring.metrics import REGISTRY
+from services.maintenance import (
+    BLACKLIST_ROWS,
+    CATEGORY_CORRECTIONS,
+    claim_run,
+    count_pending_hash_upgrades,
+    prune_token_blacklist,
+    reconcile_category_stats,
+)
+from config.settings import settings
+from services import search_index
+from services.pagination import decode_cursor, encode_cursor
+from services.search_index import InvertedIndex
+from tests.conftest import engine
+
+
+@contextmanager
+def recorded_statements():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
 
 
 class TestUserService:
@@ -49,6 +96,51 @@ class TestUserService:
         assert isinstance(access_token, str)
         assert isinstance(refresh_token, str)
 
+    def test_blacklist_token_records_expiry(self, db_session, test_user, auth_token):
+        UserService.blacklist_token(db_session, auth_token, test_user.id)
+
+        entry = db_session.query(TokenBlacklist).one()
+        assert entry.expires_at == token_expiry(auth_token).replace(tzinfo=None)
+
+    def test_prune_expired_tokens_in_batches(self, db_session, test_user):
+        now = datetime.now(timezone.utc)
+        for i in range(5):
+            db_session.add(
+                TokenBlacklist(
+                    token_digest=f"expired-{i}",
+                    user_id=test_user.id,
+                    expires_at=now - timedelta(minutes=1),
+                )
+            )
+        db_session.add(
+            TokenBlacklist(
+                token_digest="live",
+                user_id=test_user.id,
+                expires_at=now + timedelta(days=1),
+            )
+        )
+        db_session.commit()
+
+        assert UserService.prune_expired_tokens(db_session, batch_size=2) == 5
+        assert UserService.count_blacklisted_tokens(db_session) == 1
+
+    def test_prune_task_reports_metrics(self, db_session, test_user, refresh_token):
+        UserService.blacklist_token(db_session, refresh_token, test_user.id)
+
+        assert prune_token_blacklist(db_session) == 0
+        assert BLACKLIST_ROWS.value() == 1
+        assert "token_blacklist_prune_duration_seconds" in REGISTRY.render()
+
+    def test_pending_hash_upgrades_counted_from_database(self, db_session, test_user):
+        PENDING_HASH_UPGRADES.set(5)
+        UserService.update_password_hash(
+            db_session, test_user, test_user.hashed_password
+        )
+        assert PENDING_HASH_UPGRADES.value() == 5
+
+        assert count_pending_hash_upgrades(db_session) == 0
+        assert PENDING_HASH_UPGRADES.value() == 0
+
 
 class TestBlogService:
     def test_create_blog(self, db_session, test_user):
@@ -85,17 +177,650 @@ class TestBlogService:
         assert len(blogs) >= 1
         assert any("Python" in blog.title for blog in blogs)
 
+    def test_search_blogs_like_backend(self, db_session, multiple_blogs, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "like")
+
+        hits = BlogService.search(db_session, "ytho", highlight=True)
+
+        assert [hit.blog.title for hit in hits] == ["Python Programming"]
+        assert hits[0].snippet is None
+
     def test_update_blog(self, db_session, test_blog):
         blog_data = BlogUpdate(title="Updated Title")
 
-        updated_blog = BlogService.update_blog(db_session, test_blog, blog_data)
+        updated_blog = BlogService.update_blog(
+            db_session, test_blog.id, test_blog.author_id, blog_data
+        )
 
         assert updated_blog.title == "Updated Title"
         assert updated_blog.content == test_blog.content
 
-    def test_delete_blog(self, db_session, test_blog):
+    def test_update_blog_of_other_author(self, db_session, test_blog, test_user_2):
+        blog_data = BlogUpdate(title="Updated Title")
+
+        assert (
+            BlogService.update_blog(db_session, test_blog.id, test_user_2.id, blog_data)
+            is None
+        )
+        assert test_blog.title != "Updated Title"
+
+    def test_excerpt_follows_content(self, db_session, test_blog):
+        updated_blog = BlogService.update_blog(
+            db_session, test_blog.id, test_blog.author_id, BlogUpdate(content="x" * 500)
+        )
+
+        assert updated_blog.excerpt == "x" * EXCERPT_LENGTH
+        assert test_blog.excerpt == "x" * EXCERPT_LENGTH
+
+    def test_projection_loads_only_requested_columns(self, db_session, multiple_blogs):
+        rows = BlogService.get_page_rows(db_session, ["title"])
+
+        assert len(rows) == 4
+        assert set(rows[0]._fields) == {"id", "created_at", "updated_at", "title"}
+
+    def test_delete_blog(self, db_session, test_blog, test_user_2):
         blog_id = test_blog.id
-        BlogService.delete_blog(db_session, test_blog)
+
+        assert not BlogService.delete_blog(db_session, blog_id, test_user_2.id)
+        assert BlogService.delete_blog(db_session, blog_id, test_blog.author_id)
 
         deleted_blog = BlogService.get_blog_by_id(db_session, blog_id)
         assert deleted_blog is None
+
+
+class TestWriteRoundTrips:
+    def test_signup_is_one_statement(self, db_session, test_user):
+        email = test_user.email
+
+        with recorded_statements() as statements:
+            user = UserService.insert_user(db_session, "new@example.com", "hash")
+            taken = UserService.insert_user(db_session, email, "hash")
+
+        assert user.email == "new@example.com" and user.is_active
+        assert taken is None
+        assert len(statements) == 2
+        assert all("ON CONFLICT" in statement for statement in statements)
+
+    def test_create_writes_post_and_count(self, db_session, test_user):
+        blog_data = BlogCreate(title="Title", content="Body", category="Tech")
+
+        with recorded_statements() as statements:
+            blog = BlogService.create_blog(db_session, blog_data, test_user.id)
+
+        assert (blog.title, blog.excerpt) == ("Title", "Body")
+        assert [statement.split()[0] for statement in statements] == [
+            "INSERT",
+            "INSERT",
+        ]
+        assert "category_stats" in statements[1]
+
+    def test_update_is_one_statement(self, db_session, test_blog, test_user_2):
+        blog_id, author_id = test_blog.id, test_blog.author_id
+        other_id = test_user_2.id
+        blog_data = BlogUpdate(title="Updated")
+
+        with recorded_statements() as statements:
+            updated = BlogService.update_blog(db_session, blog_id, author_id, blog_data)
+        with recorded_statements() as refused:
+            BlogService.update_blog(db_session, blog_id, other_id, blog_data)
+
+        assert updated.title == "Updated"
+        assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+        assert len(refused) == 1
+
+    def test_category_change_reads_old_category(self, db_session, test_blog):
+        blog_id, author_id = test_blog.id, test_blog.author_id
+
+        with recorded_statements() as statements:
+            BlogService.update_blog(
+                db_session, blog_id, author_id, BlogUpdate(category="Travel")
+            )
+
+        assert [statement.split()[0] for statement in statements] == [
+            "SELECT",
+            "UPDATE",
+            "INSERT",
+        ]
+
+    def test_delete_writes_post_and_count(self, db_session, test_blog, test_user_2):
+        blog_id, author_id = test_blog.id, test_blog.author_id
+        other_id = test_user_2.id
+
+        with recorded_statements() as statements:
+            assert not BlogService.delete_blog(db_session, blog_id, other_id)
+            assert BlogService.delete_blog(db_session, blog_id, author_id)
+
+        assert [statement.split()[0] for statement in statements] == [
+            "DELETE",
+            "DELETE",
+            "INSERT",
+        ]
+
+
+class TestCategoryStats:
+    def counts(self, db_session):
+        return {row.category: row.posts for row in category_stats.counts(db_session)}
+
+    def test_writes_keep_counts(self, db_session, test_user):
+        user_id = test_user.id
+        items = [
+            BlogCreate(title="A", content="Body", category="Tech"),
+            BlogCreate(title="B", content="Body", category="Tech"),
+            BlogCreate(title="C", content="Body", category="Food"),
+        ]
+        first, second, _ = BlogService.create_blogs(
+            db_session, items, user_id, ["id", "title", "content", "category"]
+        )
+        assert self.counts(db_session) == {"Tech": 2, "Food": 1}
+
+        BlogService.update_blog(
+            db_session, first.id, user_id, BlogUpdate(category="Food")
+        )
+        BlogService.update_blog(
+            db_session, second.id, user_id, BlogUpdate(category="Tech")
+        )
+        assert self.counts(db_session) == {"Tech": 1, "Food": 2}
+
+        BlogService.delete_blog(db_session, second.id, user_id)
+        assert self.counts(db_session) == {"Food": 2}
+        assert category_stats.total(db_session) == 2
+        assert category_stats.total(db_session, "Food") == 2
+        assert category_stats.total(db_session, "Tech") == 0
+
+    def test_reconcile_corrects_drift(self, db_session, multiple_blogs):
+        # The fixture inserts posts directly, bypassing the counts
+        corrections = CATEGORY_CORRECTIONS.value()
+        category_stats.adjust(db_session, {"Gone": 3})
+        db_session.commit()
+
+        assert reconcile_category_stats(db_session) == 4
+        assert self.counts(db_session) == {"Technology": 2, "Science": 1, "Health": 1}
+        assert CATEGORY_CORRECTIONS.value() == corrections + 4
+        assert reconcile_category_stats(db_session) == 0
+
+    def test_backfill_only_fills_empty_table(self, db_session, multiple_blogs):
+        assert category_stats.backfill(db_session)
+        db_session.commit()
+
+        assert category_stats.total(db_session) == 4
+        assert not category_stats.backfill(db_session)
+
+
+class TestMaintenanceRuns:
+    def test_one_claim_per_interval(self, db_session):
+        assert claim_run(db_session, "job", 3600)
+        assert not claim_run(db_session, "job", 3600)
+        assert claim_run(db_session, "other", 3600)
+
+        db_session.execute(update(MaintenanceRun).values(last_run=datetime(2020, 1, 1)))
+        db_session.commit()
+        assert claim_run(db_session, "job", 3600)
+
+
+class TestCursor:
+    def test_cursor_round_trip(self, test_blog):
+        token = encode_cursor(test_blog.created_at, test_blog.id)
+
+        assert decode_cursor(token) == (test_blog.created_at, test_blog.id)
+
+    def test_recent_blogs_after_cursor(self, db_session, multiple_blogs):
+        first = BlogService.get_recent_blogs(db_session, limit=2)
+        rest = BlogService.get_recent_blogs(
+            db_session, limit=10, cursor=(first[-1].created_at, first[-1].id)
+        )
+
+        assert len(rest) == 2
+        assert not {b.id for b in first} & {b.id for b in rest}
+
+
+class TestInvertedIndex:
+    def test_bm25_ranking_and_and_semantics(self):
+        index = InvertedIndex()
+        index.add(1, "Python tips", "python idioms for python tooling", "Tech")
+        index.add(2, "Gardening", "a note that mentions python once", "Home")
+        index.add(3, "Rust", "ownership and borrowing", "Tech")
+
+        assert [doc for _, doc in index.search("python")] == [1, 2]
+        assert [doc for _, doc in index.search("python gardening")] == [2]
+        assert index.search("haskell") == []
+
+    def test_update_and_remove(self):
+        index = InvertedIndex()
+        index.add(1, "Python", "content", "Tech")
+        index.add(1, "Rust", "content", "Tech")
+
+        assert index.search("python") == []
+        assert [doc for _, doc in index.search("rust")] == [1]
+
+        index.remove(1)
+        assert index.search("rust") == []
+        assert len(index) == 0
+
+    def test_replaced_versions_do_not_skew_scores(self):
+        churned, fresh = InvertedIndex(), InvertedIndex()
+        for index in (churned, fresh):
+            index.add(1, "Python", "python tips", "Tech")
+            index.add(2, "Python", "more python", "Tech")
+        for version in range(50):
+            churned.add(3, "Rust", f"draft {version}", "Tech")
+            churned.add(2, "Python", "more python", "Tech")
+        churned.remove(3)
+
+        assert churned.search("python") == fresh.search("python")
+        assert churned.search("draft") == []
+        assert churned.memory_usage()["slots"] <= 2 * len(churned) + 1
+
+    def test_pruned_search_matches_full_ranking(self):
+        index = InvertedIndex()
+        for doc_id in range(1, 400):
+            index.add(
+                doc_id,
+                "Post",
+                " ".join(["common"] * (doc_id % 7 + 1) + ["filler"] * (doc_id % 13)),
+                "rare" if doc_id % 3 == 0 else "Tech",
+            )
+        for query in ("common", "common rare"):
+            full = index.search(query, limit=1000)
+
+            assert index.search(query, limit=10) == full[:10]
+            assert index.search(query, limit=10, skip=5) == full[5:15]
+            assert index.search(query, limit=10, cursor=full[20]) == full[21:31]
+
+    def test_cursor_paging(self):
+        index = InvertedIndex()
+        for doc_id in range(1, 6):
+            index.add(doc_id, "Shared", "word " * doc_id, "Tech")
+
+        first = index.search("shared", limit=2)
+        rest = index.search("shared", limit=10, cursor=first[-1])
+
+        assert len(rest) == 3
+        assert not {d for _, d in first} & {d for _, d in rest}
+
+    def test_memory_usage(self):
+        index = InvertedIndex()
+        index.add(1, "Python", "some content", "Tech")
+
+        usage = index.memory_usage()
+        assert usage["documents"] == 1
+        assert usage["bytes_per_document"] > 0
+
+
+class TestMemorySearchBackend:
+    def test_follows_blog_writes(self, db_session, test_user, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+        search_index.rebuild(db_session)
+
+        blog = BlogService.create_blog(
+            db_session,
+            BlogCreate(title="Python", content="Body", category="Tech"),
+            test_user.id,
+        )
+        assert [b.id for b in BlogService.search_blogs(db_session, "python")] == [
+            blog.id
+        ]
+
+        BlogService.update_blog(
+            db_session, blog.id, test_user.id, BlogUpdate(title="Rust")
+        )
+        assert BlogService.search_blogs(db_session, "python") == []
+
+        BlogService.delete_blog(db_session, blog.id, test_user.id)
+        assert BlogService.search_blogs(db_session, "rust") == []
+
+    def test_resync_applies_other_workers_writes(
+        self, db_session, test_user, multiple_blogs, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+        search_index.rebuild(db_session)
+        python_post, ml_post = multiple_blogs[0].id, multiple_blogs[1].id
+
+        # Writes by another worker, which this worker's index does not see
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "like")
+        created = BlogService.create_blog(
+            db_session,
+            BlogCreate(title="Haskell", content="Body", category="Tech"),
+            test_user.id,
+        )
+        BlogService.update_blog(
+            db_session, python_post, test_user.id, BlogUpdate(title="Rust")
+        )
+        BlogService.delete_blog(db_session, ml_post, test_user.id)
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+
+        search_index.resync(db_session)
+
+        assert [b.id for b in BlogService.search_blogs(db_session, "haskell")] == [
+            created.id
+        ]
+        assert [b.id for b in BlogService.search_blogs(db_session, "rust")] == [
+            python_post
+        ]
+        assert ml_post not in search_index.index
+        assert len(search_index.index) == len(multiple_blogs)
+
+    def test_resync_compares_ids_when_counts_match(
+        self, db_session, test_user, multiple_blogs, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+        search_index.rebuild(db_session)
+        deleted = multiple_blogs[1].id
+
+        # Another worker deletes a post; a post with an old updated_at (say,
+        # from an import) keeps the count the same
+        db_session.delete(multiple_blogs[1])
+        db_session.add(
+            Blog(
+                title="Imported",
+                content="Body",
+                category="Tech",
+                author_id=test_user.id,
+                updated_at=datetime(2020, 1, 1),
+            )
+        )
+        db_session.commit()
+        monkeypatch.setattr(settings, "SEARCH_INDEX_ID_CHECK_SECONDS", 0)
+
+        search_index.resync(db_session)
+
+        assert deleted not in search_index.index
+
+    def test_resync_skips_posts_already_indexed(
+        self, db_session, test_user, multiple_blogs, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+        search_index.rebuild(db_session)
+        BlogService.update_blog(
+            db_session, multiple_blogs[0].id, test_user.id, BlogUpdate(title="Rust")
+        )
+        scanned = search_index.synced_through
+        slots = search_index.index.memory_usage()["slots"]
+
+        search_index.resync(db_session)
+        search_index.resync(db_session)
+
+        assert search_index.index.memory_usage()["slots"] == slots
+        assert search_index.synced_through > scanned
+
+    def test_rebuild_from_database(self, db_session, multiple_blogs, monkeypatch):
+        monkeypatch.setattr(settings, "SEARCH_BACKEND", "memory")
+        search_index.rebuild(db_session)
+
+        hits = BlogService.search(db_session, "machine", highlight=True)
+
+        assert [hit.blog.title for hit in hits] == ["Machine Learning Basics"]
+        assert len(search_index.index) == len(multiple_blogs)
+
+
+FIRST_RELEASE_DDL = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL)",
+    "CREATE TABLE blogs (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, "
+    "content TEXT NOT NULL, category VARCHAR NOT NULL, author_id INTEGER, "
+    "created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE token_blacklist (id INTEGER PRIMARY KEY, token VARCHAR NOT NULL, "
+    "user_id INTEGER REFERENCES users (id) ON DELETE CASCADE, "
+    "blacklisted_at DATETIME NOT NULL)",
+    "CREATE UNIQUE INDEX ix_token_blacklist_token ON token_blacklist (token)",
+    "CREATE INDEX ix_token_blacklist_id ON token_blacklist (id)",
+]
+
+
+class TestSchemaUpgrade:
+    def test_excerpt_column_added_and_backfilled(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            connection.execute(
+                text("CREATE TABLE blogs (id INTEGER PRIMARY KEY, content TEXT)")
+            )
+            connection.execute(
+                text("INSERT INTO blogs VALUES (1, :content)"), {"content": "y" * 300}
+            )
+
+            add_blog_excerpt(connection)
+            add_blog_excerpt(connection)
+
+            excerpt = connection.execute(text("SELECT excerpt FROM blogs")).scalar()
+        assert excerpt == "y" * EXCERPT_LENGTH
+
+    @pytest.fixture
+    def first_release(self):
+        """An engine holding the schema as the first release created it."""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        with engine.begin() as connection:
+            for statement in FIRST_RELEASE_DDL:
+                connection.execute(text(statement))
+        yield engine
+        engine.dispose()
+
+    def test_pagination_indexes_added(self, first_release):
+        upgrade_schema(first_release, Base.metadata)
+        upgrade_schema(first_release, Base.metadata)
+
+        indexes = {
+            index["name"]: index
+            for index in inspect(first_release).get_indexes("blogs")
+        }
+        assert {
+            name: tuple(indexes[name]["column_names"]) for name in BLOG_INDEXES
+        } == BLOG_INDEXES
+
+    @pytest.fixture
+    def revoked(self, first_release):
+        """Tokens blacklisted by the first release: a JWT and an unreadable one."""
+        tokens = [create_token({"sub": "1"}, timedelta(days=1)), "not-a-jwt"]
+        with first_release.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO token_blacklist (token, user_id, blacklisted_at) "
+                    "VALUES (:token, 1, '2026-01-01 00:00:00.000000')"
+                ),
+                [{"token": token} for token in tokens],
+            )
+        return tokens
+
+    def test_blacklist_keyed_by_backfilled_digest(self, first_release, revoked):
+        upgrade_schema(first_release, Base.metadata)
+        upgrade_schema(first_release, Base.metadata)
+
+        with Session(first_release) as db:
+            digests = db.scalars(
+                select(TokenBlacklist.token_digest).order_by(TokenBlacklist.id)
+            ).all()
+        assert digests == [token_digest(token) for token in revoked]
+        assert "token" not in {
+            column["name"]
+            for column in inspect(first_release).get_columns("token_blacklist")
+        }
+
+    def test_blacklist_expiry_backfilled_and_required(self, first_release, revoked):
+        upgrade_schema(first_release, Base.metadata)
+
+        with Session(first_release) as db:
+            expiries = db.scalars(
+                select(TokenBlacklist.expires_at).order_by(TokenBlacklist.id)
+            ).all()
+        assert expiries == [
+            token_expiry(revoked[0]).replace(tzinfo=None),
+            datetime(2026, 1, 1) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ]
+        (expires_at,) = [
+            column
+            for column in inspect(first_release).get_columns("token_blacklist")
+            if column["name"] == "expires_at"
+        ]
+        assert not expires_at["nullable"]
+
+
+class TestBulkImport:
+    @pytest.fixture
+    def import_engine(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+        Base.metadata.create_all(bind=engine)
+        yield engine
+        engine.dispose()
+
+    @staticmethod
+    def write_jsonl(path, records):
+        path.write_text("".join(json.dumps(record) + "\n" for record in records))
+        return path
+
+    @staticmethod
+    def posts(count, start=0):
+        return [
+            {
+                "title": f"Post {i}",
+                "content": f"imported body {i} " * 20,
+                "category": "Imported",
+                "author_id": 1,
+                "created_at": "2024-01-01T00:00:00Z",
+            }
+            for i in range(start, start + count)
+        ]
+
+    def load_users(self, engine, tmp_path):
+        path = tmp_path / "users.csv"
+        path.write_text(
+            "id,email,hashed_password,first_name,is_active\n"
+            "1,one@example.com,$2b$04$hash,One,\n"
+            "2,two@example.com,$2b$04$hash,,false\n"
+        )
+        Importer(engine, "users", path, report=lambda line: None).run()
+
+    def test_loads_users_csv_and_blogs_jsonl(self, import_engine, tmp_path):
+        self.load_users(import_engine, tmp_path)
+        path = self.write_jsonl(tmp_path / "posts.jsonl", self.posts(25))
+
+        loaded = Importer(
+            import_engine, "blogs", path, batch_size=10, report=lambda line: None
+        ).run()
+
+        assert loaded == 25
+        with import_engine.connect() as connection:
+            users = connection.execute(
+                text("SELECT id, first_name, is_active FROM users ORDER BY id")
+            ).all()
+            excerpt = connection.execute(text("SELECT excerpt FROM blogs")).scalar()
+            matches = connection.execute(
+                text("SELECT count(*) FROM blogs_fts WHERE blogs_fts MATCH 'imported'")
+            ).scalar()
+            indexes = {
+                row[0]
+                for row in connection.execute(
+                    text("SELECT name FROM sqlite_master WHERE type = 'index'")
+                )
+            }
+        assert users == [(1, "One", True), (2, None, False)]
+        assert excerpt == make_excerpt(self.posts(1)[0]["content"])
+        assert matches == 25
+        assert {"ix_blogs_created_at_id", "ix_blogs_category"} <= indexes
+
+    def test_resume_after_failure_loads_each_record_once(self, import_engine, tmp_path):
+        self.load_users(import_engine, tmp_path)
+        records = self.posts(10) + [{"title": "No content"}] + self.posts(5, 10)
+        path = self.write_jsonl(tmp_path / "posts.jsonl", records)
+
+        importer = Importer(
+            import_engine, "blogs", path, commit_every=4, report=lambda line: None
+        )
+        with pytest.raises(BulkImportError, match="record 11: missing content"):
+            importer.run()
+        with pytest.raises(BulkImportError, match="pass --resume"):
+            Importer(import_engine, "blogs", path, report=lambda line: None).run()
+
+        # Fix the bad record and pick up after the last committed chunk
+        records[10] = self.posts(1, 99)[0]
+        self.write_jsonl(path, records)
+        loaded = Importer(
+            import_engine, "blogs", path, resume=True, report=lambda line: None
+        ).run()
+
+        with import_engine.connect() as connection:
+            titles = connection.execute(
+                text("SELECT title FROM blogs ORDER BY id")
+            ).scalars()
+            assert list(titles) == [record["title"] for record in records]
+        assert loaded == 8
+
+    def test_copy_stream_encodes_csv_in_bounded_reads(self):
+        rows = iter(
+            [
+                {"id": 1, "title": 'Say "hi"', "picture": None, "excerpt": ""},
+                {"id": 2, "title": "two\nlines", "picture": "p", "excerpt": "e"},
+            ]
+        )
+        stream = CopyStream(rows, ["id", "title", "picture", "excerpt"])
+
+        chunks = iter(lambda: stream.read(8), b"")
+
+        assert all(len(chunk) <= 8 for chunk in chunks)
+        stream = CopyStream(
+            iter([{"title": 'Say "hi"', "picture": None, "excerpt": ""}]),
+            ["title", "picture", "excerpt"],
+        )
+        assert stream.read() == b'"Say ""hi""",,""\n'
+
+
+class TestDataset:
+    END = datetime(2024, 6, 1)
+
+    @pytest.fixture(scope="class")
+    def dataset(self):
+        return Dataset(50, 2000, "$2b$04$hash", seed=7, end=self.END, days=365)
+
+    def test_same_seed_same_records(self, dataset):
+        again = Dataset(50, 2000, "$2b$04$hash", seed=7, end=self.END, days=365)
+
+        assert list(again.blog_records())[:20] == list(dataset.blog_records())[:20]
+        assert list(again.user_records()) == list(dataset.user_records())
+        # Resuming draws the same records as a full run
+        assert list(dataset.blog_records(1990)) == list(dataset.blog_records())[1990:]
+
+    def test_distributions_are_skewed(self, dataset):
+        posts = list(dataset.blog_records())
+        per_author = sorted(
+            (sum(post["author_id"] == a for post in posts) for a in range(1, 51)),
+            reverse=True,
+        )
+        per_category = [
+            sum(post["category"] == name for post in posts) for name in CATEGORIES
+        ]
+        created = [post["created_at"] for post in posts]
+
+        # Zipf: the top author writes far more than an equal share (40 posts)
+        assert per_author[0] > 5 * per_author[25]
+        assert per_category[0] > 5 * per_category[-1]
+        assert created == sorted(created)
+        assert self.END - timedelta(days=365) <= created[0] <= created[-1] <= self.END
+        # Volume grows: the second half of the period has most posts
+        middle = self.END - timedelta(days=182)
+        assert sum(moment >= middle for moment in created) > 0.65 * len(created)
+        assert all(post["updated_at"] >= post["created_at"] for post in posts)
+
+    def test_loads_through_bulk_loader(self, dataset, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'dataset.db'}")
+        Base.metadata.create_all(bind=engine)
+
+        for table in ("users", "blogs"):
+            DatasetLoader(engine, table, dataset, report=lambda line: None).run()
+
+        with engine.connect() as connection:
+            users, blogs, orphans = connection.execute(
+                text(
+                    "SELECT (SELECT count(*) FROM users), (SELECT count(*) FROM blogs),"
+                    " (SELECT count(*) FROM blogs WHERE author_id NOT IN"
+                    " (SELECT id FROM users))"
+                )
+            ).one()
+            common = dataset.word_table[0]
+            matches = connection.execute(
+                text("SELECT count(*) FROM blogs_fts WHERE blogs_fts MATCH :word"),
+                {"word": common},
+            ).scalar()
+        assert (users, blogs, orphans) == (50, 2000, 0)
+        assert matches > 100
+        with Session(engine) as db:
+            # Blogs loads recount the category facets
+            assert category_stats.total(db) == 2000
+        with pytest.raises(BulkImportError, match="pass --resume"):
+            DatasetLoader(engine, "blogs", dataset, report=lambda line: None).run()
+        engine.dispose()